@@ -0,0 +1,114 @@
+"""
+compares per attempt cpu time of building the details and book requests
+from scratch with filling in requests armed ahead of the drop
+
+    poetry run python -m benchmarks.armed_requests
+"""
+
+import timeit
+from datetime import date, datetime, timedelta
+
+from requests import PreparedRequest, Request
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.constants import BOOK_HEADERS, ResyEndpoints
+from resy_bot.model_builders import (
+    build_book_request_body,
+    build_find_request_body,
+    build_get_slot_details_body,
+)
+from resy_bot.models import (
+    BookToken,
+    DetailsResponseBody,
+    ReservationRequest,
+    ResyConfig,
+    Slot,
+)
+from benchmarks.find_decode import build_slots
+
+NUMBER = 2000
+
+
+def build_from_scratch(
+    api_access: ResyApiAccess,
+    config: ResyConfig,
+    request: ReservationRequest,
+    slot: Slot,
+    details: DetailsResponseBody,
+) -> PreparedRequest:
+    session = api_access.session
+
+    find_body = build_find_request_body(request)
+    find_url = api_access.base_url + ResyEndpoints.FIND.value
+    session.prepare_request(Request("GET", find_url, params=find_body.dict()))
+    session.merge_environment_settings(find_url, {}, None, None, None)
+
+    details_body = build_get_slot_details_body(request, slot)
+    details_url = api_access.base_url + ResyEndpoints.DETAILS.value
+    session.prepare_request(Request("GET", details_url, params=details_body.dict()))
+    session.merge_environment_settings(details_url, {}, None, None, None)
+
+    book_body = build_book_request_body(details, config)
+    book_url = api_access.base_url + ResyEndpoints.BOOK.value
+    book_request = session.prepare_request(
+        Request(
+            "POST",
+            book_url,
+            data=api_access._dump_book_request_body_to_dict(book_body),
+            headers=BOOK_HEADERS,
+        )
+    )
+    session.merge_environment_settings(book_url, {}, None, None, None)
+    return book_request
+
+
+def main() -> None:
+    config = ResyConfig(
+        api_key="key",
+        token="token",
+        payment_method_id=123456,
+        email="diner@example.com",
+        password="password",
+    )
+    api_access = ResyApiAccess.build(config)
+    request = ReservationRequest(
+        venue_id="12345",
+        party_size=2,
+        ideal_hour=19,
+        ideal_minute=0,
+        window_hours=1,
+        prefer_early=False,
+        ideal_date=date.today() + timedelta(days=14),
+    )
+    details = DetailsResponseBody(
+        book_token=BookToken(
+            date_expires=datetime.now() + timedelta(minutes=5),
+            value="book-token-" + "x" * 400,
+        )
+    )
+    slot = build_slots(1)[0]
+    armed = api_access.arm(request, config)
+
+    def fill_armed() -> PreparedRequest:
+        armed.details_request(slot.config.token)
+        return armed.book_request(details.book_token.value)
+
+    scratch = (
+        min(
+            timeit.repeat(
+                lambda: build_from_scratch(api_access, config, request, slot, details),
+                number=NUMBER,
+            )
+        )
+        / NUMBER
+    )
+    filled = min(timeit.repeat(fill_armed, number=NUMBER)) / NUMBER
+
+    print(f"{'path':>8} {'us per attempt':>15}")
+    print(f"{'scratch':>8} {scratch * 1e6:>15.1f}")
+    print(f"{'armed':>8} {filled * 1e6:>15.1f}")
+    print(f"speedup {scratch / filled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+runs ResyManager against the local stand-in and reports
+drop-to-booked latency percentiles per configuration
+
+    poetry run python -m benchmarks.end_to_end
+"""
+
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.logging import logging
+from resy_bot.armed import ArmedReservation
+from resy_bot.manager import ResyManager
+from resy_bot.models import ReservationRequest, ReservationRetriesConfig, ResyConfig
+from resy_bot.selectors import IndexedSelector
+from resy_bot.stand_in import StandInResyServer, generate_slots
+
+N_RUNS = 30
+N_SLOTS = 300
+LATENCY_SECONDS = 0.01
+# how long before the drop the bot starts polling
+LEAD_SECONDS = 0.05
+
+CONFIG = ResyConfig(
+    api_key="key",
+    token="token",
+    payment_method_id=1,
+    email="diner@example.com",
+    password="password",
+)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def run_once(
+    server: StandInResyServer,
+    manager: ResyManager,
+    request: ReservationRequest,
+    armed: Optional[ArmedReservation],
+) -> float:
+    drop = server.schedule_drop(
+        generate_slots(request.target_date, N_SLOTS), delay=LEAD_SECONDS
+    )
+    manager.make_reservation_with_retries(request, armed)
+    return time.time() - drop
+
+
+def measure(
+    name: str,
+    build_manager: Callable[[StandInResyServer], ResyManager],
+    arm: bool = False,
+    **server_kwargs: float,
+) -> Dict[str, float]:
+    request = ReservationRequest(
+        venue_id="12345",
+        party_size=2,
+        ideal_hour=19,
+        ideal_minute=0,
+        window_hours=1,
+        prefer_early=False,
+        ideal_date=date.today() + timedelta(days=14),
+    )
+
+    with StandInResyServer(latency=LATENCY_SECONDS, seed=0, **server_kwargs) as server:
+        manager = build_manager(server)
+        armed = manager.arm(request) if arm else None
+        # one untimed run to open connections
+        run_once(server, manager, request, armed)
+        latencies = [
+            run_once(server, manager, request, armed) * 1000 for _ in range(N_RUNS)
+        ]
+
+    return {
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "mean": statistics.mean(latencies),
+    }
+
+
+def manager_factory(
+    fast_decode: bool = False, **retry_kwargs: int
+) -> Callable[[StandInResyServer], ResyManager]:
+    def build(server: StandInResyServer) -> ResyManager:
+        api_access = ResyApiAccess.build(
+            CONFIG, server.base_url, fast_decode=fast_decode
+        )
+        retry_config = ReservationRetriesConfig(
+            seconds_between_retries=0.005, retry_duration=5, **retry_kwargs
+        )
+        return ResyManager(CONFIG, api_access, IndexedSelector(), retry_config)
+
+    return build
+
+
+def main() -> None:
+    # keep the report readable; this measures the pipeline, not log output
+    logging.disable(logging.INFO)
+
+    print(
+        f"{N_RUNS} runs, {N_SLOTS} slots, {LATENCY_SECONDS * 1000:.0f}ms latency, "
+        "drop-to-booked ms"
+    )
+    print(f"{'configuration':>22} {'p50':>8} {'p90':>8} {'p99':>8} {'mean':>8}")
+
+    configurations = [
+        ("baseline", manager_factory(), False, {}),
+        ("armed", manager_factory(), True, {}),
+        ("armed + fast decode", manager_factory(fast_decode=True), True, {}),
+        (
+            "armed + hedged finds",
+            manager_factory(hedge_window=3, hedge_spacing_ms=3, hedge_budget=12),
+            True,
+            {},
+        ),
+        ("baseline, 5% errors", manager_factory(), False, {"error_rate": 0.05}),
+        (
+            "prefetch, contention",
+            manager_factory(details_prefetch=3),
+            True,
+            {"contention": 0.3},
+        ),
+    ]
+    for name, build_manager, arm, server_kwargs in configurations:
+        result = measure(name, build_manager, arm, **server_kwargs)
+        print(
+            f"{name:>22} {result['p50']:>8.1f} {result['p90']:>8.1f} "
+            f"{result['p99']:>8.1f} {result['mean']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+compares the per poll cost of parsing and selecting from every find
+response with skipping unchanged ones by their fingerprint
+
+    poetry run python -m benchmarks.find_changes
+"""
+
+import json
+import timeit
+from datetime import date
+from unittest.mock import MagicMock
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.find_changes import FindChanges
+from resy_bot.logging import logging
+from resy_bot.models import FindRequestBody, ReservationRequest
+from resy_bot.selectors import SimpleSelector
+from resy_bot.stand_in import generate_slots, render_find_response
+
+DAY = date(2023, 4, 13)
+REQUEST = ReservationRequest(
+    venue_id="12345",
+    party_size=2,
+    ideal_hour=19,
+    ideal_minute=0,
+    window_hours=1,
+    prefer_early=False,
+    ideal_date=DAY,
+)
+BODY = FindRequestBody(venue_id="12345", party_size=2, day=DAY.isoformat())
+
+
+def build_api_access(n_slots: int) -> ResyApiAccess:
+    raw = json.dumps(
+        render_find_response("12345", generate_slots(DAY, n_slots, first_hour=17))
+    ).encode()
+
+    session = MagicMock()
+    resp = session.get.return_value
+    resp.ok = True
+    resp.status_code = 200
+    resp.headers = {}
+    resp.content = raw
+    resp.json.side_effect = lambda: json.loads(raw)
+    return ResyApiAccess(session)
+
+
+def main() -> None:
+    # find_booking_slots logs every call, keep that out of the timings
+    logging.disable(logging.INFO)
+    selector = SimpleSelector()
+
+    print(f"{'slots':>6} {'full us':>9} {'unchanged us':>13} {'speedup':>8}")
+    for n_slots in (50, 500, 5000):
+        api_access = build_api_access(n_slots)
+        changes = FindChanges()
+        api_access.find_booking_slot_changes(BODY, changes)
+
+        def full() -> None:
+            selector.select(api_access.find_booking_slots(BODY), REQUEST)
+
+        def unchanged() -> None:
+            assert api_access.find_booking_slot_changes(BODY, changes) is None
+
+        number = max(1, 5000 // n_slots)
+        full_s = min(timeit.repeat(full, number=number)) / number
+        unchanged_s = min(timeit.repeat(unchanged, number=number * 10)) / (number * 10)
+
+        print(
+            f"{n_slots:>6} {full_s * 1e6:>9.1f} {unchanged_s * 1e6:>13.1f} "
+            f"{full_s / unchanged_s:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+compares the strict and fast /4/find decode paths on large find payloads
+
+    poetry run python -m benchmarks.find_decode
+"""
+
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+from resy_bot.fast_decode import decode_find_slots
+from resy_bot.models import FindResponseBody, Slot, SlotConfig, SlotDate
+from resy_bot.stand_in import render_find_response
+
+SLOT_TYPES = ["Dining Room", "Bar", "Patio", "Chef's Counter"]
+
+
+def build_slots(n_slots: int) -> List[Slot]:
+    start = datetime(2023, 3, 30, 17, 0)
+    return [
+        Slot(
+            config=SlotConfig(
+                id=str(i),
+                type=SLOT_TYPES[i % len(SLOT_TYPES)],
+                token=f"rgs://resy/12345/{i}/2/2023-03-30/2023-03-30/17:00:00/2/0",
+            ),
+            date=SlotDate(
+                start=start + timedelta(minutes=15 * (i // len(SLOT_TYPES))),
+                end=start + timedelta(minutes=15 * (i // len(SLOT_TYPES)) + 90),
+            ),
+        )
+        for i in range(n_slots)
+    ]
+
+
+def decode_strict(raw: bytes) -> List[Slot]:
+    parsed = FindResponseBody(**json.loads(raw))
+    return parsed.results.venues[0].slots
+
+
+def main() -> None:
+    print(f"{'slots':>6} {'strict ms':>10} {'fast ms':>10} {'speedup':>8}")
+    for n_slots in (50, 500, 5000):
+        raw = json.dumps(render_find_response("12345", build_slots(n_slots))).encode()
+        assert decode_strict(raw) == decode_find_slots(raw)
+
+        number = max(1, 5000 // n_slots)
+        strict = min(timeit.repeat(lambda: decode_strict(raw), number=number)) / number
+        fast = (
+            min(timeit.repeat(lambda: decode_find_slots(raw), number=number)) / number
+        )
+
+        print(
+            f"{n_slots:>6} {strict * 1000:>10.3f} {fast * 1000:>10.3f} "
+            f"{strict / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
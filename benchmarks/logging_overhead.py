@@ -0,0 +1,139 @@
+"""
+compares the per attempt cost of the log calls a reservation attempt
+makes: eagerly formatted and written synchronously at debug, as the bot
+used to, against lazily formatted records handed to the queue, with and
+without a drop window holding writes back
+
+    poetry run python -m benchmarks.logging_overhead
+"""
+
+import logging
+import tempfile
+import timeit
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List
+
+from resy_bot import logging as resy_logging
+from resy_bot.logging import DropWindow
+from resy_bot.models import DetailsRequestBody, Slot
+from benchmarks.find_decode import build_slots
+
+NUMBER = 200
+N_SLOTS = 200
+
+api_logger = logging.getLogger("benchmarks.api_access")
+api_logger.setLevel("INFO")
+manager_logger = logging.getLogger("benchmarks.manager")
+manager_logger.setLevel("INFO")
+urllib3_logger = logging.getLogger("urllib3.connectionpool")
+
+Attempt = Callable[[List[Slot], Slot, DetailsRequestBody, Dict[str, Any]], None]
+
+
+def log_requests() -> None:
+    # urllib3 logs one line per request
+    for method, path in (
+        ("GET", "/4/find"),
+        ("GET", "/3/details"),
+        ("POST", "/3/book"),
+    ):
+        urllib3_logger.debug(
+            '%s://%s:%s "%s %s %s" %s %s',
+            "https",
+            "api.resy.com",
+            443,
+            method,
+            path,
+            "HTTP/1.1",
+            200,
+            512,
+        )
+
+
+def eager_attempt(
+    slots: List[Slot],
+    slot: Slot,
+    details_request: DetailsRequestBody,
+    resp_data: Dict[str, Any],
+) -> None:
+    log_requests()
+    api_logger.info(
+        f"{datetime.now().isoformat()} Sending request to find booking slots"
+    )
+    api_logger.info(f"{datetime.now().isoformat()} Received response for 12345")
+    manager_logger.info(f"Returned: {slots}")
+    manager_logger.info(len(slots))
+    manager_logger.info(slots)
+    manager_logger.info(slot)
+    manager_logger.info(details_request)
+    api_logger.info(resp_data)
+
+
+def lazy_attempt(
+    slots: List[Slot],
+    slot: Slot,
+    details_request: DetailsRequestBody,
+    resp_data: Dict[str, Any],
+) -> None:
+    log_requests()
+    api_logger.info("Sending request to find booking slots")
+    api_logger.info("Received response for %s", "12345")
+    manager_logger.info("Returned %d slots", len(slots))
+    manager_logger.debug("Slots: %s", slots)
+    manager_logger.info("Selected %s", slot)
+    manager_logger.debug("Details request: %s", details_request)
+    api_logger.info("Book response: %s", resp_data)
+
+
+def time_attempt(attempt: Attempt, slots: List[Slot]) -> float:
+    slot = slots[len(slots) // 2]
+    details_request = DetailsRequestBody(
+        config_id=slot.config.token, party_size=2, day=date.today().isoformat()
+    )
+    resp_data = {"resy_token": "resy-token", "reservation_id": 1234}
+    return (
+        min(
+            timeit.repeat(
+                lambda: attempt(slots, slot, details_request, resp_data),
+                number=NUMBER,
+                repeat=3,
+            )
+        )
+        / NUMBER
+    )
+
+
+def main() -> None:
+    slots = build_slots(N_SLOTS)
+    root = logging.getLogger()
+
+    with tempfile.TemporaryFile("w+") as out:
+        # what logging.basicConfig(stream=sys.stdout, level=DEBUG) set up
+        root.removeHandler(resy_logging.handler)
+        sync_handler = logging.StreamHandler(out)
+        root.addHandler(sync_handler)
+        root.setLevel(logging.DEBUG)
+        logging.getLogger("urllib3").setLevel(logging.NOTSET)
+
+        eager = time_attempt(eager_attempt, slots)
+
+        root.removeHandler(sync_handler)
+        resy_logging.configure(out)
+
+        lazy = time_attempt(lazy_attempt, slots)
+        resy_logging.flush()
+
+        with DropWindow():
+            windowed = time_attempt(lazy_attempt, slots)
+        resy_logging.flush()
+
+    print(f"per attempt logging overhead, {N_SLOTS} slots found")
+    print(f"{'logging':>22} {'us per attempt':>15}")
+    print(f"{'sync, eager, debug':>22} {eager * 1e6:>15.1f}")
+    print(f"{'queued, lazy':>22} {lazy * 1e6:>15.1f}")
+    print(f"{'queued, drop window':>22} {windowed * 1e6:>15.1f}")
+    print(f"speedup {eager / lazy:.1f}x, {eager / windowed:.1f}x in a drop window")
+
+
+if __name__ == "__main__":
+    main()
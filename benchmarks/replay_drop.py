@@ -0,0 +1,102 @@
+"""
+replays a recorded drop against several ResyManager configurations
+and compares what each booked and how long it took
+
+    poetry run python -m benchmarks.replay_drop [recording.jsonl.gz request.json]
+
+without arguments, a drop against the local stand-in is recorded first
+"""
+
+import json
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Callable, List, Tuple
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.errors import ExhaustedRetriesError
+from resy_bot.logging import logging
+from resy_bot.manager import ResyManager
+from resy_bot.models import ReservationRequest, ReservationRetriesConfig, ResyConfig
+from resy_bot.recording import Recorder
+from resy_bot.selectors import AbstractSelector, IndexedSelector, SimpleSelector
+from resy_bot.stand_in import StandInResyServer, generate_slots
+
+CONFIG = ResyConfig(
+    api_key="key",
+    token="token",
+    payment_method_id=1,
+    email="diner@example.com",
+    password="password",
+)
+
+Configuration = Tuple[str, Callable[[], AbstractSelector], bool]
+
+CONFIGURATIONS: List[Configuration] = [
+    ("simple selector", SimpleSelector, False),
+    ("indexed selector", IndexedSelector, False),
+    ("indexed + fast decode", IndexedSelector, True),
+]
+
+
+def build_manager(api_access: ResyApiAccess, selector: AbstractSelector) -> ResyManager:
+    retry_config = ReservationRetriesConfig(
+        seconds_between_retries=0.01, retry_duration=5
+    )
+    return ResyManager(CONFIG, api_access, selector, retry_config)
+
+
+def record_stand_in_drop(path: str, request: ReservationRequest) -> None:
+    with StandInResyServer(latency=0.01) as server:
+        recorder = Recorder(path)
+        api_access = ResyApiAccess.build(CONFIG, server.base_url, recorder=recorder)
+        server.schedule_drop(generate_slots(request.target_date, 600), delay=0.1)
+        build_manager(api_access, IndexedSelector()).make_reservation_with_retries(
+            request
+        )
+        recorder.close()
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+
+    if len(sys.argv) == 3:
+        recording_path = sys.argv[1]
+        with open(sys.argv[2]) as f:
+            request = ReservationRequest(**json.load(f))
+    else:
+        recording_path = f"{tempfile.mkdtemp()}/drop.jsonl.gz"
+        request = ReservationRequest(
+            venue_id="12345",
+            party_size=2,
+            ideal_hour=19,
+            ideal_minute=0,
+            window_hours=1,
+            prefer_early=False,
+            ideal_date=date.today() + timedelta(days=14),
+        )
+        record_stand_in_drop(recording_path, request)
+        print(f"recorded a stand-in drop to {recording_path}")
+
+    print(f"{'configuration':>22} {'outcome':>16} {'ms':>8} {'unmatched':>10}")
+    for name, selector, fast_decode in CONFIGURATIONS:
+        api_access = ResyApiAccess.replay(
+            CONFIG, recording_path, fast_decode=fast_decode
+        )
+        manager = build_manager(api_access, selector())
+
+        started = time.perf_counter()
+        try:
+            manager.make_reservation_with_retries(request)
+            outcome = "booked"
+        except ExhaustedRetriesError:
+            outcome = "not booked"
+        elapsed = time.perf_counter() - started
+
+        unmatched = len(api_access.session.get_adapter(api_access.base_url).unmatched)
+        print(f"{name:>22} {outcome:>16} {elapsed * 1000:>8.1f} {unmatched:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+per slot memory of pydantic Slots versus CompactSlots,
+decoded from a find payload the way a long running process would hold them
+
+    poetry run python -m benchmarks.slot_memory
+"""
+
+import gc
+import json
+import tracemalloc
+from typing import Callable, List
+
+from benchmarks.find_decode import build_slots
+from resy_bot.compact import compact_slots
+from resy_bot.fast_decode import decode_find_slots
+from resy_bot.stand_in import render_find_response
+
+
+def measure(build: Callable[[], List]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current
+
+
+def main() -> None:
+    n_slots = 20000
+    raw = json.dumps(render_find_response("12345", build_slots(n_slots))).encode()
+
+    # only what each list keeps alive is counted, the transient pydantic
+    # slots a compact list is built from are freed before measuring
+    pydantic_bytes = measure(lambda: decode_find_slots(raw))
+    compact_bytes = measure(lambda: compact_slots(decode_find_slots(raw)))
+
+    print(f"{'representation':<16} {'bytes/slot':>10}")
+    print(f"{'Slot':<16} {pydantic_bytes / n_slots:>10.0f}")
+    print(f"{'CompactSlot':<16} {compact_bytes / n_slots:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+compares SimpleSelector's linear scan with indexing a find response and
+bisecting it, and with bisecting an index already built, for ideal times
+a quarter, half and all of the way into the slots
+
+    poetry run python -m benchmarks.slot_selection
+"""
+
+import timeit
+
+from resy_bot.models import ReservationRequest
+from resy_bot.selectors import IndexedSelector, SimpleSelector
+from resy_bot.slot_index import SlotIndex
+from benchmarks.find_decode import build_slots
+
+NUMBER = 20
+POSITIONS = {"quarter": 0.25, "half": 0.5, "end": 1.0}
+
+
+def main() -> None:
+    print(
+        f"{'ideal':>8} {'slots':>6} {'scan ms':>9} {'index+select ms':>16} "
+        f"{'vs scan':>8} {'reselect ms':>12}"
+    )
+    for position, fraction in POSITIONS.items():
+        for n_slots in (50, 200, 1000, 10000):
+            slots = build_slots(n_slots)
+            ideal = slots[int((n_slots - 1) * fraction)].date.start
+            request = ReservationRequest(
+                venue_id="12345",
+                party_size=2,
+                ideal_hour=ideal.hour,
+                ideal_minute=ideal.minute,
+                window_hours=1,
+                prefer_early=False,
+                preferred_type="Bar",
+                ideal_date=ideal.date(),
+            )
+
+            simple = SimpleSelector()
+            indexed = IndexedSelector()
+            plan = simple.plan(request)
+            index = SlotIndex(slots)
+            assert simple.select(slots, request) is indexed.select_indexed(index, plan)
+
+            scan = min(
+                timeit.repeat(lambda: simple.select(slots, request), number=NUMBER)
+            )
+            # a new find response has to be indexed before it can be bisected
+            build = min(
+                timeit.repeat(
+                    lambda: indexed.select_indexed(SlotIndex(slots), plan),
+                    number=NUMBER,
+                )
+            )
+            # ranking the same response for fallbacks or prefetch reuses its index
+            reselect = min(
+                timeit.repeat(
+                    lambda: indexed.select_indexed(index, plan), number=NUMBER
+                )
+            )
+
+            print(
+                f"{position:>8} {n_slots:>6} {scan / NUMBER * 1000:>9.3f} "
+                f"{build / NUMBER * 1000:>16.3f} {scan / build:>7.2f}x "
+                f"{reselect / NUMBER * 1000:>12.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
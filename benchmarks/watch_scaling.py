@@ -0,0 +1,67 @@
+"""
+poll rate and memory of a cancellation watch as its target count grows,
+polling a find that answers instantly with a day's worth of slots,
+none of them in the targets' windows
+
+    poetry run python -m benchmarks.watch_scaling
+"""
+
+import gc
+import tracemalloc
+from datetime import date
+from typing import List
+from unittest.mock import MagicMock
+
+from resy_bot.models import ReservationRequest
+from resy_bot.sniper import CancellationSniper
+from resy_bot.stand_in import generate_slots
+
+DAY = date(2023, 4, 13)
+REQUESTS_PER_SECOND = 200
+DURATION_SECONDS = 2.0
+
+
+def build_targets(n_targets: int) -> List[ReservationRequest]:
+    return [
+        ReservationRequest(
+            venue_id=str(i),
+            party_size=2,
+            ideal_hour=19,
+            ideal_minute=0,
+            window_hours=1,
+            prefer_early=False,
+            ideal_date=DAY,
+        )
+        for i in range(n_targets)
+    ]
+
+
+def main() -> None:
+    slots = generate_slots(DAY, 48, first_hour=11)
+    manager = MagicMock()
+    manager.api_access.find_booking_slot_changes.side_effect = (
+        lambda body, changes: changes.update(slots)
+    )
+
+    print(f"{'targets':>8} {'polls/s':>8} {'bytes/target':>13}")
+    for n_targets in (10, 100, 1000, 5000):
+        targets = build_targets(n_targets)
+
+        # only what the watch itself holds is counted, not the requests
+        gc.collect()
+        tracemalloc.start()
+        sniper = CancellationSniper(
+            manager, targets, requests_per_second=REQUESTS_PER_SECOND
+        )
+        sniper.run(duration=DURATION_SECONDS)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{n_targets:>8} {sniper.polls / DURATION_SECONDS:>8.0f} "
+            f"{current / n_targets:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import json
+from resy_bot.logging import logging
+
+from resy_bot.daemon import DropDaemon
+from resy_bot.models import DaemonConfig
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def run_daemon(daemon_config_path: str, fast_decode: bool = False) -> None:
+    with open(daemon_config_path, "r") as f:
+        config = DaemonConfig(**json.load(f))
+
+    daemon = DropDaemon.build(config, fast_decode=fast_decode)
+    logger.info(
+        "%d drops scheduled across %d accounts", len(config.drops), len(config.accounts)
+    )
+
+    for drop, outcome in daemon.run():
+        logger.info(
+            "%s, venue %s: %s",
+            drop.account,
+            drop.timed_request.reservation_request.venue_id,
+            outcome,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="ResyBotDaemon",
+        description="Wait for many reservation drops in one process",
+    )
+
+    parser.add_argument("daemon_config_path")
+    parser.add_argument(
+        "--fast-decode",
+        action="store_true",
+        help="parse find responses without pydantic validation",
+    )
+
+    args = parser.parse_args()
+
+    run_daemon(args.daemon_config_path, args.fast_decode)
@@ -1,29 +1,80 @@
 import argparse
 import json
+from typing import Optional
 from resy_bot.logging import logging
 
-from resy_bot.models import ResyConfig, TimedReservationRequest
-from resy_bot.manager import ResyManager
+from resy_bot.startup import StartupTimings, settle
 
 logger = logging.getLogger(__name__)
 logger.setLevel("INFO")
 
 
-def wait_for_drop_time(resy_config_path: str, reservation_config_path: str) -> str:
-    logger.info("waiting for drop time!")
+def wait_for_drop_time(
+    resy_config_path: str,
+    reservation_config_path: str,
+    record_path: Optional[str] = None,
+    warmup_lead_seconds: Optional[float] = None,
+    fast_decode: bool = False,
+) -> str:
+    """
+    arm everything right away, then wait for the drop
+    """
+    timings = StartupTimings()
 
-    with open(resy_config_path, "r") as f:
-        config_data = json.load(f)
+    # imported here so the import cost shows up in the startup timings
+    with timings.phase("import"):
+        from resy_bot.models import (
+            ConnectionPoolConfig,
+            ResyConfig,
+            TimedReservationRequest,
+        )
+        from resy_bot.manager import ResyManager
+        from resy_bot.recording import Recorder
+        from resy_bot.scheduler import drop_time_today
 
-    with open(reservation_config_path, "r") as f:
-        reservation_data = json.load(f)
+    with timings.phase("config"):
+        with open(resy_config_path, "r") as f:
+            config = ResyConfig(**json.load(f))
 
-    config = ResyConfig(**config_data)
-    manager = ResyManager.build(config)
+        with open(reservation_config_path, "r") as f:
+            timed_request = TimedReservationRequest(**json.load(f))
 
-    timed_request = TimedReservationRequest(**reservation_data)
+        pool_config = ConnectionPoolConfig()
+        if warmup_lead_seconds is not None:
+            pool_config.warmup_lead_seconds = warmup_lead_seconds
 
-    return manager.make_reservation_at_opening_time(timed_request)
+    recorder = Recorder(record_path) if record_path else None
+    try:
+        with timings.phase("session"):
+            manager = ResyManager.build(
+                config, pool_config, recorder=recorder, fast_decode=fast_decode
+            )
+
+        drop_time = drop_time_today(
+            timed_request.expected_drop_hour,
+            timed_request.expected_drop_minute,
+            timed_request.timezone,
+        )
+        with timings.phase("auth"):
+            manager.preflight(drop_time)
+
+        with timings.phase("arm"):
+            reservation_request = manager.target(timed_request.reservation_request)
+            armed = manager.arm(reservation_request)
+
+        with timings.phase("gc"):
+            settle()
+
+        logger.info(timings.summary())
+        logger.info(
+            "waiting for drop time! connections warm %ss ahead",
+            pool_config.warmup_lead_seconds,
+        )
+
+        return manager.make_reservation_at(drop_time, reservation_request, armed)
+    finally:
+        if recorder is not None:
+            recorder.close()
 
 
 if __name__ == "__main__":
@@ -34,7 +85,29 @@ if __name__ == "__main__":
 
     parser.add_argument("resy_config_path")
     parser.add_argument("reservation_config_path")
+    parser.add_argument(
+        "--record",
+        dest="record_path",
+        help="record all traffic with resy to this file (.jsonl.gz) for replay",
+    )
+    parser.add_argument(
+        "--warmup-lead",
+        dest="warmup_lead_seconds",
+        type=float,
+        help="seconds before the drop to open connections to resy",
+    )
+    parser.add_argument(
+        "--fast-decode",
+        action="store_true",
+        help="parse find responses without pydantic validation",
+    )
 
     args = parser.parse_args()
 
-    wait_for_drop_time(args.resy_config_path, args.reservation_config_path)
+    wait_for_drop_time(
+        args.resy_config_path,
+        args.reservation_config_path,
+        args.record_path,
+        args.warmup_lead_seconds,
+        args.fast_decode,
+    )
@@ -1,13 +1,32 @@
 from datetime import datetime
-from requests import Session, HTTPError
-from typing import Dict, List
-
-from resy_bot.constants import RESY_BASE_URL, ResyEndpoints
+from email.utils import parsedate_to_datetime
+from requests import Request, Response, Session, HTTPError
+from requests.adapters import BaseAdapter
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+from resy_bot.armed import ArmedReservation
+from resy_bot.constants import BOOK_HEADERS, RESY_BASE_URL, ResyEndpoints
+from resy_bot import tracing
+from resy_bot.fast_decode import build_find_slots, loads
+from resy_bot.find_changes import FindChanges, SlotDiff, find_fingerprint
+from resy_bot.model_builders import build_find_request_body
 from resy_bot.logging import logging
+from resy_bot.recording import (
+    Recorder,
+    RecordingHTTPAdapter,
+    ReplayHTTPAdapter,
+    load_recording,
+)
+from resy_bot.tracing import TracingHTTPAdapter
 from resy_bot.models import (
     ResyConfig,
+    ConnectionPoolConfig,
+    ReservationRequest,
     AuthRequestBody,
     AuthResponseBody,
+    CalendarRequestBody,
+    CalendarResponseBody,
     FindRequestBody,
     FindResponseBody,
     Slot,
@@ -15,14 +34,34 @@ from resy_bot.models import (
     DetailsResponseBody,
     BookRequestBody,
     BookResponseBody,
+    PaymentMethod,
 )
 
 logger = logging.getLogger(__name__)
 logger.setLevel("INFO")
 
 
-def build_session(config: ResyConfig) -> Session:
+def build_session(
+    config: ResyConfig,
+    pool_config: Optional[ConnectionPoolConfig] = None,
+    recorder: Optional[Recorder] = None,
+) -> Session:
     session = Session()
+    pool_config = pool_config or ConnectionPoolConfig()
+    pool_kwargs: Dict[str, Any] = dict(
+        pool_connections=pool_config.pool_connections,
+        pool_maxsize=pool_config.pool_maxsize,
+        max_retries=pool_config.max_retries,
+        pool_block=pool_config.pool_block,
+    )
+    adapter: BaseAdapter
+    if recorder is not None:
+        adapter = RecordingHTTPAdapter(recorder, **pool_kwargs)
+    else:
+        adapter = TracingHTTPAdapter(**pool_kwargs)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
     headers = {
         "Authorization": config.get_authorization(),
         "X-Resy-Auth-Token": config.token,
@@ -40,18 +79,74 @@ def build_session(config: ResyConfig) -> Session:
 
 class ResyApiAccess:
     @classmethod
-    def build(cls, config: ResyConfig) -> "ResyApiAccess":
-        session = build_session(config)
-        return cls(session)
+    def build(
+        cls,
+        config: ResyConfig,
+        base_url: str = RESY_BASE_URL,
+        pool_config: Optional[ConnectionPoolConfig] = None,
+        fast_decode: bool = False,
+        recorder: Optional[Recorder] = None,
+    ) -> "ResyApiAccess":
+        """
+        with a recorder, every exchange with resy is written to its recording
+        """
+        session = build_session(config, pool_config, recorder)
+        return cls(session, base_url, fast_decode)
 
-    def __init__(self, session: Session):
+    @classmethod
+    def replay(
+        cls,
+        config: ResyConfig,
+        recording_path: str,
+        fast_decode: bool = False,
+        realtime: bool = True,
+    ) -> "ResyApiAccess":
+        """
+        api access answered from a recording instead of resy
+        """
+        session = build_session(config)
+        adapter = ReplayHTTPAdapter(load_recording(recording_path), realtime)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return cls(session, RESY_BASE_URL, fast_decode)
+
+    def __init__(
+        self,
+        session: Session,
+        base_url: str = RESY_BASE_URL,
+        fast_decode: bool = False,
+    ):
+        """
+        fast_decode skips pydantic validation when parsing find responses,
+        leave it off to debug unexpected responses
+        """
         self.session = session
+        self.base_url = base_url
+        self.fast_decode = fast_decode
 
     def find_venue(self):
         pass
 
+    def set_token(self, token: str) -> None:
+        self.session.headers.update(
+            {"X-Resy-Auth-Token": token, "X-Resy-Universal-Auth": token}
+        )
+
+    def ping(self) -> Optional[datetime]:
+        """
+        cheap request that doesn't touch any resy resources,
+        returns the server's Date header if it sent one
+        """
+        resp = self.session.head(self.base_url)
+
+        server_date = resp.headers.get("Date")
+        if not server_date:
+            return None
+
+        return parsedate_to_datetime(server_date)
+
     def auth(self, body: AuthRequestBody) -> AuthResponseBody:
-        auth_url = RESY_BASE_URL + ResyEndpoints.PASSWORD_AUTH.value
+        auth_url = self.base_url + ResyEndpoints.PASSWORD_AUTH.value
 
         resp = self.session.post(
             auth_url,
@@ -60,41 +155,108 @@ class ResyApiAccess:
         )
 
         if not resp.ok:
-            raise HTTPError(f"Failed to get auth: {resp.status_code}, {resp.text}")
+            raise HTTPError(
+                f"Failed to get auth: {resp.status_code}, {resp.text}", response=resp
+            )
 
         return AuthResponseBody(**resp.json())
 
+    def get_calendar(self, params: CalendarRequestBody) -> CalendarResponseBody:
+        calendar_url = self.base_url + ResyEndpoints.CALENDAR.value
+
+        resp = self.session.get(calendar_url, params=params.dict())
+
+        if not resp.ok:
+            raise HTTPError(
+                f"Failed to get calendar: {resp.status_code}, {resp.text}",
+                response=resp,
+            )
+
+        return CalendarResponseBody(**resp.json())
+
     def find_booking_slots(self, params: FindRequestBody) -> List[Slot]:
-        find_url = RESY_BASE_URL + ResyEndpoints.FIND.value
+        find_url = self.base_url + ResyEndpoints.FIND.value
 
-        logger.info(
-            f"{datetime.now().isoformat()} Sending request to find booking slots"
-        )
+        logger.info("Sending request to find booking slots")
 
         resp = self.session.get(find_url, params=params.dict())
 
-        logger.info(f"{datetime.now().isoformat()} Received response for ")
+        logger.info("Received response for %s", params.venue_id)
+
+        return self._parse_find_response(resp)
+
+    def find_booking_slot_changes(
+        self, params: FindRequestBody, changes: FindChanges
+    ) -> Optional[SlotDiff]:
+        """
+        find, but None if the response is the same as changes' last one,
+        without decoding it, otherwise the slots added and removed since
+        """
+        find_url = self.base_url + ResyEndpoints.FIND.value
+
+        resp = self.session.get(
+            find_url, params=params.dict(), headers=changes.conditional_headers()
+        )
+
+        return self._parse_find_changes(resp, changes)
+
+    def _parse_find_changes(
+        self, resp: Response, changes: FindChanges
+    ) -> Optional[SlotDiff]:
+        if resp.status_code == 304:
+            tracing.count("find_unchanged")
+            return None
+
+        fingerprint = None
+        if resp.ok:
+            fingerprint = find_fingerprint(resp)
+            if changes.unchanged(fingerprint):
+                tracing.count("find_unchanged")
+                return None
 
+        return changes.update(self._parse_find_response(resp), fingerprint)
+
+    def _parse_find_response(self, resp: Response) -> List[Slot]:
         if not resp.ok:
             raise HTTPError(
-                f"Failed to find booking slots: {resp.status_code}, {resp.text}"
+                f"Failed to find booking slots: {resp.status_code}, {resp.text}",
+                response=resp,
             )
 
-        parsed_resp = FindResponseBody(**resp.json())
+        if self.fast_decode:
+            with tracing.span("json_decode"):
+                data = loads(resp.content)
+            with tracing.span("model_build"):
+                return build_find_slots(data)
+
+        with tracing.span("json_decode"):
+            data = resp.json()
+        with tracing.span("model_build"):
+            parsed_resp = FindResponseBody(**data)
+
+        if not parsed_resp.results.venues:
+            return []
 
         return parsed_resp.results.venues[0].slots
 
     def get_booking_token(self, params: DetailsRequestBody) -> DetailsResponseBody:
-        details_url = RESY_BASE_URL + ResyEndpoints.DETAILS.value
+        details_url = self.base_url + ResyEndpoints.DETAILS.value
 
         resp = self.session.get(details_url, params=params.dict())
 
+        return self._parse_details_response(resp)
+
+    def _parse_details_response(self, resp: Response) -> DetailsResponseBody:
         if not resp.ok:
             raise HTTPError(
-                f"Failed to get selected slot details: {resp.status_code}, {resp.text}"
+                f"Failed to get selected slot details: {resp.status_code}, {resp.text}",
+                response=resp,
             )
 
-        return DetailsResponseBody(**resp.json())
+        with tracing.span("json_decode"):
+            data = resp.json()
+        with tracing.span("model_build"):
+            return DetailsResponseBody(**data)
 
     def _dump_book_request_body_to_dict(self, body: BookRequestBody) -> Dict:
         """
@@ -107,28 +269,95 @@ class ResyApiAccess:
         return body_dict
 
     def book_slot(self, body: BookRequestBody) -> str:
-        book_url = RESY_BASE_URL + ResyEndpoints.BOOK.value
+        book_url = self.base_url + ResyEndpoints.BOOK.value
 
         body_dict = self._dump_book_request_body_to_dict(body)
 
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Origin": "https://widgets.resy.com",
-            "X-Origin": "https://widgets.resy.com",
-            "Referrer": "https://widgets.resy.com/",
-            "Cache-Control": "no-cache",
-        }
-
         resp = self.session.post(
             book_url,
             data=body_dict,
-            headers=headers,
+            headers=BOOK_HEADERS,
         )
 
+        return self._parse_book_response(resp)
+
+    def _parse_book_response(self, resp: Response) -> str:
         if not resp.ok:
-            raise HTTPError(f"Failed to book slot: {resp.status_code}, {resp.text}")
+            raise HTTPError(
+                f"Failed to book slot: {resp.status_code}, {resp.text}", response=resp
+            )
 
-        logger.info(resp.json())
-        parsed_resp = BookResponseBody(**resp.json())
+        with tracing.span("json_decode"):
+            resp_data = resp.json()
+        logger.info("Book response: %s", resp_data)
+        with tracing.span("model_build"):
+            parsed_resp = BookResponseBody(**resp_data)
 
         return parsed_resp.resy_token
+
+    def arm(
+        self, reservation: ReservationRequest, config: ResyConfig
+    ) -> ArmedReservation:
+        """
+        build everything about this reservation's find, details and book
+        requests that doesn't depend on the slot, ahead of the drop
+        """
+        find_url = self.base_url + ResyEndpoints.FIND.value
+        details_url = self.base_url + ResyEndpoints.DETAILS.value
+        book_url = self.base_url + ResyEndpoints.BOOK.value
+
+        find_body = build_find_request_body(reservation)
+        find_request = self.session.prepare_request(
+            Request("GET", find_url, params=find_body.dict())
+        )
+
+        # config_id goes last so the hot path can append the slot's token
+        details_params = DetailsRequestBody(
+            config_id="", party_size=find_body.party_size, day=find_body.day
+        ).dict(exclude={"config_id"})
+        details_template = self.session.prepare_request(
+            Request("GET", details_url, params=details_params)
+        )
+        separator = "&" if details_params else "?"
+
+        # likewise book_token goes last in the form body
+        book_body = BookRequestBody(
+            book_token="",
+            struct_payment_method=PaymentMethod(id=config.payment_method_id),
+        )
+        book_fields = self._dump_book_request_body_to_dict(book_body)
+        del book_fields["book_token"]
+        book_template = self.session.prepare_request(
+            Request("POST", book_url, data=book_fields, headers=BOOK_HEADERS)
+        )
+
+        return ArmedReservation(
+            find_request=find_request,
+            details_url_prefix=f"{details_template.url}{separator}config_id=",
+            details_headers=details_template.headers,
+            book_url=book_url,
+            book_body_prefix=f"{urlencode(book_fields)}&book_token=",
+            book_headers=book_template.headers,
+            send_kwargs=dict(
+                self.session.merge_environment_settings(find_url, {}, None, None, None)
+            ),
+        )
+
+    def send_find(self, armed: ArmedReservation) -> List[Slot]:
+        resp = self.session.send(armed.find_request, **armed.send_kwargs)
+
+        return self._parse_find_response(resp)
+
+    def send_details(self, armed: ArmedReservation, slot: Slot) -> DetailsResponseBody:
+        resp = self.session.send(
+            armed.details_request(slot.config.token), **armed.send_kwargs
+        )
+
+        return self._parse_details_response(resp)
+
+    def send_book(self, armed: ArmedReservation, details: DetailsResponseBody) -> str:
+        resp = self.session.send(
+            armed.book_request(details.book_token.value), **armed.send_kwargs
+        )
+
+        return self._parse_book_response(resp)
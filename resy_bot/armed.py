@@ -0,0 +1,61 @@
+from typing import Any, Dict
+from urllib.parse import quote_plus
+
+from requests import PreparedRequest
+from requests.hooks import default_hooks
+from requests.structures import CaseInsensitiveDict
+
+
+class ArmedReservation:
+    """
+    requests for one reservation, prepared ahead of the drop.
+    the find request is ready to send as is, and the details and book
+    requests only need the slot's config token or the book token
+    filled in, so no date formatting, validation, param encoding,
+    header merging or payment method serialization happens per attempt
+    """
+
+    def __init__(
+        self,
+        find_request: PreparedRequest,
+        details_url_prefix: str,
+        details_headers: CaseInsensitiveDict,
+        book_url: str,
+        book_body_prefix: str,
+        book_headers: CaseInsensitiveDict,
+        send_kwargs: Dict[str, Any],
+    ):
+        self.find_request = find_request
+        self.details_url_prefix = details_url_prefix
+        self.details_headers = details_headers
+        self.book_url = book_url
+        self.book_body_prefix = book_body_prefix
+        self.book_headers = book_headers
+        self.send_kwargs = send_kwargs
+
+    @staticmethod
+    def _prepared(
+        method: str, url: str, headers: CaseInsensitiveDict
+    ) -> PreparedRequest:
+        prepared = PreparedRequest()
+        prepared.method = method
+        prepared.url = url
+        prepared.headers = headers
+        prepared.hooks = default_hooks()
+        return prepared
+
+    def details_request(self, config_token: str) -> PreparedRequest:
+        return self._prepared(
+            "GET",
+            self.details_url_prefix + quote_plus(config_token),
+            self.details_headers,
+        )
+
+    def book_request(self, book_token: str) -> PreparedRequest:
+        body = (self.book_body_prefix + quote_plus(book_token)).encode()
+        headers = self.book_headers.copy()
+        headers["Content-Length"] = str(len(body))
+
+        prepared = self._prepared("POST", self.book_url, headers)
+        prepared.body = body
+        return prepared
@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, List, Optional, TypeVar
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.constants import RESY_BASE_URL
+from resy_bot.find_changes import FindChanges, SlotDiff
+from resy_bot.models import (
+    ResyConfig,
+    ConnectionPoolConfig,
+    AuthRequestBody,
+    AuthResponseBody,
+    FindRequestBody,
+    Slot,
+    DetailsRequestBody,
+    DetailsResponseBody,
+    BookRequestBody,
+)
+
+T = TypeVar("T")
+
+
+class AsyncResyApiAccess:
+    """
+    asyncio facade over ResyApiAccess.
+    calls run on a worker pool sized to the session's connection pool,
+    so many flows share one event loop and one set of warm connections
+    while reusing the same request building and response parsing
+    """
+
+    @classmethod
+    def build(
+        cls,
+        config: ResyConfig,
+        base_url: str = RESY_BASE_URL,
+        pool_config: Optional[ConnectionPoolConfig] = None,
+        fast_decode: bool = False,
+    ) -> "AsyncResyApiAccess":
+        pool_config = pool_config or ConnectionPoolConfig()
+        api_access = ResyApiAccess.build(config, base_url, pool_config, fast_decode)
+        executor = ThreadPoolExecutor(max_workers=pool_config.pool_maxsize)
+        return cls(api_access, executor)
+
+    def __init__(self, api_access: ResyApiAccess, executor: Optional[Executor] = None):
+        self.api_access = api_access
+        self.executor = executor or ThreadPoolExecutor()
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def ping(self) -> Optional[datetime]:
+        return await self._run(self.api_access.ping)
+
+    async def auth(self, body: AuthRequestBody) -> AuthResponseBody:
+        return await self._run(self.api_access.auth, body)
+
+    async def find_booking_slots(self, params: FindRequestBody) -> List[Slot]:
+        return await self._run(self.api_access.find_booking_slots, params)
+
+    async def find_booking_slot_changes(
+        self, params: FindRequestBody, changes: FindChanges
+    ) -> Optional[SlotDiff]:
+        return await self._run(
+            self.api_access.find_booking_slot_changes, params, changes
+        )
+
+    async def get_booking_token(
+        self, params: DetailsRequestBody
+    ) -> DetailsResponseBody:
+        return await self._run(self.api_access.get_booking_token, params)
+
+    async def book_slot(self, body: BookRequestBody) -> str:
+        return await self._run(self.api_access.book_slot, body)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.api_access.session.close()
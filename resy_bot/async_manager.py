@@ -0,0 +1,171 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, List, Optional, Union
+
+from resy_bot.logging import logging
+from resy_bot.errors import NoSlotsError
+from resy_bot.constants import (
+    RETRY_DURATION_SECONDS,
+    SECONDS_TO_WAIT_BETWEEN_RETRIES,
+    ReservationPhase,
+)
+from resy_bot.models import (
+    ResyConfig,
+    ConnectionPoolConfig,
+    ReservationRequest,
+    TimedReservationRequest,
+    ReservationRetriesConfig,
+    DetailsResponseBody,
+    Slot,
+)
+from resy_bot.model_builders import (
+    build_find_request_body,
+    build_get_slot_details_body,
+    build_book_request_body,
+)
+from resy_bot.async_api_access import AsyncResyApiAccess
+from resy_bot.retry import AsyncStep, RetryEngine
+from resy_bot.selectors import AbstractSelector, SimpleSelector
+from resy_bot.scheduler import DropScheduler, drop_time_today, wall_to_monotonic
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class AsyncResyManager:
+    """
+    asyncio counterpart of ResyManager,
+    able to run many reservation flows concurrently on one event loop.
+    retries go through the same RetryEngine, waiting on the event loop
+    """
+
+    @classmethod
+    def build(
+        cls,
+        config: ResyConfig,
+        pool_config: Optional[ConnectionPoolConfig] = None,
+        fast_decode: bool = False,
+    ) -> "AsyncResyManager":
+        api_access = AsyncResyApiAccess.build(
+            config, pool_config=pool_config, fast_decode=fast_decode
+        )
+        selector = SimpleSelector()
+        retry_config = ReservationRetriesConfig(
+            seconds_between_retries=SECONDS_TO_WAIT_BETWEEN_RETRIES,
+            retry_duration=RETRY_DURATION_SECONDS,
+        )
+        return cls(config, api_access, selector, retry_config, DropScheduler())
+
+    def __init__(
+        self,
+        config: ResyConfig,
+        api_access: AsyncResyApiAccess,
+        slot_selector: AbstractSelector,
+        retry_config: ReservationRetriesConfig,
+        scheduler: Optional[DropScheduler] = None,
+    ):
+        self.config = config
+        self.api_access = api_access
+        self.selector = slot_selector
+        self.retry_config = retry_config
+        self.scheduler = scheduler or DropScheduler()
+        self.retry_engine = RetryEngine(retry_config)
+
+    async def make_reservation(self, reservation_request: ReservationRequest) -> str:
+        """
+        find, select, get a booking token and book, once
+        """
+        result: Any = None
+        for _, step in self._steps(reservation_request):
+            result = await step(result)
+
+        return result
+
+    def _steps(self, reservation_request: ReservationRequest) -> List[AsyncStep]:
+        async def find(_: None) -> Slot:
+            body = build_find_request_body(reservation_request)
+            slots = await self.api_access.find_booking_slots(body)
+
+            if len(slots) == 0:
+                raise NoSlotsError("No Slots Found")
+
+            return self.selector.select(slots, reservation_request)
+
+        async def details(selected_slot: Slot) -> DetailsResponseBody:
+            details_request = build_get_slot_details_body(
+                reservation_request, selected_slot
+            )
+            return await self.api_access.get_booking_token(details_request)
+
+        async def book(token: DetailsResponseBody) -> str:
+            booking_request = build_book_request_body(token, self.config)
+            return await self.api_access.book_slot(booking_request)
+
+        return [
+            (ReservationPhase.FIND, find),
+            (ReservationPhase.DETAILS, details),
+            (ReservationPhase.BOOK, book),
+        ]
+
+    async def make_reservation_with_retries(
+        self, reservation_request: ReservationRequest
+    ) -> str:
+        """
+        keep trying until booked or retry_duration runs out,
+        retrying only the phase that failed where possible
+        """
+        return await self.retry_engine.run_async(self._steps(reservation_request))
+
+    async def make_reservations(
+        self, reservation_requests: List[ReservationRequest]
+    ) -> List[Union[str, BaseException]]:
+        """
+        run a reservation flow per request concurrently,
+        returning each flow's resy token or the exception that ended it
+        """
+        return await asyncio.gather(
+            *(
+                self.make_reservation_with_retries(request)
+                for request in reservation_requests
+            ),
+            return_exceptions=True,
+        )
+
+    async def wait_until(self, target: datetime) -> None:
+        """
+        sleep on the event loop until close to target,
+        then hand the last stretch to the drop scheduler on a worker thread
+        so the loop stays free for other flows
+        """
+        monotonic_target = wall_to_monotonic(target)
+        remaining = monotonic_target - time.monotonic()
+        if remaining > self.scheduler.coarse_margin:
+            await asyncio.sleep(remaining - self.scheduler.coarse_margin)
+
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(
+            None, self.scheduler.wait_until, monotonic_target
+        )
+        logger.info(
+            f"time reached for {target}, fired {report.lateness * 1000:+.3f}ms "
+            "from target"
+        )
+
+    def _get_drop_time(self, reservation_request: TimedReservationRequest) -> datetime:
+        return drop_time_today(
+            reservation_request.expected_drop_hour,
+            reservation_request.expected_drop_minute,
+            reservation_request.timezone,
+        )
+
+    async def make_reservation_at_opening_time(
+        self, reservation_request: TimedReservationRequest
+    ) -> str:
+        drop_time = self._get_drop_time(reservation_request)
+
+        await self.wait_until(drop_time)
+
+        return await self.make_reservation_with_retries(
+            reservation_request.reservation_request
+        )
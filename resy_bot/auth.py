@@ -0,0 +1,183 @@
+"""
+auth tokens cached on disk.
+
+logging in returns a token and the account's payment methods. both are
+kept per email in a json file, with the token's expiry (its jwt exp
+claim, or a default ttl for tokens that don't carry one), so later runs
+reuse them without a round trip. preflight, called while arming, makes
+sure the token lasts through the drop, logging in again now if it won't,
+and that the configured payment method is on the account, so neither an
+auth request nor a rejected payment method lands in the drop window
+"""
+
+import base64
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.constants import (
+    TOKEN_CACHE_PATH,
+    TOKEN_DEFAULT_TTL_SECONDS,
+    TOKEN_REFRESH_MARGIN_SECONDS,
+)
+from resy_bot.errors import PreflightError
+from resy_bot.logging import logging
+from resy_bot.model_builders import build_auth_request_body
+from resy_bot.models import ResyConfig
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# every account's tokens share one file, so every token manager
+# loads and saves it under the same lock
+_cache_lock = threading.Lock()
+
+
+class CachedToken(BaseModel):
+    token: str
+    expires_at: datetime
+    payment_method_ids: List[int]
+
+
+def token_expiry(token: str) -> Optional[datetime]:
+    """
+    the exp claim of a jwt, as a local datetime
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+
+    try:
+        padding = "=" * (-len(parts[1]) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + padding))
+        return datetime.fromtimestamp(float(payload["exp"]))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class TokenManager:
+    def __init__(
+        self,
+        api_access: ResyApiAccess,
+        config: ResyConfig,
+        cache_path: str = TOKEN_CACHE_PATH,
+        refresh_margin_seconds: float = TOKEN_REFRESH_MARGIN_SECONDS,
+        default_ttl_seconds: float = TOKEN_DEFAULT_TTL_SECONDS,
+        now: Callable[[], datetime] = datetime.now,
+    ):
+        self.api_access = api_access
+        self.config = config
+        self.cache_path = os.path.expanduser(cache_path)
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self.default_ttl = timedelta(seconds=default_ttl_seconds)
+        self.now = now
+
+    def _load_all(self) -> Dict[str, CachedToken]:
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        cached = {}
+        for email, entry in data.items():
+            try:
+                cached[email] = CachedToken(**entry)
+            except (TypeError, ValueError):
+                continue
+        return cached
+
+    def cached(self) -> Optional[CachedToken]:
+        with _cache_lock:
+            return self._load_all().get(self.config.email)
+
+    def _save(self, token: CachedToken) -> None:
+        """
+        add the token to the cache. a cache that can't be written only
+        costs a login next run, so failing to save is logged, not raised
+        """
+        with _cache_lock:
+            cached = self._load_all()
+            cached[self.config.email] = token
+
+            partial = None
+            try:
+                directory = os.path.dirname(self.cache_path) or "."
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+
+                # write then rename, so a crash never leaves half a file
+                fd, partial = tempfile.mkstemp(
+                    dir=directory,
+                    prefix=os.path.basename(self.cache_path),
+                    suffix=".tmp",
+                )
+                with os.fdopen(fd, "w") as f:
+                    json.dump(
+                        {
+                            email: json.loads(entry.json())
+                            for email, entry in cached.items()
+                        },
+                        f,
+                    )
+                os.replace(partial, self.cache_path)
+            except OSError as e:
+                logger.warning("couldn't save token cache %s: %s", self.cache_path, e)
+                if partial is not None and os.path.exists(partial):
+                    os.remove(partial)
+
+    def authenticate(self) -> CachedToken:
+        auth = self.api_access.auth(build_auth_request_body(self.config))
+        token = CachedToken(
+            token=auth.token,
+            expires_at=token_expiry(auth.token) or self.now() + self.default_ttl,
+            payment_method_ids=[method.id for method in auth.payment_methods],
+        )
+        self._save(token)
+        logger.info(
+            "logged in as %s, token valid until %s",
+            self.config.email,
+            token.expires_at,
+        )
+        return token
+
+    def token(self, valid_until: datetime, force_login: bool = False) -> CachedToken:
+        """
+        a token that lasts through valid_until with margin to spare,
+        from the cache if it has one, unless force_login because resy
+        turned the cached one down
+        """
+        cached = None if force_login else self.cached()
+        if (
+            cached is not None
+            and cached.expires_at >= valid_until + self.refresh_margin
+        ):
+            return cached
+
+        return self.authenticate()
+
+    def preflight(
+        self, valid_until: datetime, force_login: bool = False
+    ) -> CachedToken:
+        """
+        token() plus a check that the configured payment method is on the
+        account. cached payment methods can be out of date, so a miss
+        there is checked again against a fresh login
+        """
+        token = self.token(valid_until, force_login)
+
+        if self.config.payment_method_id not in token.payment_method_ids:
+            token = self.authenticate()
+
+        if self.config.payment_method_id not in token.payment_method_ids:
+            raise PreflightError(
+                f"Payment method {self.config.payment_method_id} isn't on "
+                f"{self.config.email}'s account, it has {token.payment_method_ids}"
+            )
+
+        return token
@@ -0,0 +1,80 @@
+"""
+book tokens kept until they expire.
+
+a details call hands out a book token that stays good until its
+date_expires. when a book fails and the reservation goes round again,
+the slot it finds is usually the one it just had a token for, so the
+token is kept per slot config token, party size and day and reused
+instead of asking details for another. tokens are dropped once they
+expire, once booked with, and once resy says the slot is gone.
+
+date_expires comes without a zone, in the venue's local time like slot
+times, so each token is kept with the venue's time zone to read it in.
+server_offset, resy's clock less ours, is set once the clock is synced
+"""
+
+import threading
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Callable, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from resy_bot.constants import BOOK_TOKEN_EXPIRY_MARGIN_SECONDS
+from resy_bot.models import DetailsResponseBody
+
+BookTokenKey = Tuple[str, int, date]
+
+
+class BookTokenCache:
+    def __init__(
+        self,
+        margin_seconds: float = BOOK_TOKEN_EXPIRY_MARGIN_SECONDS,
+        now: Callable[[Optional[tzinfo]], datetime] = datetime.now,
+    ):
+        self.margin = timedelta(seconds=margin_seconds)
+        self.now = now
+        self.server_offset = 0.0
+        self._tokens: Dict[BookTokenKey, Tuple[DetailsResponseBody, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def expired(
+        self, details: DetailsResponseBody, timezone: Optional[str] = None
+    ) -> bool:
+        """
+        whether the token runs out within the margin by resy's clock,
+        reading a date_expires without a zone in timezone, or ours if None
+        """
+        expires = details.book_token.date_expires
+        if expires.tzinfo is None and timezone is not None:
+            expires = expires.replace(tzinfo=ZoneInfo(timezone))
+
+        now = self.now(expires.tzinfo) + timedelta(seconds=self.server_offset)
+        return now + self.margin >= expires
+
+    def get(self, key: BookTokenKey) -> Optional[DetailsResponseBody]:
+        with self._lock:
+            self._evict_expired()
+            cached = self._tokens.get(key)
+            return cached[0] if cached is not None else None
+
+    def put(
+        self,
+        key: BookTokenKey,
+        details: DetailsResponseBody,
+        timezone: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._tokens[key] = (details, timezone)
+
+    def discard(self, details: DetailsResponseBody) -> None:
+        with self._lock:
+            for key, (cached, _) in list(self._tokens.items()):
+                if cached.book_token.value == details.book_token.value:
+                    del self._tokens[key]
+
+    def _evict_expired(self) -> None:
+        for key, (cached, timezone) in list(self._tokens.items()):
+            if self.expired(cached, timezone):
+                del self._tokens[key]
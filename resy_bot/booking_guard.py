@@ -0,0 +1,35 @@
+from threading import Event, Lock
+from typing import Callable, Optional
+
+from resy_bot.errors import AlreadyBookedError
+
+
+class BookingGuard:
+    """
+    shared between managers booking the same reservation from different
+    accounts. books go through the guard one at a time, and once one
+    succeeds every other manager is stopped before it books a duplicate
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._booked = Event()
+        self.winner: Optional[str] = None
+
+    @property
+    def booked(self) -> bool:
+        return self._booked.is_set()
+
+    def check(self) -> None:
+        if self.booked:
+            raise AlreadyBookedError(f"Already booked by {self.winner}")
+
+    def book(self, owner: str, book: Callable[[], str]) -> str:
+        with self._lock:
+            self.check()
+
+            resy_token = book()
+
+            self.winner = owner
+            self._booked.set()
+            return resy_token
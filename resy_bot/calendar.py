@@ -0,0 +1,151 @@
+"""
+cached venue availability calendars.
+
+resy's calendar says, for every date a venue has opened, whether
+reservations are available or sold out, and how far out the venue has
+opened (last_calendar_day). the next date to open is the day after
+that, so a reservation can target it without hard coding a date, and a
+date the calendar reports sold out isn't worth polling find for.
+
+a venue's calendar is fetched in full once, and after that only from
+its last open day onwards, which is where new dates show up. a full
+refresh every so often picks up days that sold out or freed up since
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.constants import (
+    CALENDAR_FULL_REFRESH_SECONDS,
+    CALENDAR_HORIZON_DAYS,
+    CALENDAR_MAX_AGE_SECONDS,
+    CALENDAR_SOLD_OUT,
+)
+from resy_bot.logging import logging
+from resy_bot.models import CalendarRequestBody, CalendarResponseBody
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+CalendarKey = Tuple[str, int]
+
+
+class VenueCalendar:
+    def __init__(self, venue_id: str, party_size: int):
+        self.venue_id = venue_id
+        self.party_size = party_size
+        self.days: Dict[date, str] = {}
+        self.last_calendar_day: Optional[date] = None
+        self.refreshed_at: Optional[float] = None
+        self.fully_refreshed_at: Optional[float] = None
+
+    def status(self, day: date) -> Optional[str]:
+        return self.days.get(day)
+
+    def is_sold_out(self, day: date) -> bool:
+        return self.days.get(day) == CALENDAR_SOLD_OUT
+
+    @property
+    def next_opening_date(self) -> Optional[date]:
+        if self.last_calendar_day is None:
+            return None
+
+        return self.last_calendar_day + timedelta(days=1)
+
+    def merge(self, response: CalendarResponseBody, today: date) -> None:
+        for scheduled in response.scheduled:
+            self.days[scheduled.date] = scheduled.inventory.reservation
+        self.last_calendar_day = response.last_calendar_day
+
+        for day in [day for day in self.days if day < today]:
+            del self.days[day]
+
+
+class CalendarCache:
+    """
+    one calendar per venue and party size, refreshed on use once older
+    than max_age_seconds, incrementally unless the last full refresh is
+    older than full_refresh_seconds
+    """
+
+    def __init__(
+        self,
+        api_access: ResyApiAccess,
+        horizon_days: int = CALENDAR_HORIZON_DAYS,
+        max_age_seconds: float = CALENDAR_MAX_AGE_SECONDS,
+        full_refresh_seconds: float = CALENDAR_FULL_REFRESH_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        today: Callable[[], date] = date.today,
+    ):
+        self.api_access = api_access
+        self.horizon_days = horizon_days
+        self.max_age_seconds = max_age_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self.clock = clock
+        self.today = today
+        self._calendars: Dict[CalendarKey, VenueCalendar] = {}
+        self._lock = threading.Lock()
+
+    def cached(self, venue_id: str, party_size: int) -> Optional[VenueCalendar]:
+        """
+        the calendar as last fetched, without going to resy
+        """
+        return self._calendars.get((venue_id, party_size))
+
+    def get(self, venue_id: str, party_size: int) -> VenueCalendar:
+        calendar = self.cached(venue_id, party_size)
+        if (
+            calendar is not None
+            and calendar.refreshed_at is not None
+            and self.clock() - calendar.refreshed_at < self.max_age_seconds
+        ):
+            return calendar
+
+        return self.refresh(venue_id, party_size)
+
+    def refresh(
+        self, venue_id: str, party_size: int, full: bool = False
+    ) -> VenueCalendar:
+        with self._lock:
+            calendar = self._calendars.setdefault(
+                (venue_id, party_size), VenueCalendar(venue_id, party_size)
+            )
+
+        now = self.clock()
+        today = self.today()
+        start = today
+        if (
+            not full
+            and calendar.last_calendar_day is not None
+            and calendar.fully_refreshed_at is not None
+            and now - calendar.fully_refreshed_at < self.full_refresh_seconds
+        ):
+            start = max(today, calendar.last_calendar_day)
+        else:
+            full = True
+
+        end = max(start, today + timedelta(days=self.horizon_days))
+        response = self.api_access.get_calendar(
+            CalendarRequestBody(
+                venue_id=venue_id,
+                num_seats=party_size,
+                start_date=start.isoformat(),
+                end_date=end.isoformat(),
+            )
+        )
+
+        with self._lock:
+            calendar.merge(response, today)
+            calendar.refreshed_at = now
+            if full:
+                calendar.fully_refreshed_at = now
+
+        logger.info(
+            "calendar for venue %s open through %s",
+            venue_id,
+            calendar.last_calendar_day,
+        )
+        return calendar
@@ -0,0 +1,215 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+from requests import HTTPError
+
+from resy_bot.armed import ArmedReservation
+from resy_bot.constants import ReservationPhase
+from resy_bot.errors import NoSlotsError, SoldOutError
+from resy_bot.logging import DropWindow, logging
+from resy_bot.manager import ResyManager
+from resy_bot.model_builders import build_find_request_body
+from resy_bot.models import CampaignEntry, ReservationCampaign, Slot
+from resy_bot.scheduler import drop_time_today
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class CampaignCandidate:
+    def __init__(
+        self,
+        entry: CampaignEntry,
+        slot: Slot,
+        armed: Optional[ArmedReservation] = None,
+    ):
+        self.entry = entry
+        self.slot = slot
+        self.armed = armed
+
+    @property
+    def rank(self) -> Tuple[int, timedelta]:
+        """
+        lower is better: campaign priority first,
+        then distance from that venue's ideal time
+        """
+        request = self.entry.reservation_request
+        ideal_datetime = datetime(
+            request.target_date.year,
+            request.target_date.month,
+            request.target_date.day,
+            request.ideal_hour,
+            request.ideal_minute,
+        )
+        return self.entry.priority, abs(self.slot.date.start - ideal_datetime)
+
+
+class CampaignRunner:
+    """
+    runs finds for every venue in a campaign concurrently,
+    then books the best acceptable slot across all of them,
+    falling back to the next best if booking fails.
+    booking goes through ResyManager.book, so it shares the
+    manager's book token cache and booking guard
+    """
+
+    def __init__(self, manager: ResyManager):
+        self.manager = manager
+        # one pool for every find, so retries in the drop window
+        # don't pay for starting threads
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.max_workers = 0
+
+    def _executor(self, n_entries: int) -> ThreadPoolExecutor:
+        executor = self.executor
+        if executor is None or self.max_workers < n_entries:
+            self.close()
+            executor = ThreadPoolExecutor(max_workers=n_entries)
+            self.executor = executor
+            self.max_workers = n_entries
+
+        return executor
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def target(self, campaign: ReservationCampaign) -> ReservationCampaign:
+        """
+        the campaign with each entry targeting the date its venue's
+        calendar opens next, for entries that ask for that
+        """
+        return campaign.copy(
+            update={
+                "entries": [
+                    entry.copy(
+                        update={
+                            "reservation_request": self.manager.target(
+                                entry.reservation_request
+                            )
+                        }
+                    )
+                    for entry in campaign.entries
+                ]
+            }
+        )
+
+    def arm(self, campaign: ReservationCampaign) -> List[ArmedReservation]:
+        """
+        prepare every entry's requests and the find pool ahead of the drop
+        """
+        self._executor(len(campaign.entries))
+        return [
+            self.manager.arm(entry.reservation_request) for entry in campaign.entries
+        ]
+
+    def _find_candidate(
+        self, entry: CampaignEntry, armed: Optional[ArmedReservation]
+    ) -> Optional[CampaignCandidate]:
+        request = entry.reservation_request
+
+        try:
+            self.manager.check_calendar(request)
+            if armed is not None:
+                slots = self.manager.api_access.send_find(armed)
+            else:
+                body = build_find_request_body(request)
+                slots = self.manager.api_access.find_booking_slots(body)
+        except SoldOutError as e:
+            logger.info("skipping venue %s: %s", request.venue_id, e)
+            return None
+        except HTTPError as e:
+            logger.info("find failed for venue %s: %s", request.venue_id, e)
+            return None
+
+        if not slots:
+            return None
+
+        try:
+            slot = self.manager.selector.select(slots, request)
+        except NoSlotsError:
+            return None
+
+        return CampaignCandidate(entry, slot, armed)
+
+    def find_candidates(
+        self,
+        campaign: ReservationCampaign,
+        armed: Optional[Sequence[ArmedReservation]] = None,
+    ) -> List[CampaignCandidate]:
+        executor = self._executor(len(campaign.entries))
+        results = executor.map(
+            self._find_candidate,
+            campaign.entries,
+            armed if armed is not None else [None] * len(campaign.entries),
+        )
+
+        candidates = [candidate for candidate in results if candidate is not None]
+        return sorted(candidates, key=lambda candidate: candidate.rank)
+
+    def make_reservation(
+        self,
+        campaign: ReservationCampaign,
+        armed: Optional[Sequence[ArmedReservation]] = None,
+    ) -> str:
+        """
+        find across the campaign and book the best candidate, once.
+        if the campaign was armed ahead of time, its prepared
+        requests are sent instead of building new ones
+        """
+        if self.manager.booking_guard is not None:
+            self.manager.booking_guard.check()
+
+        candidates = self.find_candidates(campaign, armed)
+
+        for candidate in candidates:
+            venue_id = candidate.entry.reservation_request.venue_id
+            try:
+                resy_token = self.manager.book(
+                    candidate.entry.reservation_request,
+                    candidate.slot,
+                    candidate.armed,
+                    campaign.timezone,
+                )
+            except HTTPError as e:
+                logger.info("booking failed for venue %s: %s", venue_id, e)
+                continue
+
+            logger.info("booked venue %s at %s", venue_id, candidate.slot.date.start)
+            return resy_token
+
+        raise NoSlotsError("No bookable slots found across the campaign")
+
+    def make_reservation_with_retries(
+        self,
+        campaign: ReservationCampaign,
+        armed: Optional[Sequence[ArmedReservation]] = None,
+    ) -> str:
+        return self.manager.retry_engine.run(
+            [(ReservationPhase.FIND, lambda _: self.make_reservation(campaign, armed))]
+        )
+
+    def make_reservation_at_opening_time(self, campaign: ReservationCampaign) -> str:
+        """
+        preflight and arm every entry, sleep until the drop,
+        then run & return the campaign
+        """
+        drop_time = drop_time_today(
+            campaign.expected_drop_hour,
+            campaign.expected_drop_minute,
+            campaign.timezone,
+        )
+
+        campaign = self.target(campaign)
+        self.manager.preflight(drop_time)
+        armed = self.arm(campaign)
+
+        log_window = DropWindow()
+        try:
+            self.manager.wait_for_drop(drop_time, log_window)
+
+            return self.make_reservation_with_retries(campaign, armed)
+        finally:
+            log_window.close()
@@ -0,0 +1,131 @@
+import time
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.constants import (
+    CLOCK_SYNC_LEAD_SECONDS,
+    CLOCK_SYNC_SAMPLES,
+    CLOCK_SYNC_SPACING_SECONDS,
+)
+from resy_bot.logging import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# the Date header only has whole second resolution
+DATE_HEADER_RESOLUTION_SECONDS = 1.0
+
+
+class ClockSample(BaseModel):
+    sent: float
+    received: float
+    server_date: float
+
+    @property
+    def round_trip(self) -> float:
+        return self.received - self.sent
+
+
+class ClockEstimate(BaseModel):
+    offset: float
+    uncertainty: float
+    one_way_latency: float
+    n_samples: int
+
+    def local_fire_time(self, server_time: datetime) -> datetime:
+        """
+        local wall clock time to send a request so that it arrives
+        at the server when the server's clock reads server_time
+        """
+        return datetime.fromtimestamp(
+            server_time.timestamp() - self.offset - self.one_way_latency
+        )
+
+
+def estimate_clock(samples: List[ClockSample]) -> ClockEstimate:
+    """
+    NTP style estimate of (server clock - local clock) from Date headers.
+
+    the server stamped each response at some local time in [sent, received],
+    with its clock somewhere in [server_date, server_date + 1),
+    so each sample bounds the offset; intersecting the bounds of samples
+    that straddle a second boundary narrows it well below one second
+    """
+    if not samples:
+        raise ValueError("Need at least one sample to estimate the clock")
+
+    lower = max(s.server_date - s.received for s in samples)
+    upper = min(
+        s.server_date + DATE_HEADER_RESOLUTION_SECONDS - s.sent for s in samples
+    )
+
+    if lower <= upper:
+        offset = (lower + upper) / 2
+        uncertainty = (upper - lower) / 2
+    else:
+        # samples disagree, e.g. the server's clock stepped mid calibration
+        midpoints = [
+            s.server_date
+            + DATE_HEADER_RESOLUTION_SECONDS / 2
+            - (s.sent + s.received) / 2
+            for s in samples
+        ]
+        offset = sum(midpoints) / len(midpoints)
+        uncertainty = DATE_HEADER_RESOLUTION_SECONDS / 2
+
+    one_way_latency = min(s.round_trip for s in samples) / 2
+
+    return ClockEstimate(
+        offset=offset,
+        uncertainty=uncertainty,
+        one_way_latency=one_way_latency,
+        n_samples=len(samples),
+    )
+
+
+class ClockSynchronizer:
+    def __init__(
+        self,
+        api_access: ResyApiAccess,
+        n_samples: int = CLOCK_SYNC_SAMPLES,
+        spacing: float = CLOCK_SYNC_SPACING_SECONDS,
+        lead_seconds: float = CLOCK_SYNC_LEAD_SECONDS,
+    ):
+        self.api_access = api_access
+        self.n_samples = n_samples
+        self.spacing = spacing
+        self.lead_seconds = lead_seconds
+
+    def sample(self) -> ClockSample:
+        sent = time.time()
+        server_date = self.api_access.ping()
+        received = time.time()
+
+        if server_date is None:
+            raise ValueError("Server response had no Date header")
+
+        return ClockSample(
+            sent=sent, received=received, server_date=server_date.timestamp()
+        )
+
+    def calibrate(self) -> ClockEstimate:
+        """
+        fire n_samples cheap requests spaced so that together
+        they cover at least one tick of the server's Date header
+        """
+        samples = []
+        for i in range(self.n_samples):
+            if i:
+                time.sleep(self.spacing)
+            samples.append(self.sample())
+
+        estimate = estimate_clock(samples)
+        logger.info(
+            f"server clock offset {estimate.offset * 1000:+.1f}ms "
+            f"(+/- {estimate.uncertainty * 1000:.1f}ms), "
+            f"one way latency {estimate.one_way_latency * 1000:.1f}ms"
+        )
+        return estimate
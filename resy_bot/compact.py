@@ -0,0 +1,95 @@
+import sys
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+from resy_bot.models import Slot, SlotConfig, SlotDate
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_epoch_us(value: datetime) -> int:
+    if value.tzinfo is not None:
+        raise ValueError("Compact slots only hold naive datetimes")
+
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _from_epoch_us(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class CompactSlot:
+    """
+    memory lean stand-in for Slot, for processes holding many venue-days
+    of slots. config id and type strings are interned so every slot of
+    the same type shares one string, and start/end are stored as integer
+    microseconds since the epoch. converts losslessly to and from Slot.
+    FindChanges holds a watch target's slots between polls as these
+    """
+
+    __slots__ = ("config_id", "config_type", "config_token", "start", "end")
+
+    def __init__(
+        self, config_id: str, config_type: str, config_token: str, start: int, end: int
+    ):
+        self.config_id = sys.intern(config_id)
+        self.config_type = sys.intern(config_type)
+        self.config_token = config_token
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_slot(cls, slot: Slot) -> "CompactSlot":
+        return cls(
+            slot.config.id,
+            slot.config.type,
+            slot.config.token,
+            _to_epoch_us(slot.date.start),
+            _to_epoch_us(slot.date.end),
+        )
+
+    def to_slot(self) -> Slot:
+        return Slot(
+            config=SlotConfig(
+                id=self.config_id, type=self.config_type, token=self.config_token
+            ),
+            date=SlotDate(
+                start=_from_epoch_us(self.start), end=_from_epoch_us(self.end)
+            ),
+        )
+
+    @property
+    def start_datetime(self) -> datetime:
+        return _from_epoch_us(self.start)
+
+    @property
+    def end_datetime(self) -> datetime:
+        return _from_epoch_us(self.end)
+
+    def _key(self) -> Tuple[str, str, str, int, int]:
+        return (
+            self.config_id,
+            self.config_type,
+            self.config_token,
+            self.start,
+            self.end,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactSlot):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactSlot(config_type={self.config_type!r}, "
+            f"start={self.start_datetime}, end={self.end_datetime})"
+        )
+
+
+def compact_slots(slots: Iterable[Slot]) -> List[CompactSlot]:
+    return [CompactSlot.from_slot(slot) for slot in slots]
@@ -1,9 +1,60 @@
 from enum import Enum
 
-
 RESY_BASE_URL = "https://api.resy.com"
-N_RETRIES = 30
+RETRY_DURATION_SECONDS = 1.5
 SECONDS_TO_WAIT_BETWEEN_RETRIES = 0.05
+BACKOFF_BASE_SECONDS = 0.02
+BACKOFF_MAX_SECONDS = 0.25
+BACKOFF_JITTER = 0.5
+BACKOFF_MAX_ATTEMPTS = 3
+
+SCHEDULER_COARSE_MARGIN_SECONDS = 0.05
+SCHEDULER_FINE_SLEEP_SECONDS = 0.001
+SCHEDULER_SPIN_MARGIN_SECONDS = 0.0003
+SCHEDULER_OVERSHOOT_DECAY = 0.9
+SCHEDULER_TICK_SECONDS = 10
+# fire reports kept, a long running daemon only needs the latest
+SCHEDULER_REPORT_HISTORY = 256
+
+CLOCK_SYNC_SAMPLES = 8
+CLOCK_SYNC_SPACING_SECONDS = 0.13
+CLOCK_SYNC_LEAD_SECONDS = 20
+
+TRACE_HISTORY = 256
+
+# targeting makes a new request per drop, so only the latest plans are kept
+SELECTION_PLAN_CACHE_SIZE = 64
+
+DROP_WINDOW_LOG_SAMPLE = 3
+
+DAEMON_ARM_LEAD_SECONDS = 300
+
+CALENDAR_HORIZON_DAYS = 90
+CALENDAR_MAX_AGE_SECONDS = 300
+CALENDAR_FULL_REFRESH_SECONDS = 3600
+CALENDAR_SOLD_OUT = "sold-out"
+
+TOKEN_CACHE_PATH = "~/.resy-bot/tokens.json"
+TOKEN_REFRESH_MARGIN_SECONDS = 600
+TOKEN_DEFAULT_TTL_SECONDS = 12 * 60 * 60
+
+# a book token this close to expiring isn't reused
+BOOK_TOKEN_EXPIRY_MARGIN_SECONDS = 2
+
+WATCH_REQUESTS_PER_SECOND = 2.0
+WATCH_MAX_IN_FLIGHT = 4
+# how long the watch backs off after a 429 without a Retry-After
+WATCH_RATE_LIMITED_PAUSE_SECONDS = 30
+# how often a watch makes sure its token lasts until the next check
+WATCH_PREFLIGHT_INTERVAL_SECONDS = 10 * 60
+
+BOOK_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Origin": "https://widgets.resy.com",
+    "X-Origin": "https://widgets.resy.com",
+    "Referrer": "https://widgets.resy.com/",
+    "Cache-Control": "no-cache",
+}
 
 
 class ResyEndpoints(Enum):
@@ -11,3 +62,10 @@ class ResyEndpoints(Enum):
     DETAILS = "/3/details"
     BOOK = "/3/book"
     PASSWORD_AUTH = "/3/auth/password"
+    CALENDAR = "/4/venue/calendar"
+
+
+class ReservationPhase(Enum):
+    FIND = "find"
+    DETAILS = "details"
+    BOOK = "book"
@@ -0,0 +1,225 @@
+"""
+one long running process for many timed reservations.
+
+drops are kept in a heap ordered timer queue, and the timer thread sleeps
+on a condition until the earliest one is due, so the daemon costs nothing
+while no drop is close. arm_lead_seconds ahead of a drop it preflights
+the account's credentials, picks the date from the venue's calendar if
+asked to, skips the drop if that date is sold out, arms the reservation,
+warms connections, waits out the last stretch and fires like a single run
+would, all on a thread of its own, so a slow login or calendar fetch
+never holds up the timer thread or any other drop. every account has
+one manager, so drops for the same account share its connection pool.
+preflight rewrites the account's token and session headers, so drops for
+the same account arm one at a time. armed requests carry their own
+headers, so those drops still fire concurrently
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from resy_bot.armed import ArmedReservation
+from resy_bot.constants import DAEMON_ARM_LEAD_SECONDS
+from resy_bot.logging import logging
+from resy_bot.manager import ResyManager
+from resy_bot.models import (
+    ConnectionPoolConfig,
+    DaemonConfig,
+    ReservationRequest,
+    ScheduledDrop,
+)
+from resy_bot.scheduler import next_drop_time, wall_to_monotonic
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+Outcome = Union[str, BaseException]
+
+
+class TimerQueue:
+    """
+    callbacks ordered by monotonic deadline, run one at a time by
+    whichever thread calls run. scheduling an earlier one wakes it
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._heap: List[Tuple[float, int, Callable[[], None]]] = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def schedule(self, deadline: float, callback: Callable[[], None]) -> None:
+        with self._condition:
+            heapq.heappush(self._heap, (deadline, next(self._order), callback))
+            self._condition.notify()
+
+    def next_deadline(self) -> Optional[float]:
+        with self._condition:
+            return self._heap[0][0] if self._heap else None
+
+    def run(self) -> None:
+        """
+        run callbacks as they come due until the queue is empty or stopped
+        """
+        while True:
+            with self._condition:
+                while not self._stopped and self._heap:
+                    timeout = self._heap[0][0] - self.clock()
+                    if timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+
+                if self._stopped or not self._heap:
+                    return
+                _, _, callback = heapq.heappop(self._heap)
+
+            callback()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+
+class DropDaemon:
+    @classmethod
+    def build(
+        cls,
+        config: DaemonConfig,
+        pool_config: Optional[ConnectionPoolConfig] = None,
+        fast_decode: bool = False,
+    ) -> "DropDaemon":
+        managers = {
+            account: ResyManager.build(
+                resy_config, pool_config, fast_decode=fast_decode
+            )
+            for account, resy_config in config.accounts.items()
+        }
+        daemon = cls(managers, config.arm_lead_seconds)
+        for drop in config.drops:
+            daemon.schedule(drop)
+        return daemon
+
+    def __init__(
+        self,
+        managers: Dict[str, ResyManager],
+        arm_lead_seconds: float = DAEMON_ARM_LEAD_SECONDS,
+        timers: Optional[TimerQueue] = None,
+    ):
+        self.managers = managers
+        self.arm_lead_seconds = arm_lead_seconds
+        self.timers = timers or TimerQueue()
+        self.outcomes: List[Tuple[ScheduledDrop, Outcome]] = []
+        self._firing: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._arming = {account: threading.Lock() for account in managers}
+
+    def schedule(self, drop: ScheduledDrop) -> datetime:
+        """
+        arm and fire drop at the next time it comes around,
+        returns that time as a local datetime
+        """
+        if drop.account not in self.managers:
+            raise ValueError(f"No manager for account: {drop.account}")
+
+        timed_request = drop.timed_request
+        drop_time = next_drop_time(
+            timed_request.expected_drop_hour,
+            timed_request.expected_drop_minute,
+            timed_request.timezone,
+        )
+        fire_at = wall_to_monotonic(drop_time, self.timers.clock)
+        self.timers.schedule(
+            fire_at - self.arm_lead_seconds, partial(self._start, drop, drop_time)
+        )
+        logger.info(
+            "scheduled venue %s for %s at %s",
+            timed_request.reservation_request.venue_id,
+            drop.account,
+            drop_time,
+        )
+        return drop_time
+
+    def _start(self, drop: ScheduledDrop, drop_time: datetime) -> None:
+        thread = threading.Thread(
+            target=self._arm_and_fire,
+            args=(drop, drop_time),
+            name=f"drop-{drop.account}-"
+            f"{drop.timed_request.reservation_request.venue_id}",
+            daemon=True,
+        )
+        with self._lock:
+            self._firing.append(thread)
+        thread.start()
+
+    def _arm_and_fire(self, drop: ScheduledDrop, drop_time: datetime) -> None:
+        manager = self.managers[drop.account]
+        reservation_request = drop.timed_request.reservation_request
+        try:
+            with self._arming[drop.account]:
+                manager.preflight(drop_time)
+                reservation_request = manager.target(reservation_request)
+                armed = manager.arm(reservation_request)
+                manager.check_calendar(reservation_request)
+        except Exception as e:
+            logger.warning(
+                "arming venue %s for %s failed: %s",
+                reservation_request.venue_id,
+                drop.account,
+                e,
+            )
+            self._record(drop, e)
+            return
+
+        self._fire(drop, manager, drop_time, reservation_request, armed)
+
+    def _fire(
+        self,
+        drop: ScheduledDrop,
+        manager: ResyManager,
+        drop_time: datetime,
+        reservation_request: ReservationRequest,
+        armed: ArmedReservation,
+    ) -> None:
+        outcome: Outcome
+        try:
+            outcome = manager.make_reservation_at(
+                drop_time, reservation_request, armed, drop.timed_request.timezone
+            )
+        except Exception as e:
+            outcome = e
+        self._record(drop, outcome)
+
+    def _record(self, drop: ScheduledDrop, outcome: Outcome) -> None:
+        with self._lock:
+            self.outcomes.append((drop, outcome))
+
+    def run(self) -> List[Tuple[ScheduledDrop, Outcome]]:
+        """
+        serve the timer queue until every drop has been armed,
+        then wait for the last of them to finish firing
+        """
+        self.timers.run()
+
+        with self._lock:
+            firing = list(self._firing)
+        for thread in firing:
+            thread.join()
+
+        return self.outcomes
+
+    def stop(self) -> None:
+        """
+        stop arming drops, ones already armed still fire
+        """
+        self.timers.stop()
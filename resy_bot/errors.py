@@ -4,3 +4,15 @@ class NoSlotsError(Exception):
 
 class ExhaustedRetriesError(Exception):
     pass
+
+
+class AlreadyBookedError(Exception):
+    pass
+
+
+class SoldOutError(Exception):
+    pass
+
+
+class PreflightError(Exception):
+    pass
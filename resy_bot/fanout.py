@@ -0,0 +1,89 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from resy_bot.booking_guard import BookingGuard
+from resy_bot.errors import AlreadyBookedError, ExhaustedRetriesError
+from resy_bot.logging import logging
+from resy_bot.manager import ResyManager
+from resy_bot.models import (
+    ConnectionPoolConfig,
+    ReservationRequest,
+    ResyConfig,
+    TimedReservationRequest,
+)
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class MultiAccountRunner:
+    """
+    runs the same reservation from several accounts in parallel,
+    each with its own session, stopping the rest once one account books
+    """
+
+    @classmethod
+    def build(
+        cls,
+        configs: List[ResyConfig],
+        pool_config: Optional[ConnectionPoolConfig] = None,
+        fast_decode: bool = False,
+    ) -> "MultiAccountRunner":
+        guard = BookingGuard()
+        managers = [
+            ResyManager.build(
+                config, pool_config, booking_guard=guard, fast_decode=fast_decode
+            )
+            for config in configs
+        ]
+        return cls(managers, guard)
+
+    def __init__(self, managers: List[ResyManager], guard: BookingGuard):
+        self.managers = managers
+        self.guard = guard
+        self.executor = ThreadPoolExecutor(max_workers=len(managers))
+
+    def _run(self, make_reservation: Callable[[ResyManager], str]) -> str:
+        futures: Dict[Future, ResyManager] = {
+            self.executor.submit(make_reservation, manager): manager
+            for manager in self.managers
+        }
+        pending = set(futures)
+        errors: List[BaseException] = []
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                account = futures[future].config.email
+                try:
+                    resy_token = future.result()
+                except AlreadyBookedError:
+                    continue
+                except Exception as e:
+                    logger.info("account %s failed: %s", account, e)
+                    errors.append(e)
+                    continue
+
+                logger.info("account %s booked the reservation", account)
+                return resy_token
+
+        raise ExhaustedRetriesError(
+            f"None of {len(self.managers)} accounts booked a slot: {errors}"
+        )
+
+    def make_reservation_with_retries(
+        self, reservation_request: ReservationRequest
+    ) -> str:
+        return self._run(
+            lambda manager: manager.make_reservation_with_retries(reservation_request)
+        )
+
+    def make_reservation_at_opening_time(
+        self, reservation_request: TimedReservationRequest
+    ) -> str:
+        return self._run(
+            lambda manager: manager.make_reservation_at_opening_time(
+                reservation_request
+            )
+        )
@@ -0,0 +1,83 @@
+"""
+opt-in fast path for decoding /4/find responses.
+
+decodes the raw body once (with orjson when it's installed) and builds
+slots without running pydantic validation. the strict path in
+ResyApiAccess stays the default and is the one to use when debugging
+unexpected responses
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Type, TypeVar
+
+from pydantic import BaseModel
+from pydantic.datetime_parse import parse_datetime
+
+from resy_bot.models import Slot, SlotConfig, SlotDate
+
+try:
+    import orjson
+
+    loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:  # pragma: no cover
+    loads = json.loads
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _construct(model: Type[ModelT], values: Dict[str, Any]) -> ModelT:
+    """
+    a leaner BaseModel.construct for models whose fields are all set,
+    skipping its per field default handling
+    """
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__fields_set__", set(values))
+    return instance
+
+
+def _parse_datetime(value: Any, cache: Dict[Any, datetime]) -> datetime:
+    # many slots share start/end times, so parse each distinct value once
+    parsed = cache.get(value)
+    if parsed is None:
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            parsed = parse_datetime(value)
+        cache[value] = parsed
+    return parsed
+
+
+def decode_find_slots(raw: bytes) -> List[Slot]:
+    return build_find_slots(loads(raw))
+
+
+def build_find_slots(data: Dict[str, Any]) -> List[Slot]:
+    venues = data["results"]["venues"]
+    if not venues:
+        return []
+
+    cache: Dict[Any, datetime] = {}
+    slots = []
+    for raw_slot in venues[0]["slots"]:
+        raw_config = raw_slot["config"]
+        raw_date = raw_slot["date"]
+        config = _construct(
+            SlotConfig,
+            {
+                "id": str(raw_config["id"]),
+                "type": raw_config["type"],
+                "token": raw_config["token"],
+            },
+        )
+        slot_date = _construct(
+            SlotDate,
+            {
+                "start": _parse_datetime(raw_date["start"], cache),
+                "end": _parse_datetime(raw_date["end"], cache),
+            },
+        )
+        slots.append(_construct(Slot, {"config": config, "date": slot_date}))
+
+    return slots
@@ -0,0 +1,131 @@
+"""
+change detection on /4/find responses.
+
+while polling, most finds come back exactly as they did last time.
+each target keeps a fingerprint of its last find response: the ETag or
+Last-Modified resy sent, or a hash of the raw body when it sent neither.
+a response with the same fingerprint, or a 304 to the conditional
+request the fingerprint makes, is unchanged and is dropped before it is
+decoded, so no models are built and nothing is selected.
+
+a changed response comes out as a diff of the slots added and removed
+since the last one, keyed by config token. slots are held between finds
+as CompactSlots and built back into Slots only once they are removed.
+listeners subscribed to a
+target get every non-empty diff. a target's finds must go out one at a
+time, the last response is what the next one is compared with
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from requests import Response
+
+from resy_bot.compact import CompactSlot
+from resy_bot.models import Slot
+
+# a (conditional request header, validator) pair, or a hash of the body
+Fingerprint = Union[Tuple[str, str], int]
+
+
+def find_fingerprint(resp: Response) -> Fingerprint:
+    etag = resp.headers.get("ETag")
+    if etag:
+        return "If-None-Match", etag
+
+    last_modified = resp.headers.get("Last-Modified")
+    if last_modified:
+        return "If-Modified-Since", last_modified
+
+    return hash(resp.content)
+
+
+class SlotDiff:
+    __slots__ = ("added", "removed")
+
+    def __init__(self, added: List[Slot], removed: List[Slot]):
+        self.added = added
+        self.removed = removed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed)
+
+    def __repr__(self) -> str:
+        return f"SlotDiff(added={self.added!r}, removed={self.removed!r})"
+
+
+SlotDiffListener = Callable[[SlotDiff], None]
+
+
+class FindChanges:
+    """
+    one target's last find: its fingerprint and the slots it came back
+    with, only those in_scope if given, so a target that only cares
+    about a window doesn't hold on to the rest of the day
+    """
+
+    __slots__ = ("in_scope", "fingerprint", "slots", "_listeners")
+
+    def __init__(self, in_scope: Optional[Callable[[Slot], bool]] = None):
+        self.in_scope = in_scope
+        self.fingerprint: Optional[Fingerprint] = None
+        self.slots: Dict[str, CompactSlot] = {}
+        self._listeners: List[SlotDiffListener] = []
+
+    def subscribe(self, listener: SlotDiffListener) -> None:
+        self._listeners.append(listener)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        headers that let resy answer 304 if nothing changed,
+        empty unless it sent an ETag or Last-Modified last time
+        """
+        if isinstance(self.fingerprint, tuple):
+            header, validator = self.fingerprint
+            return {header: validator}
+
+        return {}
+
+    def forget(self) -> None:
+        """
+        drop the last find, so every slot the next one finds is added
+        """
+        self.fingerprint = None
+        self.slots = {}
+
+    def unchanged(self, fingerprint: Fingerprint) -> bool:
+        return fingerprint == self.fingerprint
+
+    def update(
+        self, slots: List[Slot], fingerprint: Optional[Fingerprint] = None
+    ) -> SlotDiff:
+        """
+        diff slots against the last find's, remember them and
+        tell the listeners if anything changed
+        """
+        in_scope = self.in_scope
+        current = {
+            slot.config.token: slot
+            for slot in slots
+            if in_scope is None or in_scope(slot)
+        }
+        previous = self.slots
+
+        diff = SlotDiff(
+            [slot for token, slot in current.items() if token not in previous],
+            [
+                slot.to_slot()
+                for token, slot in previous.items()
+                if token not in current
+            ],
+        )
+        self.slots = {
+            token: previous.get(token) or CompactSlot.from_slot(slot)
+            for token, slot in current.items()
+        }
+        self.fingerprint = fingerprint
+
+        if diff:
+            for listener in self._listeners:
+                listener(diff)
+
+        return diff
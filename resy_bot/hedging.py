@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Callable, List, Optional, Set
+
+from requests import RequestException
+
+from resy_bot.errors import NoSlotsError
+from resy_bot.logging import logging
+from resy_bot.models import ReservationRetriesConfig, Slot
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class HedgedFinder:
+    """
+    keeps a sliding window of up to hedge_window finds in flight,
+    sending a new one every hedge_spacing_ms while there's room,
+    until one comes back with slots or hedge_budget finds have been sent.
+    the first response with slots wins, the rest are cancelled or ignored
+    """
+
+    def __init__(self, retry_config: ReservationRetriesConfig):
+        self.retry_config = retry_config
+        self.executor = ThreadPoolExecutor(max_workers=retry_config.hedge_window)
+
+    def find(self, find: Callable[[], List[Slot]]) -> List[Slot]:
+        window = self.retry_config.hedge_window
+        spacing = self.retry_config.hedge_spacing_ms / 1000
+        budget = self.retry_config.hedge_budget
+
+        in_flight: Set[Future] = set()
+        sent = 0
+        next_send = time.monotonic()
+        last_error: Optional[BaseException] = None
+
+        try:
+            while True:
+                now = time.monotonic()
+                while len(in_flight) < window and sent < budget and now >= next_send:
+                    in_flight.add(self.executor.submit(find))
+                    sent += 1
+                    next_send = now + spacing
+
+                can_send = len(in_flight) < window and sent < budget
+                if not in_flight and not can_send:
+                    break
+
+                timeout = max(next_send - now, 0) if can_send else None
+                if not in_flight:
+                    time.sleep(timeout or 0)
+                    continue
+
+                done, in_flight = wait(
+                    in_flight, timeout=timeout, return_when=FIRST_COMPLETED
+                )
+
+                for future in done:
+                    try:
+                        slots = future.result()
+                    except RequestException as e:
+                        last_error = e
+                        continue
+
+                    if slots:
+                        logger.info("hedged find won after %d requests", sent)
+                        return slots
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+        if last_error is not None:
+            raise last_error
+
+        raise NoSlotsError(f"No Slots Found after {sent} hedged requests")
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,5 +1,204 @@
+"""
+logging for the bot.
+
+log calls only build a record and put it on an in process queue, a
+listener thread formats and writes it to stdout, so a call on the hot
+path never waits on the terminal. formatting happens on the listener
+too, so pass arguments (logger.info("found %d slots", n)) rather than
+f-strings, and objects passed as arguments shouldn't be mutated after.
+
+around a drop, a DropWindow holds every write back until booking is done
+and samples repeated messages: the first few records of each message are
+kept, the rest are counted and summarised when the window closes
+"""
+
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
+from collections import Counter
+from types import TracebackType
+from typing import IO, List, Optional, Tuple, Type
+
+from resy_bot.constants import DROP_WINDOW_LOG_SAMPLE
+
+LOG_FORMAT = "%(asctime)s %(levelname)s:%(name)s:%(message)s"
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    the stock QueueHandler formats every record before queueing it so
+    that it can be pickled. this queue never leaves the process, so the
+    record is queued as is and formatted by the listener
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class DropWindowSampler(logging.Filter):
+    """
+    lets through the first `sample` records of each message below
+    warning, keyed by logger and unformatted message, and counts the rest
+    """
+
+    def __init__(self, sample: int = DROP_WINDOW_LOG_SAMPLE):
+        super().__init__()
+        self.sample = sample
+        self.counts: Counter[Tuple[str, str]] = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, str(record.msg))
+        with self._lock:
+            self.counts[key] += 1
+            return self.counts[key] <= self.sample
+
+    def summaries(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{name}: {count - self.sample} more of {msg!r}"
+                for (name, msg), count in self.counts.items()
+                if count > self.sample
+            ]
+
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+handler = LazyQueueHandler(_queue)
+
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+_listener = logging.handlers.QueueListener(
+    _queue, _stream_handler, respect_handler_level=True
+)
+_listening = False
+_open_windows = 0
+_sampler: Optional[DropWindowSampler] = None
+_lock = threading.Lock()
+
+summary_logger = logging.getLogger("resy_bot.drop_window")
+summary_logger.setLevel("INFO")
+
+
+def _start_listener() -> None:
+    global _listening
+    if not _listening:
+        _listener.start()
+        _listening = True
+
+
+def _stop_listener() -> None:
+    """
+    returns once everything queued so far has been written
+    """
+    global _listening
+    if _listening:
+        _listener.stop()
+        _listening = False
+
+
+def configure(
+    stream: IO[str] = sys.stdout,
+    level: int = logging.INFO,
+    urllib3_level: int = logging.INFO,
+) -> None:
+    """
+    route the root logger through the queue to stream. urllib3 logs a
+    debug line per request, so it's kept at info unless asked otherwise
+    """
+    with _lock:
+        _stream_handler.setStream(stream)
+
+        root = logging.getLogger()
+        if handler not in root.handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+        logging.getLogger("urllib3").setLevel(urllib3_level)
+
+        if not _open_windows:
+            _start_listener()
+
+
+def flush() -> None:
+    """
+    write everything queued so far, unless a drop window is holding it
+    """
+    with _lock:
+        if _listening:
+            _stop_listener()
+            _start_listener()
+
+
+class DropWindow:
+    """
+    while any window is open, nothing is written and repeated messages
+    are sampled. windows from concurrent flows share one hold, output
+    resumes, with the summaries, once the last of them closes
+    """
+
+    def __init__(self, sample: int = DROP_WINDOW_LOG_SAMPLE):
+        self.sample = sample
+        self.is_open = False
+
+    def open(self) -> None:
+        global _open_windows, _sampler
+        with _lock:
+            if self.is_open:
+                return
+            self.is_open = True
+
+            if _open_windows == 0:
+                _stop_listener()
+                _sampler = DropWindowSampler(self.sample)
+                handler.addFilter(_sampler)
+            _open_windows += 1
+
+    def close(self) -> None:
+        global _open_windows, _sampler
+        with _lock:
+            if not self.is_open:
+                return
+            self.is_open = False
+
+            _open_windows -= 1
+            if _open_windows > 0 or _sampler is None:
+                return
+
+            handler.removeFilter(_sampler)
+            summaries = _sampler.summaries()
+            _sampler = None
+
+        for summary in summaries:
+            summary_logger.info("suppressed %s", summary)
+
+        with _lock:
+            if _open_windows == 0:
+                _start_listener()
+
+    def __enter__(self) -> "DropWindow":
+        self.open()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _shutdown() -> None:
+    # records held by a window still open at exit are written too
+    with _lock:
+        _start_listener()
+        _stop_listener()
 
 
-logging.basicConfig(stream=sys.stdout, level=logging.DEBUG)
+configure()
+atexit.register(_shutdown)
@@ -1,16 +1,25 @@
+import time
 from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, List, Optional, Union
 
-from resy_bot.logging import logging
-from resy_bot.errors import NoSlotsError, ExhaustedRetriesError
+from requests import HTTPError, RequestException
+
+from resy_bot.logging import DropWindow, logging
+from resy_bot.errors import NoSlotsError, SoldOutError
 from resy_bot.constants import (
-    N_RETRIES,
+    RETRY_DURATION_SECONDS,
     SECONDS_TO_WAIT_BETWEEN_RETRIES,
+    ReservationPhase,
 )
 from resy_bot.models import (
     ResyConfig,
+    ConnectionPoolConfig,
     ReservationRequest,
     TimedReservationRequest,
     ReservationRetriesConfig,
+    DetailsResponseBody,
+    Slot,
 )
 from resy_bot.model_builders import (
     build_find_request_body,
@@ -18,7 +27,21 @@ from resy_bot.model_builders import (
     build_book_request_body,
 )
 from resy_bot.api_access import ResyApiAccess
-from resy_bot.selectors import AbstractSelector, SimpleSelector
+from resy_bot.armed import ArmedReservation
+from resy_bot.auth import TokenManager
+from resy_bot.book_tokens import BookTokenCache
+from resy_bot.selectors import AbstractSelector, SimpleSelector, SlotChain
+from resy_bot.scheduler import DropScheduler, FireReport, drop_time_today
+from resy_bot.clock_sync import ClockSynchronizer
+from resy_bot.warmup import ConnectionWarmer
+from resy_bot.hedging import HedgedFinder
+from resy_bot.booking_guard import BookingGuard
+from resy_bot.calendar import CalendarCache
+from resy_bot.prefetch import DetailsPrefetcher
+from resy_bot.recording import Recorder
+from resy_bot.retry import SLOT_GONE_STATUSES, RetryEngine, Step
+from resy_bot import tracing
+from resy_bot.tracing import Tracer
 
 logger = logging.getLogger(__name__)
 logger.setLevel("INFO")
@@ -26,14 +49,41 @@ logger.setLevel("INFO")
 
 class ResyManager:
     @classmethod
-    def build(cls, config: ResyConfig) -> "ResyManager":
-        api_access = ResyApiAccess.build(config)
+    def build(
+        cls,
+        config: ResyConfig,
+        pool_config: Optional[ConnectionPoolConfig] = None,
+        booking_guard: Optional[BookingGuard] = None,
+        recorder: Optional[Recorder] = None,
+        fast_decode: bool = False,
+    ) -> "ResyManager":
+        pool_config = pool_config or ConnectionPoolConfig()
+        api_access = ResyApiAccess.build(
+            config,
+            pool_config=pool_config,
+            fast_decode=fast_decode,
+            recorder=recorder,
+        )
         selector = SimpleSelector()
         retry_config = ReservationRetriesConfig(
             seconds_between_retries=SECONDS_TO_WAIT_BETWEEN_RETRIES,
-            n_retries=N_RETRIES,
+            retry_duration=RETRY_DURATION_SECONDS,
+        )
+        clock_sync = ClockSynchronizer(api_access)
+        warmer = ConnectionWarmer(api_access, pool_config)
+        return cls(
+            config,
+            api_access,
+            selector,
+            retry_config,
+            DropScheduler(),
+            clock_sync,
+            warmer,
+            booking_guard,
+            calendar=CalendarCache(api_access),
+            token_manager=TokenManager(api_access, config),
+            book_tokens=BookTokenCache(),
         )
-        return cls(config, api_access, selector, retry_config)
 
     def __init__(
         self,
@@ -41,11 +91,36 @@ class ResyManager:
         api_access: ResyApiAccess,
         slot_selector: AbstractSelector,
         retry_config: ReservationRetriesConfig,
+        scheduler: Optional[DropScheduler] = None,
+        clock_sync: Optional[ClockSynchronizer] = None,
+        warmer: Optional[ConnectionWarmer] = None,
+        booking_guard: Optional[BookingGuard] = None,
+        tracer: Optional[Tracer] = None,
+        calendar: Optional[CalendarCache] = None,
+        token_manager: Optional[TokenManager] = None,
+        book_tokens: Optional[BookTokenCache] = None,
     ):
         self.config = config
         self.api_access = api_access
         self.selector = slot_selector
         self.retry_config = retry_config
+        self.scheduler = scheduler or DropScheduler()
+        self.clock_sync = clock_sync
+        self.warmer = warmer
+        self.booking_guard = booking_guard
+        self.details_prefetcher = (
+            DetailsPrefetcher(retry_config.details_prefetch)
+            if retry_config.details_prefetch > 1
+            else None
+        )
+        self.hedged_finder = (
+            HedgedFinder(retry_config) if retry_config.hedging_enabled else None
+        )
+        self.retry_engine = RetryEngine(retry_config)
+        self.tracer = tracer or Tracer()
+        self.calendar = calendar
+        self.token_manager = token_manager
+        self.book_tokens = book_tokens
 
     def get_venue_id(self, address: str):
         """
@@ -55,76 +130,483 @@ class ResyManager:
         """
         pass
 
-    def make_reservation(self, reservation_request: ReservationRequest) -> str:
-        body = build_find_request_body(reservation_request)
+    def preflight(self, drop_time: datetime, force_login: bool = False) -> None:
+        """
+        make sure the token lasts through the drop's retries and the payment
+        method is on the account, logging in now if the cached token won't
+        do (or always, with force_login), so no auth request lands in the
+        drop window. run it before arming, armed requests carry the token
+        they were armed with
+        """
+        if self.token_manager is None:
+            return
 
-        slots = self.api_access.find_booking_slots(body)
-        logger.info(f"Returned: {slots}")
+        token = self.token_manager.preflight(
+            drop_time + timedelta(seconds=self.retry_config.retry_duration),
+            force_login,
+        )
+        self.config.token = token.token
+        self.api_access.set_token(token.token)
 
-        if len(slots) == 0:
-            raise NoSlotsError("No Slots Found")
-        else:
-            logger.info(len(slots))
-            logger.info(slots)
+    def target(self, reservation_request: ReservationRequest) -> ReservationRequest:
+        """
+        a request targeting the date its venue's calendar opens next,
+        for requests that ask for that. resolve once per drop, as the
+        calendar moves on once the date opens
+        """
+        if not reservation_request.from_calendar:
+            return reservation_request
 
-        selected_slot = self.selector.select(slots, reservation_request)
+        if self.calendar is None:
+            raise ValueError("Targeting from the calendar needs a calendar cache")
 
-        logger.info(selected_slot)
-        details_request = build_get_slot_details_body(
-            reservation_request, selected_slot
+        calendar = self.calendar.get(
+            reservation_request.venue_id, reservation_request.party_size
+        )
+        return reservation_request.copy(
+            update={"ideal_date": calendar.next_opening_date, "from_calendar": False}
         )
-        logger.info(details_request)
-        token = self.api_access.get_booking_token(details_request)
 
-        booking_request = build_book_request_body(token, self.config)
+    def check_calendar(self, reservation_request: ReservationRequest) -> None:
+        """
+        raise if the cached calendar already reports the date sold out
+        """
+        if self.calendar is None:
+            return
 
-        resy_token = self.api_access.book_slot(booking_request)
+        calendar = self.calendar.cached(
+            reservation_request.venue_id, reservation_request.party_size
+        )
+        target_date = reservation_request.target_date
+        if calendar is not None and calendar.is_sold_out(target_date):
+            raise SoldOutError(f"{target_date} is sold out")
 
-        return resy_token
+    def load_calendar(self, reservation_request: ReservationRequest) -> None:
+        """
+        fetch the venue's calendar ahead of the drop, so check_calendar
+        has it to go on. a failed fetch only costs the check
+        """
+        if self.calendar is None:
+            return
 
-    def make_reservation_with_retries(
-        self, reservation_request: ReservationRequest
+        try:
+            self.calendar.get(
+                reservation_request.venue_id, reservation_request.party_size
+            )
+        except RequestException as e:
+            logger.warning(
+                "couldn't load the calendar for venue %s: %s",
+                reservation_request.venue_id,
+                e,
+            )
+
+    def arm(self, reservation_request: ReservationRequest) -> ArmedReservation:
+        """
+        load the calendar, compile the selection plan and prepare
+        the requests ahead of the drop
+        """
+        self.load_calendar(reservation_request)
+        self.selector.prepare(reservation_request)
+        return self.api_access.arm(reservation_request, self.config)
+
+    def make_reservation(
+        self,
+        reservation_request: ReservationRequest,
+        armed: Optional[ArmedReservation] = None,
     ) -> str:
-        for _ in range(self.retry_config.n_retries):
+        """
+        find, select, get a booking token and book, once.
+        if the reservation was armed ahead of time, its prepared
+        requests are sent instead of building new ones
+        """
+        result: Any = None
+        try:
+            for _, step in self._steps(reservation_request, armed):
+                result = step(result)
+        finally:
+            tracing.activate(None)
+
+        return result
+
+    def _steps(
+        self,
+        reservation_request: ReservationRequest,
+        armed: Optional[ArmedReservation],
+        timezone: Optional[str] = None,
+    ) -> List[Step]:
+        reservation_request = self.target(reservation_request)
+
+        def find(_: None) -> Union[SlotChain, List[Slot]]:
+            # every pass that starts from find is a new traced attempt
+            self.tracer.start_attempt(reservation_request.venue_id)
+            return self._find_and_select(reservation_request, armed)
+
+        def details(chain: SlotChain) -> SlotChain:
+            self._get_chain_booking_token(reservation_request, chain, armed, timezone)
+            return chain
+
+        details_prefetcher = self.details_prefetcher
+        if details_prefetcher is not None:
+            return [
+                (ReservationPhase.FIND, self._traced(find)),
+                (
+                    ReservationPhase.BOOK,
+                    self._traced(
+                        lambda ranked_slots: details_prefetcher.book_best(
+                            ranked_slots,
+                            tracing.bind(
+                                lambda slot: self._get_booking_token(
+                                    reservation_request, slot, armed, timezone
+                                )
+                            ),
+                            lambda token: self._book(token, armed),
+                        )
+                    ),
+                ),
+            ]
+
+        return [
+            (ReservationPhase.FIND, self._traced(find)),
+            (ReservationPhase.DETAILS, self._traced(details)),
+            (
+                ReservationPhase.BOOK,
+                self._traced(
+                    lambda chain: self._book_chain(
+                        reservation_request, chain, armed, timezone
+                    )
+                ),
+            ),
+        ]
+
+    @staticmethod
+    def _traced(step: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        def traced(value: Any) -> Any:
             try:
-                return self.make_reservation(reservation_request)
+                return step(value)
+            except Exception as e:
+                trace = tracing.current_trace()
+                if trace is not None:
+                    trace.error = f"{type(e).__name__}: {e}"
+                raise
+
+        return traced
+
+    def _find_and_select(
+        self,
+        reservation_request: ReservationRequest,
+        armed: Optional[ArmedReservation],
+    ) -> Union[SlotChain, List[Slot]]:
+        """
+        the selected slot with the rest of the find to fall back on,
+        or the ranked slots to prefetch tokens for
+        """
+        if self.booking_guard is not None:
+            self.booking_guard.check()
+        self.check_calendar(reservation_request)
+
+        find: Callable[[], List[Slot]]
+        if armed is not None:
+            find = partial(self.api_access.send_find, armed)
+        else:
+            body = build_find_request_body(reservation_request)
+            find = partial(self.api_access.find_booking_slots, body)
 
-            except NoSlotsError:
-                logger.info(
-                    f"no slots, retrying; currently {datetime.now().isoformat()}"
+        started = time.perf_counter()
+        with tracing.phase("find"):
+            if self.hedged_finder is not None:
+                slots = self.hedged_finder.find(tracing.bind(find))
+            else:
+                slots = find()
+        if self.warmer is not None:
+            self.warmer.record_first_request(time.perf_counter() - started)
+        logger.info("Returned %d slots", len(slots))
+
+        if len(slots) == 0:
+            raise NoSlotsError("No Slots Found")
+        logger.debug("Slots: %s", slots)
+
+        if self.details_prefetcher is not None:
+            with tracing.phase("selection"):
+                ranked_slots = self.selector.rank(
+                    slots, reservation_request, self.details_prefetcher.k
                 )
+            if not ranked_slots:
+                raise NoSlotsError("No acceptable slots found")
 
-        raise ExhaustedRetriesError(
-            f"Retried {self.retry_config.n_retries} times, " "without finding a slot"
+            return ranked_slots
+
+        with tracing.phase("selection"):
+            selected_slot = self.selector.select(slots, reservation_request)
+
+        logger.info("Selected %s", selected_slot)
+        return SlotChain(self.selector, slots, reservation_request, selected_slot)
+
+    def _fall_back(self, chain: SlotChain, error: HTTPError) -> None:
+        """
+        move on to the next slot if the current one was taken,
+        otherwise let the retry engine deal with the error
+        """
+        status = getattr(error.response, "status_code", None)
+        if status not in SLOT_GONE_STATUSES:
+            raise error
+
+        taken = chain.current
+        if not chain.advance():
+            raise error
+
+        tracing.count("slot_fallback")
+        logger.info(
+            "slot at %s taken, falling back to %s",
+            taken.date.start,
+            chain.current.date.start,
         )
 
+    def _get_chain_booking_token(
+        self,
+        reservation_request: ReservationRequest,
+        chain: SlotChain,
+        armed: Optional[ArmedReservation],
+        timezone: Optional[str],
+    ) -> DetailsResponseBody:
+        while True:
+            try:
+                chain.details = self._get_booking_token(
+                    reservation_request, chain.current, armed, timezone
+                )
+                return chain.details
+            except HTTPError as e:
+                self._fall_back(chain, e)
+
+    def _book_chain(
+        self,
+        reservation_request: ReservationRequest,
+        chain: SlotChain,
+        armed: Optional[ArmedReservation],
+        timezone: Optional[str],
+    ) -> str:
+        while True:
+            try:
+                # details is None when the last fallback's details failed
+                return self.book(
+                    reservation_request, chain.current, armed, timezone, chain.details
+                )
+            except HTTPError as e:
+                self._fall_back(chain, e)
+
+    def book(
+        self,
+        reservation_request: ReservationRequest,
+        slot: Slot,
+        armed: Optional[ArmedReservation] = None,
+        timezone: Optional[str] = None,
+        details: Optional[DetailsResponseBody] = None,
+    ) -> str:
+        """
+        book a selected slot and return the resy token, getting a book
+        token for it unless details already has one. sends the armed
+        requests if there are any, and books through the booking guard
+        """
+        if details is None:
+            details = self._get_booking_token(
+                reservation_request, slot, armed, timezone
+            )
+
+        return self._book(details, armed)
+
+    def _get_booking_token(
+        self,
+        reservation_request: ReservationRequest,
+        slot: Slot,
+        armed: Optional[ArmedReservation],
+        timezone: Optional[str] = None,
+    ) -> DetailsResponseBody:
+        """
+        a book token for slot, reused from the cache while it's good by
+        resy's clock in the venue's timezone, else fresh from details
+        """
+        key = (
+            slot.config.token,
+            reservation_request.party_size,
+            reservation_request.target_date,
+        )
+        if self.book_tokens is not None:
+            cached = self.book_tokens.get(key)
+            if cached is not None:
+                tracing.count("book_token_cache_hit")
+                return cached
+            tracing.count("book_token_cache_miss")
+
+        with tracing.phase("details"):
+            if armed is not None:
+                details = self.api_access.send_details(armed, slot)
+            else:
+                details_request = build_get_slot_details_body(reservation_request, slot)
+                logger.debug("Details request: %s", details_request)
+                details = self.api_access.get_booking_token(details_request)
+
+        if self.book_tokens is not None:
+            self.book_tokens.put(key, details, timezone)
+        return details
+
+    def _book(
+        self, token: DetailsResponseBody, armed: Optional[ArmedReservation]
+    ) -> str:
+        """
+        book with the token. it is kept for the next attempt unless
+        it was used up or resy says the slot is gone, and only checked
+        for expiry once that attempt takes it from the cache
+        """
+        book: Callable[[], str]
+        if armed is not None:
+            book = partial(self.api_access.send_book, armed, token)
+        else:
+            booking_request = build_book_request_body(token, self.config)
+            book = partial(self.api_access.book_slot, booking_request)
+
+        try:
+            with tracing.phase("book"):
+                if self.booking_guard is not None:
+                    resy_token = self.booking_guard.book(self.config.email, book)
+                else:
+                    resy_token = book()
+        except HTTPError as e:
+            status = getattr(e.response, "status_code", None)
+            if self.book_tokens is not None and status in SLOT_GONE_STATUSES:
+                self.book_tokens.discard(token)
+            raise
+
+        if self.book_tokens is not None:
+            self.book_tokens.discard(token)
+        return resy_token
+
+    def make_reservation_with_retries(
+        self,
+        reservation_request: ReservationRequest,
+        armed: Optional[ArmedReservation] = None,
+        timezone: Optional[str] = None,
+    ) -> str:
+        """
+        keep trying until booked or retry_duration runs out,
+        retrying only the phase that failed where possible.
+        timezone is the venue's, if it isn't ours
+        """
+        try:
+            return self.retry_engine.run(
+                self._steps(reservation_request, armed, timezone)
+            )
+        finally:
+            tracing.activate(None)
+
     def _get_drop_time(self, reservation_request: TimedReservationRequest) -> datetime:
-        now = datetime.now()
-        return datetime(
-            year=now.year,
-            month=now.month,
-            day=now.day,
-            hour=reservation_request.expected_drop_hour,
-            minute=reservation_request.expected_drop_minute,
+        return drop_time_today(
+            reservation_request.expected_drop_hour,
+            reservation_request.expected_drop_minute,
+            reservation_request.timezone,
         )
 
     def make_reservation_at_opening_time(
-        self, reservation_request: TimedReservationRequest
+        self,
+        reservation_request: TimedReservationRequest,
+        armed: Optional[ArmedReservation] = None,
+    ) -> str:
+        return self.make_reservation_at(
+            self._get_drop_time(reservation_request),
+            reservation_request.reservation_request,
+            armed,
+            reservation_request.timezone,
+        )
+
+    def make_reservation_at(
+        self,
+        drop_time: datetime,
+        reservation_request: ReservationRequest,
+        armed: Optional[ArmedReservation] = None,
+        timezone: Optional[str] = None,
     ) -> str:
         """
-        cycle until we hit the opening time, then run & return the reservation
+        preflight and arm the reservation's requests unless that was done
+        already, sleep until we hit the opening time, then run & return the
+        reservation. logs are held back from just before the drop
+        until booking is done
         """
-        drop_time = self._get_drop_time(reservation_request)
-        last_check = datetime.now()
+        reservation_request = self.target(reservation_request)
+        if armed is None:
+            self.preflight(drop_time)
+            armed = self.arm(reservation_request)
 
-        while True:
-            if datetime.now() < drop_time:
-                if datetime.now() - last_check > timedelta(seconds=10):
-                    logger.info(f"{datetime.now()}: still waiting")
-                    last_check = datetime.now()
-                continue
+        log_window = DropWindow()
+        try:
+            self.wait_for_drop(drop_time, log_window)
 
-            logger.info(f"time reached, making a reservation now! {datetime.now()}")
             return self.make_reservation_with_retries(
-                reservation_request.reservation_request
+                reservation_request, armed, timezone
             )
+        finally:
+            log_window.close()
+
+    def wait_for_drop(
+        self, drop_time: datetime, log_window: Optional[DropWindow] = None
+    ) -> FireReport:
+        """
+        sleep until the drop.
+        if a connection warmer is set, open connections ahead of the drop,
+        keep them alive while waiting and check them right before firing.
+        if a clock synchronizer is set, calibrate against the server shortly
+        before the drop and fire so the first find lands at the drop instant.
+        a log window is opened after calibrating, the caller closes it
+        """
+        if self.warmer is not None:
+            lead = self.warmer.pool_config.warmup_lead_seconds
+            self._wait_until(drop_time - timedelta(seconds=lead))
+            self.warmer.warm()
+
+        if self.clock_sync is not None:
+            drop_time = self._calibrate_drop_time(drop_time, self.clock_sync)
+
+        if log_window is not None:
+            log_window.open()
+
+        if self.warmer is not None:
+            lead = self.warmer.pool_config.health_check_lead_seconds
+            self._wait_until(drop_time - timedelta(seconds=lead))
+            self.warmer.health_check()
+
+        if self.hedged_finder is not None:
+            # centre the hedged window on the drop instant
+            drop_time -= timedelta(seconds=self.retry_config.hedge_lead_seconds)
+
+        report = self._wait_until(drop_time)
+
+        logger.info(
+            "time reached, making a reservation now! (fired %+.3fms from target)",
+            report.lateness * 1000,
+        )
+        return report
+
+    def _calibrate_drop_time(
+        self, drop_time: datetime, clock_sync: ClockSynchronizer
+    ) -> datetime:
+        """
+        when to fire for the server's clock to read drop_time. calibrating
+        is only an optimisation, so if it fails we fire by our own clock
+        """
+        self._wait_until(drop_time - timedelta(seconds=clock_sync.lead_seconds))
+
+        try:
+            estimate = clock_sync.calibrate()
+        except (RequestException, ValueError) as e:
+            logger.warning("clock sync failed, firing by the local clock: %s", e)
+            return drop_time
+
+        if self.book_tokens is not None:
+            self.book_tokens.server_offset = estimate.offset
+        return estimate.local_fire_time(drop_time)
+
+    def _wait_until(self, target: datetime) -> FireReport:
+        return self.scheduler.wait_until_datetime(target, on_tick=self._on_waiting_tick)
+
+    def _on_waiting_tick(self, remaining: float) -> None:
+        logger.info("still waiting, %.1fs to go", remaining)
+
+        if self.warmer is not None:
+            self.warmer.keep_alive_if_due()
@@ -1,8 +1,22 @@
 from typing import Dict, List, Optional
 from datetime import datetime, date, timedelta
 
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from pydantic import BaseModel, validator, root_validator
 
+from resy_bot.constants import (
+    BACKOFF_BASE_SECONDS,
+    BACKOFF_JITTER,
+    BACKOFF_MAX_ATTEMPTS,
+    BACKOFF_MAX_SECONDS,
+    CALENDAR_SOLD_OUT,
+    DAEMON_ARM_LEAD_SECONDS,
+    WATCH_MAX_IN_FLIGHT,
+    WATCH_REQUESTS_PER_SECOND,
+    ReservationPhase,
+)
+
 
 class ResyConfig(BaseModel):
     api_key: str
@@ -25,18 +39,27 @@ class ReservationRequest(BaseModel):
     preferred_type: Optional[str]
     ideal_date: Optional[date]
     days_in_advance: Optional[int]
+    # target whichever date the venue's calendar opens next
+    from_calendar: bool = False
 
     @root_validator
     def validate_target_date(cls, data: Dict) -> Dict:
-        has_date = data["ideal_date"] is not None
-        has_waiting_pd = data["days_in_advance"] is not None
-
-        if has_date and has_waiting_pd:
-            raise ValueError("Must only provide one of ideal_date or days_in_advance")
-        elif has_date or has_waiting_pd:
+        n_targets = sum(
+            [
+                data.get("ideal_date") is not None,
+                data.get("days_in_advance") is not None,
+                bool(data.get("from_calendar")),
+            ]
+        )
+
+        if n_targets > 1:
+            raise ValueError(
+                "Must only provide one of ideal_date, days_in_advance or from_calendar"
+            )
+        elif n_targets == 1:
             return data
 
-        raise ValueError("Must provide ideal_date or days_in_advance")
+        raise ValueError("Must provide ideal_date, days_in_advance or from_calendar")
 
     @property
     def target_date(self) -> date:
@@ -49,15 +72,210 @@ class ReservationRequest(BaseModel):
         raise ValueError("No date")
 
 
+class ConnectionPoolConfig(BaseModel):
+    pool_connections: int = 1
+    pool_maxsize: int = 10
+    max_retries: int = 0
+    pool_block: bool = False
+    warm_connections: int = 4
+    warmup_lead_seconds: float = 60
+    keepalive_seconds: float = 15
+    health_check_lead_seconds: float = 1
+
+    @validator("warm_connections")
+    def validate_warm_connections(cls, warm_connections: int, values: Dict) -> int:
+        if warm_connections > values.get("pool_maxsize", warm_connections):
+            raise ValueError("Can't warm more connections than the pool keeps")
+
+        return warm_connections
+
+
+class BackoffConfig(BaseModel):
+    """
+    jittered exponential backoff for one phase of a reservation.
+    the nth retry waits base_seconds * multiplier ** (n - 1), capped at
+    max_seconds, less up to a `jitter` fraction of that at random.
+    after max_attempts failures in a row the phase gives up and the
+    reservation starts over from find (None means never)
+    """
+
+    base_seconds: float = BACKOFF_BASE_SECONDS
+    max_seconds: float = BACKOFF_MAX_SECONDS
+    multiplier: float = 2
+    jitter: float = BACKOFF_JITTER
+    max_attempts: Optional[int] = BACKOFF_MAX_ATTEMPTS
+
+    @validator("jitter")
+    def validate_jitter(cls, jitter: float) -> float:
+        if not 0 <= jitter <= 1:
+            raise ValueError("Jitter must be between 0 and 1")
+
+        return jitter
+
+    def delay(self, attempt: int, rand: float) -> float:
+        """
+        seconds to wait before retry number `attempt` (from 1),
+        given a uniform random number in [0, 1)
+        """
+        delay = min(
+            self.max_seconds, self.base_seconds * self.multiplier ** (attempt - 1)
+        )
+        return delay * (1 - self.jitter * rand)
+
+
 class ReservationRetriesConfig(BaseModel):
     seconds_between_retries: float
-    n_retries: int
+    retry_duration: float
+    hedge_window: int = 1
+    hedge_spacing_ms: float = 0
+    hedge_budget: int = 1
+    details_prefetch: int = 1
+    find_backoff: Optional[BackoffConfig] = None
+    details_backoff: BackoffConfig = BackoffConfig()
+    book_backoff: BackoffConfig = BackoffConfig()
+
+    @validator("hedge_window", "hedge_budget", "details_prefetch")
+    def validate_positive(cls, value: int) -> int:
+        if value < 1:
+            raise ValueError("Must be at least 1")
+
+        return value
+
+    @property
+    def hedging_enabled(self) -> bool:
+        return self.hedge_window > 1
+
+    @property
+    def hedge_lead_seconds(self) -> float:
+        """
+        how far ahead of the drop the first hedged find goes out,
+        so the window is centred on the drop instant
+        """
+        return (self.hedge_window - 1) / 2 * self.hedge_spacing_ms / 1000
+
+    def backoff(self, phase: ReservationPhase) -> BackoffConfig:
+        if phase == ReservationPhase.DETAILS:
+            return self.details_backoff
+        if phase == ReservationPhase.BOOK:
+            return self.book_backoff
+        if self.find_backoff is not None:
+            return self.find_backoff
+
+        # finds poll at a steady rate, they're bounded by the deadline
+        return BackoffConfig(
+            base_seconds=self.seconds_between_retries,
+            max_seconds=self.seconds_between_retries,
+            multiplier=1,
+            jitter=0.2,
+            max_attempts=None,
+        )
+
+    @property
+    def n_retries(self) -> int:
+        if self.seconds_between_retries <= 0:
+            return 1
+
+        return max(1, round(self.retry_duration / self.seconds_between_retries))
+
+
+def _known_timezone(timezone: Optional[str]) -> Optional[str]:
+    if timezone is None:
+        return timezone
+
+    try:
+        ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {timezone}")
+
+    return timezone
 
 
 class TimedReservationRequest(BaseModel):
     reservation_request: ReservationRequest
     expected_drop_hour: int
     expected_drop_minute: int
+    # the venue's time zone (e.g. America/New_York) if it isn't ours
+    timezone: Optional[str] = None
+
+    @validator("timezone")
+    def validate_timezone(cls, timezone: Optional[str]) -> Optional[str]:
+        return _known_timezone(timezone)
+
+
+class ScheduledDrop(BaseModel):
+    account: str
+    timed_request: TimedReservationRequest
+
+
+class DaemonConfig(BaseModel):
+    accounts: Dict[str, ResyConfig]
+    drops: List[ScheduledDrop]
+    arm_lead_seconds: float = DAEMON_ARM_LEAD_SECONDS
+
+    @validator("drops")
+    def validate_drop_accounts(
+        cls, drops: List[ScheduledDrop], values: Dict
+    ) -> List[ScheduledDrop]:
+        accounts = values.get("accounts", {})
+        for drop in drops:
+            if drop.account not in accounts:
+                raise ValueError(f"Drop for unknown account: {drop.account}")
+
+        return drops
+
+
+class WatchConfig(BaseModel):
+    targets: List[ReservationRequest]
+    requests_per_second: float = WATCH_REQUESTS_PER_SECOND
+    max_in_flight: int = WATCH_MAX_IN_FLIGHT
+    max_bookings: int = 1
+
+    @validator("targets")
+    def validate_targets(
+        cls, targets: List[ReservationRequest]
+    ) -> List[ReservationRequest]:
+        if not targets:
+            raise ValueError("Watch must have at least one target")
+
+        for target in targets:
+            if target.from_calendar:
+                raise ValueError(
+                    f"Watch target for venue {target.venue_id} needs a date, "
+                    "not from_calendar"
+                )
+
+        return targets
+
+    @validator("requests_per_second", "max_in_flight", "max_bookings")
+    def validate_positive(cls, value: float) -> float:
+        if value <= 0:
+            raise ValueError("Must be positive")
+
+        return value
+
+
+class CampaignEntry(BaseModel):
+    priority: int
+    reservation_request: ReservationRequest
+
+
+class ReservationCampaign(BaseModel):
+    entries: List[CampaignEntry]
+    expected_drop_hour: int
+    expected_drop_minute: int
+    # the venues' time zone (e.g. America/New_York) if it isn't ours
+    timezone: Optional[str] = None
+
+    @validator("entries")
+    def validate_entries(cls, entries: List[CampaignEntry]) -> List[CampaignEntry]:
+        if not entries:
+            raise ValueError("Campaign must have at least one entry")
+
+        return entries
+
+    @validator("timezone")
+    def validate_timezone(cls, timezone: Optional[str]) -> Optional[str]:
+        return _known_timezone(timezone)
 
 
 class AuthRequestBody(BaseModel):
@@ -119,6 +337,31 @@ class FindResponseBody(BaseModel):
     results: Results
 
 
+class CalendarRequestBody(BaseModel):
+    venue_id: str
+    num_seats: int
+    start_date: str
+    end_date: str
+
+
+class CalendarInventory(BaseModel):
+    reservation: str
+
+
+class CalendarDay(BaseModel):
+    date: date
+    inventory: CalendarInventory
+
+    @property
+    def sold_out(self) -> bool:
+        return self.inventory.reservation == CALENDAR_SOLD_OUT
+
+
+class CalendarResponseBody(BaseModel):
+    last_calendar_day: date
+    scheduled: List[CalendarDay]
+
+
 class DetailsRequestBody(BaseModel):
     config_id: str
     party_size: int
@@ -0,0 +1,58 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from requests import HTTPError
+
+from resy_bot.errors import NoSlotsError
+from resy_bot.logging import logging
+from resy_bot.models import DetailsResponseBody, Slot
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class DetailsPrefetcher:
+    """
+    requests booking tokens for the top ranked slots in parallel,
+    then books the best slot whose token came back.
+    if that slot was just taken, the next token is already in hand,
+    so losing a slot doesn't cost another find
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.executor = ThreadPoolExecutor(max_workers=k)
+
+    def book_best(
+        self,
+        ranked_slots: List[Slot],
+        get_booking_token: Callable[[Slot], DetailsResponseBody],
+        book: Callable[[DetailsResponseBody], str],
+    ) -> str:
+        futures: List[Future] = [
+            self.executor.submit(get_booking_token, slot)
+            for slot in ranked_slots[: self.k]
+        ]
+        last_error: Optional[HTTPError] = None
+
+        try:
+            for slot, future in zip(ranked_slots, futures):
+                try:
+                    token = future.result()
+                    return book(token)
+                except HTTPError as e:
+                    logger.info("slot at %s unavailable: %s", slot.date.start, e)
+                    last_error = e
+        finally:
+            # unused tokens are dropped, or kept in the manager's book
+            # token cache for the next attempt if it has one
+            for future in futures:
+                future.cancel()
+
+        if last_error is not None:
+            raise last_error
+
+        raise NoSlotsError("No acceptable slots to book")
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
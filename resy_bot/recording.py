@@ -0,0 +1,317 @@
+"""
+record and replay of api traffic.
+
+RecordingHTTPAdapter writes every exchange the session makes, the
+request and response bytes plus when it was sent and how long it took,
+to a gzipped json lines file. ReplayHTTPAdapter serves those exchanges
+back, on the recording's timeline and with its latencies, so a drop can
+be rerun offline against changed selection, parsing or retry logic.
+logins aren't recorded at all, their bodies carry the password and token.
+auth headers, cookies, book tokens and payment methods are redacted, and
+replay matches requests with those redacted too
+"""
+
+import base64
+import gzip
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from pydantic import BaseModel
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from resy_bot.constants import ResyEndpoints
+from resy_bot.tracing import TracingHTTPAdapter
+
+RECORDING_VERSION = 1
+
+# credentials never make it into a recording
+REDACTED_HEADERS = {"authorization", "x-resy-auth-token", "x-resy-universal-auth"}
+REDACTED_RESPONSE_HEADERS = {"set-cookie"}
+REDACTED_FIELDS = {"book_token", "struct_payment_method"}
+UNRECORDED_PATHS = {ResyEndpoints.PASSWORD_AUTH.value}
+REDACTED = "REDACTED"
+
+ExchangeKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+def _encode(body: Optional[bytes]) -> Optional[str]:
+    if body is None:
+        return None
+
+    return base64.b64encode(body).decode()
+
+
+def _decode(body: Optional[str]) -> bytes:
+    if body is None:
+        return b""
+
+    return base64.b64decode(body)
+
+
+def _body_bytes(request: PreparedRequest) -> Optional[bytes]:
+    body = request.body
+    if body is None or isinstance(body, bytes):
+        return body
+
+    return str(body).encode()
+
+
+def _redact_fields(fields: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    return [
+        (name, REDACTED if name in REDACTED_FIELDS else value) for name, value in fields
+    ]
+
+
+def _redact_form(body: Optional[bytes]) -> Optional[bytes]:
+    """
+    a form body with its book token and payment method redacted
+    """
+    if not body:
+        return body
+
+    try:
+        fields = parse_qsl(body.decode(), keep_blank_values=True)
+    except UnicodeDecodeError:
+        return body
+
+    if not any(name in REDACTED_FIELDS for name, _ in fields):
+        return body
+
+    return urlencode(_redact_fields(fields)).encode()
+
+
+def _redact_details(body: bytes) -> bytes:
+    """
+    a details response with its book token redacted
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+
+    book_token = data.get("book_token") if isinstance(data, dict) else None
+    if not isinstance(book_token, dict) or "value" not in book_token:
+        return body
+
+    book_token["value"] = REDACTED
+    return json.dumps(data).encode()
+
+
+class RecordedExchange(BaseModel):
+    at: float
+    elapsed: float
+    method: str
+    url: str
+    request_headers: Dict[str, str]
+    request_body: Optional[str]
+    status: int
+    reason: str
+    response_headers: Dict[str, str]
+    response_body: Optional[str]
+
+    @property
+    def key(self) -> ExchangeKey:
+        return _exchange_key(self.method, self.url, _decode(self.request_body))
+
+
+def _exchange_key(method: str, url: str, body: Optional[bytes]) -> ExchangeKey:
+    """
+    what identifies a request for replay: method, path, and the query
+    and form fields regardless of order
+    """
+    parts = urlsplit(url)
+    fields = parse_qsl(parts.query, keep_blank_values=True)
+    if body:
+        try:
+            fields += parse_qsl(body.decode(), keep_blank_values=True)
+        except UnicodeDecodeError:
+            pass
+
+    return method.upper(), parts.path, tuple(sorted(_redact_fields(fields)))
+
+
+class Recorder:
+    """
+    appends exchanges to a recording as they happen,
+    so a crash mid drop keeps everything up to it
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.started = clock()
+        self._lock = threading.Lock()
+        self._file: IO[str] = gzip.open(path, "wt")
+        self._write(
+            {"version": RECORDING_VERSION, "started_at": datetime.now().isoformat()}
+        )
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(data, separators=(",", ":")) + "\n")
+
+    def record(self, request: PreparedRequest, response: Response, sent: float) -> None:
+        path = urlsplit(request.url or "").path
+        if path in UNRECORDED_PATHS:
+            return
+
+        response_body = response.content
+        if path == ResyEndpoints.DETAILS.value and response_body:
+            response_body = _redact_details(response_body)
+
+        exchange = RecordedExchange(
+            at=sent - self.started,
+            elapsed=self.clock() - sent,
+            method=request.method or "GET",
+            url=request.url or "",
+            request_headers={
+                name: value
+                for name, value in request.headers.items()
+                if name.lower() not in REDACTED_HEADERS
+            },
+            request_body=_encode(_redact_form(_body_bytes(request))),
+            status=response.status_code,
+            reason=response.reason or "",
+            response_headers={
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in REDACTED_RESPONSE_HEADERS
+            },
+            response_body=_encode(response_body),
+        )
+        with self._lock:
+            self._write(exchange.dict())
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def load_recording(path: str) -> List[RecordedExchange]:
+    with gzip.open(path, "rt") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version: {header}")
+
+        return [RecordedExchange(**json.loads(line)) for line in f if line.strip()]
+
+
+class RecordingHTTPAdapter(TracingHTTPAdapter):
+    def __init__(self, recorder: Recorder, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.recorder = recorder
+
+    def send(  # type: ignore[override]
+        self, request: PreparedRequest, stream: bool = False, **kwargs: Any
+    ) -> Response:
+        sent = self.recorder.clock()
+        response = super().send(request, stream=stream, **kwargs)
+        # the body has to be read to be recorded, even when streaming
+        response.content
+        self.recorder.record(request, response, sent)
+        return response
+
+
+class ReplayHTTPAdapter(BaseAdapter):
+    """
+    answers each request with the recorded response to the same request,
+    picking the latest one recorded at or before the same point on the
+    recording's timeline, so finds polled before the drop come back empty
+    and ones after it come back with slots. both timelines start at
+    their first request. requests the recording never saw get a 404.
+    with realtime off, recorded latencies are skipped
+    """
+
+    def __init__(
+        self,
+        exchanges: List[RecordedExchange],
+        realtime: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        super().__init__()
+        self.realtime = realtime
+        self.clock = clock
+        self.sleep = sleep
+        self.unmatched: List[PreparedRequest] = []
+        self._started: Optional[float] = None
+        self._lock = threading.Lock()
+
+        first = min((exchange.at for exchange in exchanges), default=0.0)
+        self._by_key: Dict[ExchangeKey, List[RecordedExchange]] = {}
+        for exchange in sorted(exchanges, key=lambda exchange: exchange.at):
+            exchange = exchange.copy(update={"at": exchange.at - first})
+            self._by_key.setdefault(exchange.key, []).append(exchange)
+
+    def _now(self) -> float:
+        with self._lock:
+            if self._started is None:
+                self._started = self.clock()
+            return self.clock() - self._started
+
+    def match(self, request: PreparedRequest) -> Optional[RecordedExchange]:
+        now = self._now()
+        key = _exchange_key(
+            request.method or "GET", request.url or "", _body_bytes(request)
+        )
+        candidates = self._by_key.get(key)
+        if not candidates:
+            return None
+
+        matched = candidates[0]
+        for candidate in candidates:
+            if candidate.at > now:
+                break
+            matched = candidate
+        return matched
+
+    def send(  # type: ignore[override]
+        self, request: PreparedRequest, stream: bool = False, **kwargs: Any
+    ) -> Response:
+        exchange = self.match(request)
+
+        if exchange is None:
+            self.unmatched.append(request)
+            return self._build_response(
+                request, 404, "Not Found", {}, b'{"message": "Not in recording"}'
+            )
+
+        if self.realtime:
+            self.sleep(exchange.elapsed)
+
+        return self._build_response(
+            request,
+            exchange.status,
+            exchange.reason,
+            exchange.response_headers,
+            _decode(exchange.response_body),
+        )
+
+    @staticmethod
+    def _build_response(
+        request: PreparedRequest,
+        status: int,
+        reason: str,
+        headers: Dict[str, str],
+        body: bytes,
+    ) -> Response:
+        response = Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response.url = request.url or ""
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,223 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from requests import ConnectionError, HTTPError, RequestException, Response, Timeout
+
+from resy_bot.constants import ReservationPhase
+from resy_bot.errors import (
+    AlreadyBookedError,
+    ExhaustedRetriesError,
+    NoSlotsError,
+    SoldOutError,
+)
+from resy_bot.logging import logging
+from resy_bot.models import ReservationRetriesConfig
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# the slot or book token is gone, another attempt needs a fresh find
+SLOT_GONE_STATUSES = {404, 409, 410, 412}
+
+Step = Tuple[ReservationPhase, Callable[[Any], Any]]
+AsyncStep = Tuple[ReservationPhase, Callable[[Any], Awaitable[Any]]]
+
+# what run catches and hands to classify_error, anything else is raised as is
+RETRIED_ERRORS = (
+    RequestException,
+    NoSlotsError,
+    AlreadyBookedError,
+)
+
+
+class ErrorClass(Enum):
+    RETRYABLE = "retryable"
+    RATE_LIMITED = "rate_limited"
+    TERMINAL = "terminal"
+
+
+def _status(error: BaseException) -> Optional[int]:
+    if isinstance(error, HTTPError) and error.response is not None:
+        return error.response.status_code
+
+    return None
+
+
+def classify_error(error: BaseException) -> ErrorClass:
+    if isinstance(error, NoSlotsError):
+        return ErrorClass.RETRYABLE
+
+    if isinstance(error, (AlreadyBookedError, SoldOutError)):
+        return ErrorClass.TERMINAL
+
+    if isinstance(error, (ConnectionError, Timeout)):
+        return ErrorClass.RETRYABLE
+
+    status = _status(error)
+    if status is None:
+        # an HTTPError we raised without a response, or some other
+        # requests failure we can't tell anything about
+        return ErrorClass.RETRYABLE
+
+    if status == 429:
+        return ErrorClass.RATE_LIMITED
+
+    if status >= 500 or status == 408 or status in SLOT_GONE_STATUSES:
+        return ErrorClass.RETRYABLE
+
+    return ErrorClass.TERMINAL
+
+
+def retry_after_seconds(response: Optional[Response]) -> Optional[float]:
+    """
+    the Retry-After header, either delay seconds or an http date
+    """
+    if response is None:
+        return None
+
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+
+class RetryEngine:
+    """
+    runs the phases of a reservation until one books or the deadline passes.
+    each step gets the previous step's result. a retryable failure retries
+    the same step with the same input after that phase's backoff, so a
+    failed book doesn't cost another find and details. rate limited
+    failures wait at least as long as Retry-After asks. the reservation
+    starts over from the first step once a later phase runs out of
+    attempts or the slot is gone, and terminal failures are raised as is.
+    run_async does the same for async steps, sleeping on the event loop
+    """
+
+    def __init__(
+        self,
+        retry_config: ReservationRetriesConfig,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+        async_sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.retry_config = retry_config
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.async_sleep = async_sleep
+
+    def run(self, steps: Sequence[Step]) -> Any:
+        deadline = self.clock() + self.retry_config.retry_duration
+        inputs: List[Any] = [None] * len(steps)
+        attempts = [0] * len(steps)
+        index = 0
+
+        while True:
+            phase, step = steps[index]
+            try:
+                result = step(inputs[index])
+            except RETRIED_ERRORS as e:
+                delay, restart = self._on_failure(e, phase, index, attempts, deadline)
+                self.sleep(delay)
+
+                if restart:
+                    index = 0
+                    attempts = [0] * len(steps)
+                continue
+
+            index += 1
+            if index == len(steps):
+                return result
+
+            inputs[index] = result
+            attempts[index] = 0
+
+    async def run_async(self, steps: Sequence[AsyncStep]) -> Any:
+        deadline = self.clock() + self.retry_config.retry_duration
+        inputs: List[Any] = [None] * len(steps)
+        attempts = [0] * len(steps)
+        index = 0
+
+        while True:
+            phase, step = steps[index]
+            try:
+                result = await step(inputs[index])
+            except RETRIED_ERRORS as e:
+                delay, restart = self._on_failure(e, phase, index, attempts, deadline)
+                await self.async_sleep(delay)
+
+                if restart:
+                    index = 0
+                    attempts = [0] * len(steps)
+                continue
+
+            index += 1
+            if index == len(steps):
+                return result
+
+            inputs[index] = result
+            attempts[index] = 0
+
+    def _on_failure(
+        self,
+        error: BaseException,
+        phase: ReservationPhase,
+        index: int,
+        attempts: List[int],
+        deadline: float,
+    ) -> Tuple[float, bool]:
+        """
+        count the failed attempt and work out how long to wait and whether
+        to start over, raising if it's terminal or the deadline would pass
+        """
+        error_class = classify_error(error)
+        if error_class == ErrorClass.TERMINAL:
+            raise error
+
+        attempts[index] += 1
+        backoff = self.retry_config.backoff(phase)
+        delay = backoff.delay(attempts[index], self.rng.random())
+
+        if error_class == ErrorClass.RATE_LIMITED:
+            retry_after = retry_after_seconds(getattr(error, "response", None))
+            delay = max(delay, retry_after or backoff.max_seconds)
+
+        if self.clock() + delay >= deadline:
+            raise ExhaustedRetriesError(
+                f"Retry deadline of {self.retry_config.retry_duration}s "
+                f"passed, last failed in {phase.value}: {error}"
+            ) from error
+
+        restart = index > 0 and (
+            _status(error) in SLOT_GONE_STATUSES
+            or (
+                backoff.max_attempts is not None
+                and attempts[index] >= backoff.max_attempts
+            )
+        )
+        logger.info(
+            "%s failed (%s), retrying %s in %.0fms: %s",
+            phase.value,
+            error_class.value,
+            "from the start" if restart else phase.value,
+            delay * 1000,
+            error,
+        )
+        return delay, restart
@@ -0,0 +1,182 @@
+import time
+from collections import deque
+from datetime import datetime, time as dt_time, timedelta
+from typing import Callable, Deque, Optional
+from zoneinfo import ZoneInfo
+
+from pydantic import BaseModel
+
+from resy_bot.constants import (
+    SCHEDULER_COARSE_MARGIN_SECONDS,
+    SCHEDULER_FINE_SLEEP_SECONDS,
+    SCHEDULER_OVERSHOOT_DECAY,
+    SCHEDULER_REPORT_HISTORY,
+    SCHEDULER_SPIN_MARGIN_SECONDS,
+    SCHEDULER_TICK_SECONDS,
+)
+from resy_bot.logging import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class FireReport(BaseModel):
+    planned: float
+    fired: float
+
+    @property
+    def lateness(self) -> float:
+        """
+        seconds between the planned and actual fire time,
+        positive when we fired late
+        """
+        return self.fired - self.planned
+
+
+def drop_time_today(hour: int, minute: int, timezone: Optional[str] = None) -> datetime:
+    """
+    today's hour:minute as a local datetime. with a timezone, hour:minute
+    and today are taken in that zone instead
+    """
+    if timezone is None:
+        now = datetime.now()
+        return datetime(
+            year=now.year,
+            month=now.month,
+            day=now.day,
+            hour=hour,
+            minute=minute,
+        )
+
+    zone = ZoneInfo(timezone)
+    today = datetime.now(zone).date()
+    return _local(datetime.combine(today, dt_time(hour, minute), tzinfo=zone))
+
+
+def next_drop_time(
+    hour: int,
+    minute: int,
+    timezone: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> datetime:
+    """
+    the next hour:minute, in timezone if given, that hasn't passed yet,
+    as a local datetime
+    """
+    zone = ZoneInfo(timezone) if timezone is not None else None
+    now = now or datetime.now().astimezone()
+    local_now = now.astimezone(zone)
+
+    day = local_now.date()
+    drop = datetime.combine(day, dt_time(hour, minute), tzinfo=local_now.tzinfo)
+    if drop < local_now:
+        drop = datetime.combine(
+            day + timedelta(days=1), dt_time(hour, minute), tzinfo=local_now.tzinfo
+        )
+
+    return _local(drop)
+
+
+def _local(aware: datetime) -> datetime:
+    return aware.astimezone().replace(tzinfo=None)
+
+
+def wall_to_monotonic(
+    target: datetime, clock: Callable[[], float] = time.monotonic
+) -> float:
+    """
+    translate a local wall clock datetime into the monotonic clock's timeline,
+    so later wall clock adjustments don't move the fire time
+    """
+    return clock() + (target - datetime.now()).total_seconds()
+
+
+class DropScheduler:
+    """
+    waits for a monotonic deadline without pinning a core:
+    sleep coarsely until close, sleep finely until very close,
+    then spin for the last few hundred microseconds.
+    the fine phase tracks how far sleeps overshoot on this box,
+    and widens the spin window to match. the latest report_history
+    fire reports are kept on reports
+    """
+
+    def __init__(
+        self,
+        coarse_margin: float = SCHEDULER_COARSE_MARGIN_SECONDS,
+        fine_sleep: float = SCHEDULER_FINE_SLEEP_SECONDS,
+        spin_margin: float = SCHEDULER_SPIN_MARGIN_SECONDS,
+        tick_seconds: float = SCHEDULER_TICK_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        report_history: int = SCHEDULER_REPORT_HISTORY,
+    ):
+        self.coarse_margin = coarse_margin
+        self.fine_sleep = fine_sleep
+        self.spin_margin = spin_margin
+        self.tick_seconds = tick_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self.sleep_overshoot = 0.0
+        self.reports: Deque[FireReport] = deque(maxlen=report_history)
+
+    def calibrate(self, samples: int = 20) -> float:
+        """
+        measure how late fine sleeps wake up on this box ahead of time,
+        so the first wait doesn't have to learn it the hard way
+        """
+        for _ in range(samples):
+            before = self.clock()
+            self.sleep(self.fine_sleep)
+            overshoot = self.clock() - before - self.fine_sleep
+            self.sleep_overshoot = max(overshoot, self.sleep_overshoot)
+
+        return self.sleep_overshoot
+
+    def wait_until(
+        self, target: float, on_tick: Optional[Callable[[float], None]] = None
+    ) -> FireReport:
+        """
+        block until the monotonic clock reaches target.
+        on_tick is called with the remaining seconds roughly every tick_seconds
+        during the coarse phase, and can be used for logging or keep-alives
+        """
+        clock = self.clock
+        sleep = self.sleep
+
+        # coarse phase: long sleeps, waking up periodically for on_tick
+        remaining = target - clock()
+        while remaining > self.coarse_margin:
+            sleep(min(remaining - self.coarse_margin, self.tick_seconds))
+            remaining = target - clock()
+            if on_tick is not None and remaining > self.coarse_margin:
+                on_tick(remaining)
+                remaining = target - clock()
+
+        # fine phase: short sleeps, stopping early enough that a late wakeup
+        # still lands before the target. the overshoot estimate decays slowly
+        # across calls so one quiet stretch doesn't hide a noisy timer
+        self.sleep_overshoot *= SCHEDULER_OVERSHOOT_DECAY
+        while remaining > self.spin_margin + self.sleep_overshoot:
+            requested = min(
+                remaining - self.spin_margin - self.sleep_overshoot, self.fine_sleep
+            )
+            before = clock()
+            sleep(requested)
+            after = clock()
+            self.sleep_overshoot = max(after - before - requested, self.sleep_overshoot)
+            remaining = target - after
+
+        # spin phase: only the last few hundred microseconds
+        fired = clock()
+        while fired < target:
+            fired = clock()
+
+        report = FireReport(planned=target, fired=fired)
+        self.reports.append(report)
+        return report
+
+    def wait_until_datetime(
+        self, target: datetime, on_tick: Optional[Callable[[float], None]] = None
+    ) -> FireReport:
+        return self.wait_until(wall_to_monotonic(target, self.clock), on_tick)
@@ -1,16 +1,162 @@
-from datetime import datetime, timedelta
-from typing import List
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
 from abc import ABC, abstractmethod
 
+from pydantic import BaseModel
+
+from resy_bot.constants import SELECTION_PLAN_CACHE_SIZE
 from resy_bot.errors import NoSlotsError
-from resy_bot.models import Slot, ReservationRequest
+from resy_bot.models import DetailsResponseBody, Slot, ReservationRequest
+from resy_bot.slot_index import SlotIndex
+
+
+class SelectionPlan(BaseModel):
+    """
+    everything about a request that selection needs, worked out once.
+    the target date is fixed when the plan is compiled, so a
+    days_in_advance request can't change day if the drop runs past midnight
+    """
+
+    ideal_datetime: datetime
+    min_time: datetime
+    max_time: datetime
+    preferred_type: Optional[str]
+    prefer_early: bool
+
+    @classmethod
+    def compile(
+        cls, request: ReservationRequest, target_date: Optional[date] = None
+    ) -> "SelectionPlan":
+        target_date = target_date or request.target_date
+        window_timedelta = timedelta(hours=request.window_hours)
+        ideal_datetime = datetime(
+            target_date.year,
+            target_date.month,
+            target_date.day,
+            request.ideal_hour,
+            request.ideal_minute,
+        )
+        return cls(
+            ideal_datetime=ideal_datetime,
+            min_time=ideal_datetime - window_timedelta,
+            max_time=ideal_datetime + window_timedelta,
+            preferred_type=request.preferred_type,
+            prefer_early=request.prefer_early,
+        )
+
+    def accepts(self, slot: Slot) -> bool:
+        """
+        whether the slot starts in the window and is of the preferred type
+        """
+        return self.min_time <= slot.date.start <= self.max_time and (
+            self.preferred_type is None or slot.config.type == self.preferred_type
+        )
+
+    def rank_key(self, slot: Slot) -> Tuple[timedelta, bool]:
+        """
+        closest to the ideal time first, ties going to the side
+        prefer_early picks
+        """
+        start = slot.date.start
+        ideal = self.ideal_datetime
+        off_preferred_side = start > ideal if self.prefer_early else start < ideal
+        return abs(start - ideal), off_preferred_side
 
 
 class AbstractSelector(ABC):
+    """
+    plans are compiled once per request and reused across retries,
+    keeping only the plan_cache_size most recently used
+    """
+
+    def __init__(self, plan_cache_size: int = SELECTION_PLAN_CACHE_SIZE) -> None:
+        self.plan_cache_size = plan_cache_size
+        self._plans: "OrderedDict[int, Tuple[ReservationRequest, SelectionPlan]]" = (
+            OrderedDict()
+        )
+        self._plans_lock = threading.Lock()
+
     @abstractmethod
     def select(self, slots: List[Slot], request: ReservationRequest) -> Slot:
         pass
 
+    def plan(self, request: ReservationRequest) -> SelectionPlan:
+        key = id(request)
+        with self._plans_lock:
+            cached = self._plans.get(key)
+            if cached is not None and cached[0] is request:
+                self._plans.move_to_end(key)
+                return cached[1]
+
+        plan = SelectionPlan.compile(request)
+        with self._plans_lock:
+            self._plans[key] = (request, plan)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.plan_cache_size:
+                self._plans.popitem(last=False)
+        return plan
+
+    def ranked(self, slots: List[Slot], request: ReservationRequest) -> Iterator[Slot]:
+        """
+        every acceptable slot, best first by SelectionPlan.rank_key,
+        ranked once it is first asked for
+        """
+        plan = self.plan(request)
+        yield from sorted(filter(plan.accepts, slots), key=plan.rank_key)
+
+    def rank(
+        self, slots: List[Slot], request: ReservationRequest, k: int
+    ) -> List[Slot]:
+        """
+        up to k acceptable slots, best first, in the order ranked gives
+        """
+        return list(islice(self.ranked(slots, request), k))
+
+    def prepare(self, request: ReservationRequest) -> None:
+        """
+        do whatever select can do for request before seeing any slots
+        """
+        self.plan(request)
+
+
+class SlotChain:
+    """
+    the selected slot, and the book token for it once there is one.
+    when the slot is taken, advance moves on to the next best slot from
+    the same find, ranked only then, so falling back needs no new find
+    """
+
+    def __init__(
+        self,
+        selector: AbstractSelector,
+        slots: List[Slot],
+        request: ReservationRequest,
+        selected: Slot,
+    ):
+        self.selector = selector
+        self.slots = slots
+        self.request = request
+        self.current = selected
+        self.details: Optional[DetailsResponseBody] = None
+        self._tried = [selected]
+        self._rest: Optional[Iterator[Slot]] = None
+
+    def advance(self) -> bool:
+        if self._rest is None:
+            self._rest = self.selector.ranked(self.slots, self.request)
+
+        for slot in self._rest:
+            if not any(slot is tried for tried in self._tried):
+                self.current = slot
+                self.details = None
+                self._tried.append(slot)
+                return True
+
+        return False
+
 
 class SimpleSelector(AbstractSelector):
     def select(self, slots: List[Slot], request: ReservationRequest) -> Slot:
@@ -18,16 +164,12 @@ class SimpleSelector(AbstractSelector):
         simple selection algo that assumes a sorted list of slots
         if preferred slot is provided, that is the only selectable option
         """
-        window_timedelta = timedelta(hours=request.window_hours)
-        ideal_datetime = datetime(
-            request.target_date.year,
-            request.target_date.month,
-            request.target_date.day,
-            request.ideal_hour,
-            request.ideal_minute,
-        )
-        min_time = ideal_datetime - window_timedelta
-        max_time = ideal_datetime + window_timedelta
+        return self.select_planned(slots, self.plan(request))
+
+    def select_planned(self, slots: List[Slot], plan: SelectionPlan) -> Slot:
+        ideal_datetime = plan.ideal_datetime
+        min_time = plan.min_time
+        max_time = plan.max_time
 
         last_diff = None
         last_slot = None
@@ -35,8 +177,7 @@ class SimpleSelector(AbstractSelector):
         for slot in slots:
             diff = slot.date.start - ideal_datetime
             matches_preferred_type = (
-                request.preferred_type is None
-                or slot.config.type == request.preferred_type
+                plan.preferred_type is None or slot.config.type == plan.preferred_type
             )
 
             # once we're after the target time, the slots will only get worse
@@ -45,9 +186,9 @@ class SimpleSelector(AbstractSelector):
                 if matches_preferred_type:
                     if not last_diff or diff < last_diff:
                         return slot
-                    elif last_diff == abs(diff) and request.prefer_early:
+                    elif last_diff == abs(diff) and plan.prefer_early:
                         return last_slot
-                    elif last_diff == abs(diff) and not request.prefer_early:
+                    elif last_diff == abs(diff) and not plan.prefer_early:
                         return slot
 
             if slot.date.start >= min_time:
@@ -56,3 +197,99 @@ class SimpleSelector(AbstractSelector):
                     last_slot = slot
 
         raise NoSlotsError("No acceptable slots found")
+
+
+class IndexedSelector(SimpleSelector):
+    """
+    returns exactly what SimpleSelector returns for slots sorted by start
+    time (as resy sends them). indexing a find response costs more than
+    scanning it once, so a response is scanned like SimpleSelector the
+    first time and only indexed, then bisected around the ideal time,
+    once it's used again, as when ranking it for fallbacks or prefetch
+    """
+
+    def __init__(self, plan_cache_size: int = SELECTION_PLAN_CACHE_SIZE) -> None:
+        super().__init__(plan_cache_size)
+        self._last_slots: Optional[List[Slot]] = None
+        self._last_index: Optional[Tuple[List[Slot], SlotIndex]] = None
+
+    def _reused(self, slots: List[Slot]) -> bool:
+        """
+        whether slots is the response used last time, remembering it
+        """
+        reused = self._last_slots is slots
+        self._last_slots = slots
+        return reused
+
+    def index(self, slots: List[Slot]) -> SlotIndex:
+        """
+        the index of slots, built once per find response
+        """
+        cached = self._last_index
+        if cached is not None and cached[0] is slots:
+            return cached[1]
+
+        index = SlotIndex(slots)
+        self._last_index = (slots, index)
+        return index
+
+    def select(self, slots: List[Slot], request: ReservationRequest) -> Slot:
+        plan = self.plan(request)
+        if not self._reused(slots):
+            return self.select_planned(slots, plan)
+
+        return self.select_indexed(self.index(slots), plan)
+
+    def ranked(self, slots: List[Slot], request: ReservationRequest) -> Iterator[Slot]:
+        """
+        like AbstractSelector.ranked, ranking only the slots the
+        index puts in the window once the response is indexed
+        """
+        if not self._reused(slots):
+            yield from super().ranked(slots, request)
+            return
+
+        plan = self.plan(request)
+        bucket = self.index(slots).bucket(plan.preferred_type)
+        if bucket is None:
+            return
+
+        lo, hi = bucket.span(plan.min_time, plan.max_time)
+        yield from sorted(bucket.slots[lo:hi], key=plan.rank_key)
+
+    def select_indexed(self, index: SlotIndex, plan: SelectionPlan) -> Slot:
+        bucket = index.bucket(plan.preferred_type)
+        if bucket is None:
+            raise NoSlotsError("No acceptable slots found")
+
+        ideal = plan.ideal_datetime
+        lo, hi = bucket.span(plan.min_time, plan.max_time)
+        first_after = max(lo, min(bucket.first_at_or_after(ideal), hi))
+
+        # like SimpleSelector, only a slot at or after the ideal time
+        # can end the search
+        if first_after >= hi:
+            raise NoSlotsError("No acceptable slots found")
+
+        after = bucket.slots[first_after]
+        after_diff = bucket.starts[first_after] - ideal
+
+        if first_after == lo:
+            return after
+
+        before = bucket.slots[first_after - 1]
+        before_diff = ideal - bucket.starts[first_after - 1]
+
+        if after_diff < before_diff:
+            return after
+        if after_diff == before_diff:
+            return before if plan.prefer_early else after
+
+        # SimpleSelector moves on from a first later slot that's further
+        # off than the closest earlier one, and only stops again at two
+        # later slots starting at the same time
+        tie = bucket.first_tie_after(first_after)
+        if tie < hi:
+            return bucket.slots[tie - 1] if plan.prefer_early else bucket.slots[tie]
+
+        raise NoSlotsError("No acceptable slots found")
@@ -0,0 +1,69 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from resy_bot.models import Slot
+
+
+class SlotBucket:
+    """
+    slots sorted by start time (stable, so ties keep the order resy sent),
+    with the start times alongside for bisecting.
+    next_tie[k] is the first position >= k whose slot starts at the same
+    time as the slot before it, or len(slots) if there is none
+    """
+
+    __slots__ = ("slots", "starts", "next_tie")
+
+    def __init__(self, slots: List[Slot]):
+        self.slots = slots
+        self.starts = [slot.date.start for slot in slots]
+
+        n_slots = len(slots)
+        self.next_tie = [n_slots] * (n_slots + 1)
+        for k in range(n_slots - 1, 0, -1):
+            if self.starts[k] == self.starts[k - 1]:
+                self.next_tie[k] = k
+            else:
+                self.next_tie[k] = self.next_tie[k + 1]
+
+    def span(self, earliest: datetime, latest: datetime) -> Tuple[int, int]:
+        """
+        positions [lo, hi) of the slots starting in [earliest, latest]
+        """
+        lo = bisect_left(self.starts, earliest)
+        hi = bisect_right(self.starts, latest, lo)
+        return lo, hi
+
+    def first_at_or_after(self, start: datetime) -> int:
+        return bisect_left(self.starts, start)
+
+    def first_tie_after(self, position: int) -> int:
+        return self.next_tie[min(position + 1, len(self.slots))]
+
+
+class SlotIndex:
+    """
+    slots from one find response, sorted by start time
+    and bucketed by config type
+    """
+
+    def __init__(self, slots: List[Slot]):
+        ordered = sorted(slots, key=lambda slot: slot.date.start)
+        self.all = SlotBucket(ordered)
+
+        by_type: Dict[str, List[Slot]] = {}
+        for slot in ordered:
+            by_type.setdefault(slot.config.type, []).append(slot)
+        self.by_type = {
+            config_type: SlotBucket(typed) for config_type, typed in by_type.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.all.slots)
+
+    def bucket(self, config_type: Optional[str]) -> Optional[SlotBucket]:
+        if config_type is None:
+            return self.all
+
+        return self.by_type.get(config_type)
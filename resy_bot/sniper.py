@@ -0,0 +1,309 @@
+"""
+watching for cancellations.
+
+a watch polls /4/find for many targets, each a venue, day and party
+size with a window around an ideal time, round robin under one request
+budget: polls go out 1 / requests_per_second apart however many targets
+there are, so more targets means each is polled less often, not more
+traffic, and a 429 pauses every poll. a target is polled at most once at
+a time and at most max_in_flight polls are out at once, so nothing
+queues up behind a slow resy. a watch runs for days, longer than a
+token lasts, so every preflight_interval it makes sure the token lasts
+until the next check, and logs in again straight away if resy turns it
+down.
+
+each target only remembers the slots in its window as of its last poll
+and a fingerprint of the last find response (resy_bot.find_changes), so
+memory grows with the number of targets and not with how long the watch
+runs. a response that hasn't changed since the last poll isn't decoded
+at all. a slot in the window that wasn't there last poll is booked right
+away, closest to the ideal time first, and a target is dropped from the
+watch once booked
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, List, Optional, Tuple
+
+from requests import HTTPError, RequestException
+
+from resy_bot.constants import (
+    WATCH_MAX_IN_FLIGHT,
+    WATCH_PREFLIGHT_INTERVAL_SECONDS,
+    WATCH_RATE_LIMITED_PAUSE_SECONDS,
+    WATCH_REQUESTS_PER_SECOND,
+)
+from resy_bot.find_changes import FindChanges, SlotDiff
+from resy_bot.logging import logging
+from resy_bot.manager import ResyManager
+from resy_bot.model_builders import (
+    build_book_request_body,
+    build_find_request_body,
+    build_get_slot_details_body,
+)
+from resy_bot.models import ReservationRequest, Slot, WatchConfig
+from resy_bot.retry import retry_after_seconds
+from resy_bot.selectors import SelectionPlan
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+Booking = Tuple[ReservationRequest, str]
+TargetDiffListener = Callable[[ReservationRequest, SlotDiff], None]
+
+# resy turned the token down
+AUTH_FAILED_STATUSES = {401, 419}
+
+
+class WatchTarget:
+    """
+    a target's request, its find request and plan built once,
+    and the slots in its window as of the last poll
+    """
+
+    __slots__ = ("request", "body", "plan", "changes")
+
+    def __init__(self, request: ReservationRequest):
+        self.request = request
+        self.body = build_find_request_body(request)
+        self.plan = SelectionPlan.compile(request)
+        self.changes = FindChanges(self.plan.accepts)
+
+    def ranked(self, slots: List[Slot]) -> List[Slot]:
+        return sorted(slots, key=self.plan.rank_key)
+
+
+class CancellationSniper:
+    @classmethod
+    def build(cls, manager: ResyManager, config: WatchConfig) -> "CancellationSniper":
+        return cls(
+            manager,
+            config.targets,
+            config.requests_per_second,
+            config.max_in_flight,
+            config.max_bookings,
+        )
+
+    def __init__(
+        self,
+        manager: ResyManager,
+        targets: List[ReservationRequest],
+        requests_per_second: float = WATCH_REQUESTS_PER_SECOND,
+        max_in_flight: int = WATCH_MAX_IN_FLIGHT,
+        max_bookings: int = 1,
+        preflight_interval: float = WATCH_PREFLIGHT_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.manager = manager
+        self.preflight_interval = preflight_interval
+        self.interval = 1 / requests_per_second
+        self.max_in_flight = max_in_flight
+        self.max_bookings = max_bookings
+        self.clock = clock
+        self.polls = 0
+        self.bookings: List[Booking] = []
+        self.targets = [WatchTarget(request) for request in targets]
+        self._ready: "queue.SimpleQueue[WatchTarget]" = queue.SimpleQueue()
+        for target in self.targets:
+            self._ready.put(target)
+        self._watching = len(targets)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._paused_until = 0.0
+        # the watch is started with a token that's just been preflighted
+        self._next_preflight = clock() + preflight_interval
+        self._auth_failed = False
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._booking_lock = threading.Lock()
+
+    @property
+    def watching(self) -> int:
+        return self._watching
+
+    def subscribe(self, listener: TargetDiffListener) -> None:
+        """
+        have listener called with a target's request and the slots added
+        to and removed from its window whenever they change
+        """
+        for target in self.targets:
+            target.changes.subscribe(partial(listener, target.request))
+
+    def run(self, duration: Optional[float] = None) -> List[Booking]:
+        """
+        poll until max_bookings are booked, every target is booked,
+        duration seconds pass or stop is called
+        """
+        deadline = None if duration is None else self.clock() + duration
+        next_poll = self.clock()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            while not self._stopped.is_set() and self._watching > 0:
+                now = self.clock()
+                if deadline is not None and now >= deadline:
+                    break
+
+                if self._auth_failed or now >= self._next_preflight:
+                    self._preflight()
+                    continue
+
+                wait = max(next_poll, self._paused_until) - now
+                if wait > 0:
+                    if deadline is not None:
+                        wait = min(wait, deadline - now)
+                    self._stopped.wait(wait)
+                    continue
+
+                if not self._in_flight.acquire(timeout=self.interval):
+                    continue
+                try:
+                    target = self._ready.get(timeout=self.interval)
+                except queue.Empty:
+                    # every target still watched is being polled or booked
+                    self._in_flight.release()
+                    continue
+
+                next_poll = now + self.interval
+                executor.submit(self._poll, target)
+
+            self._stopped.set()
+
+        return self.bookings
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _preflight(self) -> None:
+        """
+        make sure the token lasts until the next check, logging in
+        again if resy turned it down since the last one
+        """
+        force_login = self._auth_failed
+        self._auth_failed = False
+        self._next_preflight = self.clock() + self.preflight_interval
+        try:
+            self.manager.preflight(
+                datetime.now() + timedelta(seconds=self.preflight_interval),
+                force_login=force_login,
+            )
+        except Exception as e:
+            logger.warning("checking credentials failed: %s", e)
+
+    def _check_auth(self, error: HTTPError) -> bool:
+        """
+        whether resy turned the token down, if so it's
+        checked again before the next poll
+        """
+        status = getattr(error.response, "status_code", None)
+        if status not in AUTH_FAILED_STATUSES:
+            return False
+
+        logger.warning("resy turned the token down: %s", error)
+        self._auth_failed = True
+        return True
+
+    def _poll(self, target: WatchTarget) -> None:
+        try:
+            booked = self._find_and_book(target)
+        except Exception as e:
+            # a watch runs for days, one bad response can't end a target's
+            logger.warning("watching venue %s failed: %s", target.request.venue_id, e)
+            booked = False
+
+        if booked:
+            with self._lock:
+                self._watching -= 1
+            return
+
+        self._ready.put(target)
+
+    def _find_and_book(self, target: WatchTarget) -> bool:
+        try:
+            diff = self.manager.api_access.find_booking_slot_changes(
+                target.body, target.changes
+            )
+        except HTTPError as e:
+            self._on_find_error(target, e)
+            return False
+        except RequestException as e:
+            logger.info("find failed for venue %s: %s", target.request.venue_id, e)
+            return False
+        finally:
+            with self._lock:
+                self.polls += 1
+            self._in_flight.release()
+
+        if diff is None or not diff.added:
+            return False
+
+        return self._book(target, target.ranked(diff.added))
+
+    def _on_find_error(self, target: WatchTarget, error: HTTPError) -> None:
+        if self._check_auth(error):
+            return
+
+        status = getattr(error.response, "status_code", None)
+        if status != 429:
+            logger.info("find failed for venue %s: %s", target.request.venue_id, error)
+            return
+
+        pause = retry_after_seconds(error.response)
+        if pause is None:
+            pause = WATCH_RATE_LIMITED_PAUSE_SECONDS
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + pause)
+        logger.info("rate limited, pausing the watch for %.0fs", pause)
+
+    def _book(self, target: WatchTarget, slots: List[Slot]) -> bool:
+        """
+        book the first of slots that can be, one booking at a time
+        so the watch never books more than max_bookings
+        """
+        request = target.request
+        api_access = self.manager.api_access
+
+        with self._booking_lock:
+            for slot in slots:
+                if self._stopped.is_set():
+                    return False
+
+                logger.info(
+                    "slot opened at venue %s for %s", request.venue_id, slot.date.start
+                )
+                try:
+                    details = api_access.get_booking_token(
+                        build_get_slot_details_body(request, slot)
+                    )
+                    book = partial(
+                        api_access.book_slot,
+                        build_book_request_body(details, self.manager.config),
+                    )
+                    if self.manager.booking_guard is not None:
+                        resy_token = self.manager.booking_guard.book(
+                            self.manager.config.email, book
+                        )
+                    else:
+                        resy_token = book()
+                except HTTPError as e:
+                    if self._check_auth(e):
+                        # try these slots again once logged in
+                        target.changes.forget()
+                        return False
+                    logger.info(
+                        "booking failed for venue %s at %s: %s",
+                        request.venue_id,
+                        slot.date.start,
+                        e,
+                    )
+                    continue
+
+                logger.info("booked venue %s at %s", request.venue_id, slot.date.start)
+                self.bookings.append((request, resy_token))
+                if len(self.bookings) >= self.max_bookings:
+                    self._stopped.set()
+                return True
+
+        return False
@@ -0,0 +1,367 @@
+import json
+import random
+import socket
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from resy_bot.constants import ResyEndpoints
+from resy_bot.models import Slot, SlotConfig, SlotDate
+
+SLOT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+STAND_IN_SLOT_TYPES = ("Dining Room", "Bar", "Patio")
+
+
+def generate_slots(
+    day: date,
+    n_slots: int,
+    venue_id: str = "12345",
+    first_hour: int = 17,
+    spacing_minutes: int = 15,
+    slot_types: Sequence[str] = STAND_IN_SLOT_TYPES,
+) -> List[Slot]:
+    """
+    n_slots slots on day, sorted by start, cycling through slot_types
+    at each start time, each with a unique config token
+    """
+    first_start = datetime(day.year, day.month, day.day, first_hour)
+    slots = []
+    for i in range(n_slots):
+        start = first_start + timedelta(
+            minutes=spacing_minutes * (i // len(slot_types))
+        )
+        token = (
+            f"rgs://resy/{venue_id}/{i}/2/{day.isoformat()}/{day.isoformat()}/"
+            f"{start.strftime('%H:%M:%S')}/2/{slot_types[i % len(slot_types)]}"
+        )
+        slots.append(
+            Slot(
+                config=SlotConfig(
+                    id=str(i), type=slot_types[i % len(slot_types)], token=token
+                ),
+                date=SlotDate(start=start, end=start + timedelta(minutes=90)),
+            )
+        )
+    return slots
+
+
+def render_slot(slot: Slot) -> Dict:
+    """
+    a slot as resy sends it, including fields resy-bot doesn't read
+    """
+    return {
+        "availability": {"id": 3},
+        "config": {
+            "id": slot.config.id,
+            "type": slot.config.type,
+            "token": slot.config.token,
+        },
+        "date": {
+            "start": slot.date.start.strftime(SLOT_TIME_FORMAT),
+            "end": slot.date.end.strftime(SLOT_TIME_FORMAT),
+        },
+        "payment": {
+            "is_paid": False,
+            "cancellation_fee": None,
+            "deposit_fee": None,
+            "service_charge": None,
+            "venue_share": None,
+            "payment_structure": None,
+            "secs_cancel_cut_off": None,
+            "time_cancel_cut_off": None,
+        },
+        "quantity": 1,
+        "size": {"max": 4, "min": 2},
+        "shift": {"id": 1, "service": {"type": slot.config.type}},
+        "template": None,
+    }
+
+
+def render_find_response(venue_id: str, slots: List[Slot]) -> Dict:
+    return {
+        "query": {"day": None, "party_size": None},
+        "bookmark": None,
+        "results": {
+            "venues": [
+                {
+                    "venue": {"id": {"resy": venue_id}, "name": "Stand-in"},
+                    "templates": {},
+                    "notifies": [],
+                    "slots": [render_slot(slot) for slot in slots],
+                }
+            ]
+        },
+    }
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    """
+    routes resy's endpoints to the stand-in, stamping the Date header
+    with the stand-in's skewed clock. anything else gets an empty json body
+    """
+
+    server: "StandInHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def date_time_string(self, timestamp: Optional[float] = None) -> str:
+        if timestamp is None:
+            timestamp = self.server.stand_in.server_time()
+        return formatdate(timestamp, usegmt=True)
+
+    def setup(self) -> None:
+        super().setup()
+        # headers and body go out in separate writes, without this
+        # nagle and delayed acks hold the body back ~40ms
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.stand_in.record_connection()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _respond(self, status: int, body: bytes) -> None:
+        if self.server.stand_in.latency:
+            time.sleep(self.server.stand_in.latency)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _handle(self, fields: Dict[str, str]) -> None:
+        path = urlsplit(self.path).path
+        status, payload = self.server.stand_in.handle(self.command, path, fields)
+        self._respond(status, json.dumps(payload).encode())
+
+    def do_HEAD(self) -> None:
+        self._respond(200, b"{}")
+
+    def do_GET(self) -> None:
+        query = parse_qs(urlsplit(self.path).query)
+        self._handle({key: values[-1] for key, values in query.items()})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode())
+        self._handle({key: values[-1] for key, values in form.items()})
+
+
+class StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stand_in: "StandInResyServer"
+
+
+class StandInResyServer:
+    """
+    local stand-in for api.resy.com, for tests and benchmarks.
+    serves /4/find, /3/details, /3/book, /3/auth/password and
+    /4/venue/calendar for one venue.
+
+    clock_skew shifts the server's clock relative to ours,
+    latency is added before every response,
+    error_rate is the chance a find, details or book call gets a 500,
+    contention is the chance each slot a find returned is taken by
+    someone else right after, so its details or book fail,
+    connections_opened counts the tcp connections clients have made.
+    the calendar reports the days in `calendar`, plus the dropped slots'
+    day once the drop has happened, sold out once they're all gone
+    """
+
+    host = "127.0.0.1"
+
+    def __init__(
+        self,
+        clock_skew: float = 0.0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        contention: float = 0.0,
+        payment_method_id: int = 1,
+        seed: Optional[int] = None,
+    ):
+        self.clock_skew = clock_skew
+        self.latency = latency
+        self.error_rate = error_rate
+        self.contention = contention
+        self.payment_method_id = payment_method_id
+        self.connections_opened = 0
+        self.requests: Dict[str, int] = {}
+        self.slots: List[Slot] = []
+        self.drop_at: Optional[float] = None
+        self.drop_day: Optional[date] = None
+        self.calendar: Dict[date, str] = {}
+        self.booked: List[Slot] = []
+        self.taken: List[Slot] = []
+        self._book_tokens: Dict[str, Slot] = {}
+        self._rng = random.Random(seed)
+        self._lock = Lock()
+        self._server: Optional[StandInHTTPServer] = None
+        self._thread: Optional[Thread] = None
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def server_time(self) -> float:
+        return time.time() + self.clock_skew
+
+    def schedule_drop(self, slots: List[Slot], delay: float = 0.0) -> float:
+        """
+        release slots delay seconds from now,
+        returns the drop as a local time.time() timestamp
+        """
+        with self._lock:
+            self.slots = list(slots)
+            self.drop_at = self.server_time() + delay
+            self.drop_day = slots[0].date.start.date() if slots else None
+            self.booked = []
+            self.taken = []
+            self._book_tokens = {}
+        return self.drop_at - self.clock_skew
+
+    def available_slots(self) -> List[Slot]:
+        if self.drop_at is not None and self.server_time() < self.drop_at:
+            return []
+
+        return list(self.slots)
+
+    def handle(
+        self, method: str, path: str, fields: Dict[str, str]
+    ) -> Tuple[int, Dict]:
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+            endpoint = (method, path)
+            if endpoint == ("POST", ResyEndpoints.PASSWORD_AUTH.value):
+                return self._auth(fields)
+            if endpoint == ("GET", ResyEndpoints.CALENDAR.value):
+                return self._calendar(fields)
+            if endpoint not in (
+                ("GET", ResyEndpoints.FIND.value),
+                ("GET", ResyEndpoints.DETAILS.value),
+                ("POST", ResyEndpoints.BOOK.value),
+            ):
+                return 200, {}
+
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return 500, {"message": "stand-in injected error"}
+
+            if path == ResyEndpoints.FIND.value:
+                return self._find(fields)
+            if path == ResyEndpoints.DETAILS.value:
+                return self._details(fields)
+            return self._book(fields)
+
+    def _auth(self, fields: Dict[str, str]) -> Tuple[int, Dict]:
+        if not fields.get("email") or not fields.get("password"):
+            return 419, {"message": "Unauthorized"}
+
+        return 200, {
+            "payment_methods": [{"id": self.payment_method_id}],
+            "token": f"stand-in-{uuid.uuid4()}",
+        }
+
+    def calendar_days(self) -> Dict[date, str]:
+        days = dict(self.calendar)
+        dropped = self.drop_at is not None and self.server_time() >= self.drop_at
+        if self.drop_day is not None and dropped:
+            days[self.drop_day] = "available" if self.slots else "sold-out"
+        return days
+
+    def _calendar(self, fields: Dict[str, str]) -> Tuple[int, Dict]:
+        try:
+            start = date.fromisoformat(fields["start_date"])
+            end = date.fromisoformat(fields["end_date"])
+        except (KeyError, ValueError):
+            return 400, {"message": "start_date and end_date are required"}
+
+        days = self.calendar_days()
+        last_calendar_day = max(days, default=date.today())
+        return 200, {
+            "last_calendar_day": last_calendar_day.isoformat(),
+            "scheduled": [
+                {
+                    "date": day.isoformat(),
+                    "inventory": {
+                        "reservation": days[day],
+                        "event": "not available",
+                        "walk-in": "not available",
+                    },
+                }
+                for day in sorted(days)
+                if start <= day <= end
+            ],
+        }
+
+    def _find(self, fields: Dict[str, str]) -> Tuple[int, Dict]:
+        slots = self.available_slots()
+        payload = render_find_response(fields.get("venue_id", ""), slots)
+
+        if self.contention:
+            for slot in slots:
+                if self._rng.random() < self.contention:
+                    self.slots.remove(slot)
+                    self.taken.append(slot)
+
+        return 200, payload
+
+    def _details(self, fields: Dict[str, str]) -> Tuple[int, Dict]:
+        config_id = fields.get("config_id")
+        for slot in self.available_slots():
+            if slot.config.token == config_id:
+                book_token = str(uuid.uuid4())
+                self._book_tokens[book_token] = slot
+                expires = datetime.now() + timedelta(minutes=5)
+                return 200, {
+                    "book_token": {
+                        "value": book_token,
+                        "date_expires": expires.strftime(SLOT_TIME_FORMAT),
+                    }
+                }
+
+        return 404, {"message": "Slot not found"}
+
+    def _book(self, fields: Dict[str, str]) -> Tuple[int, Dict]:
+        slot = self._book_tokens.pop(fields.get("book_token", ""), None)
+        if slot is None or slot not in self.slots:
+            return 412, {"message": "Slot no longer available"}
+
+        self.slots.remove(slot)
+        self.booked.append(slot)
+        return 201, {"resy_token": f"resy-{uuid.uuid4()}"}
+
+    @property
+    def base_url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("Stand-in server is not running")
+
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def start(self) -> "StandInResyServer":
+        self._server = StandInHTTPServer((self.host, 0), StandInRequestHandler)
+        self._server.stand_in = self
+        self._thread = Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StandInResyServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
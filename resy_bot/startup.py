@@ -0,0 +1,49 @@
+"""
+arm ahead startup.
+
+everything the drop needs that doesn't depend on what resy sends back is
+done as soon as the process starts: imports, config validation, logging
+in, the selection plan and the prepared requests. bad credentials or a
+bad config fail hours ahead instead of at the drop, and the process then
+sits idle until it's time to warm connections and fire.
+each step is timed so startup can be reported
+"""
+
+import gc
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+
+class StartupTimings:
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.clock() - started
+
+    @property
+    def total(self) -> float:
+        return self.clock() - self.started
+
+    def summary(self) -> str:
+        phases = ", ".join(
+            f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.phases.items()
+        )
+        return f"armed in {self.total * 1000:.1f}ms ({phases})"
+
+
+def settle() -> None:
+    """
+    collect what startup left behind and freeze the survivors, so no
+    collection at the drop has to walk objects that live for the whole run
+    """
+    gc.collect()
+    gc.freeze()
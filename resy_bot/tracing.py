@@ -0,0 +1,270 @@
+"""
+per phase latency traces for reservation attempts.
+
+a trace is made active on the thread running an attempt, and the code
+under it records spans with perf_counter_ns timestamps: the manager
+marks the find, selection, details and book phases, the api access
+marks json decode and model build, and TracingHTTPAdapter marks
+connection acquire, connect, request send, time to first byte and body
+read for every request the session sends. counters tally events
+within an attempt, like book token cache hits. with no active trace,
+recording is a no-op
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+
+from pydantic import BaseModel
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from resy_bot.constants import TRACE_HISTORY
+
+T = TypeVar("T")
+
+now_ns = time.perf_counter_ns
+
+
+class Span(BaseModel):
+    name: str
+    phase: Optional[str]
+    start_ns: int
+    end_ns: int
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class AttemptTrace:
+    def __init__(self, attempt: int, venue_id: str):
+        self.attempt = attempt
+        self.venue_id = venue_id
+        self.started_ns = now_ns()
+        self.spans: List[Span] = []
+        self.counters: Dict[str, int] = {}
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record(
+        self, name: str, start_ns: int, end_ns: int, phase: Optional[str] = None
+    ) -> None:
+        span = Span(name=name, phase=phase, start_ns=start_ns, end_ns=end_ns)
+        with self._lock:
+            self.spans.append(span)
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def durations_ms(self, name: str) -> List[float]:
+        return [span.duration_ms for span in self.spans if span.name == name]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        span times are relative to the start of the attempt
+        """
+        return {
+            "attempt": self.attempt,
+            "venue_id": self.venue_id,
+            "started_ns": self.started_ns,
+            "error": self.error,
+            "counters": dict(self.counters),
+            "spans": [
+                {
+                    "name": span.name,
+                    "phase": span.phase,
+                    "start_ms": (span.start_ns - self.started_ns) / 1e6,
+                    "duration_ms": span.duration_ms,
+                }
+                for span in sorted(self.spans, key=lambda span: span.start_ns)
+            ],
+        }
+
+
+class _Active(threading.local):
+    trace: Optional[AttemptTrace] = None
+    phase: Optional[str] = None
+    request_started_ns: Optional[int] = None
+    sent_ns: Optional[int] = None
+
+
+_active = _Active()
+
+
+def current_trace() -> Optional[AttemptTrace]:
+    return _active.trace
+
+
+def activate(trace: Optional[AttemptTrace]) -> None:
+    _active.trace = trace
+    _active.phase = None
+
+
+def record(name: str, start_ns: int, end_ns: Optional[int] = None) -> None:
+    trace = _active.trace
+    if trace is not None:
+        trace.record(name, start_ns, end_ns or now_ns(), _active.phase)
+
+
+def count(name: str) -> None:
+    trace = _active.trace
+    if trace is not None:
+        trace.count(name)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    if _active.trace is None:
+        yield
+        return
+
+    start = now_ns()
+    try:
+        yield
+    finally:
+        record(name, start)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    a span covering a whole phase, spans inside it are tagged with it
+    """
+    if _active.trace is None:
+        yield
+        return
+
+    outer = _active.phase
+    _active.phase = name
+    start = now_ns()
+    try:
+        yield
+    finally:
+        _active.phase = outer
+        record(name, start)
+
+
+def bind(fn: Callable[..., T]) -> Callable[..., T]:
+    """
+    carry the calling thread's trace and phase over to
+    whichever worker thread ends up running fn
+    """
+    trace = _active.trace
+    outer_phase = _active.phase
+    if trace is None:
+        return fn
+
+    @wraps(fn)
+    def bound(*args: Any, **kwargs: Any) -> T:
+        _active.trace = trace
+        _active.phase = outer_phase
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active.trace = None
+            _active.phase = None
+
+    return bound
+
+
+class Tracer:
+    """
+    starts a trace per reservation attempt and keeps the latest ones
+    """
+
+    def __init__(self, history: int = TRACE_HISTORY):
+        self.traces: Deque[AttemptTrace] = deque(maxlen=history)
+        self._attempts = 0
+        self._lock = threading.Lock()
+
+    def start_attempt(self, venue_id: str) -> AttemptTrace:
+        with self._lock:
+            self._attempts += 1
+            trace = AttemptTrace(self._attempts, venue_id)
+            self.traces.append(trace)
+
+        activate(trace)
+        return trace
+
+    def dump_jsonl(self, out: IO[str]) -> None:
+        for trace in list(self.traces):
+            out.write(json.dumps(trace.to_dict()) + "\n")
+
+
+class _TracedConnectionMixin:
+    def connect(self) -> None:
+        start = now_ns()
+        super().connect()  # type: ignore[misc]
+        record("connect", start)
+
+    def request(self, *args: Any, **kwargs: Any) -> None:
+        start = now_ns()
+        if _active.request_started_ns is not None:
+            record("acquire", _active.request_started_ns, start)
+
+        super().request(*args, **kwargs)  # type: ignore[misc]
+        _active.sent_ns = now_ns()
+        record("send", start, _active.sent_ns)
+
+    def getresponse(self) -> Any:
+        response = super().getresponse()  # type: ignore[misc]
+        if _active.sent_ns is not None:
+            record("ttfb", _active.sent_ns)
+        return response
+
+
+class TracedHTTPConnection(_TracedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TracedHTTPSConnection(_TracedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TracedHTTPConnection
+
+
+class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TracedHTTPSConnection
+
+
+class TracingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections record acquire, connect, send and
+    time to first byte spans, and which reads the body itself so that
+    the read is timed too
+    """
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TracedHTTPConnectionPool,
+            "https": TracedHTTPSConnectionPool,
+        }
+
+    def send(  # type: ignore[override]
+        self, request: PreparedRequest, stream: bool = False, **kwargs: Any
+    ) -> Response:
+        if _active.trace is None:
+            return super().send(request, stream=stream, **kwargs)
+
+        _active.request_started_ns = now_ns()
+        _active.sent_ns = None
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+        finally:
+            _active.request_started_ns = None
+
+        if not stream:
+            with span("body_read"):
+                response.content
+        return response
@@ -0,0 +1,129 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier, BrokenBarrierError
+from typing import List, Optional
+
+from pydantic import BaseModel
+from requests import RequestException
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.logging import logging
+from resy_bot.models import ConnectionPoolConfig
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class WarmupReport(BaseModel):
+    cold_latencies: List[float] = []
+    warm_latencies: List[float] = []
+    first_request_latency: Optional[float] = None
+
+    @property
+    def saved_seconds(self) -> Optional[float]:
+        """
+        how much faster the first real request was than a cold connection
+        """
+        if not self.cold_latencies or self.first_request_latency is None:
+            return None
+
+        cold = sum(self.cold_latencies) / len(self.cold_latencies)
+        return cold - self.first_request_latency
+
+
+class ConnectionWarmer:
+    """
+    opens pooled connections to resy ahead of the drop and keeps them alive,
+    so the first find after the drop doesn't pay for DNS, TCP and TLS setup
+    """
+
+    def __init__(self, api_access: ResyApiAccess, pool_config: ConnectionPoolConfig):
+        self.api_access = api_access
+        self.pool_config = pool_config
+        self.report = WarmupReport()
+        self._last_ping: Optional[float] = None
+
+    def _ping_concurrently(self) -> List[Optional[float]]:
+        """
+        hold every ping at a barrier so they're all in flight at once,
+        forcing the pool to open (or reuse) warm_connections connections
+        """
+        n_connections = self.pool_config.warm_connections
+        barrier = Barrier(n_connections)
+
+        def timed_ping() -> Optional[float]:
+            try:
+                barrier.wait(timeout=5)
+            except BrokenBarrierError:
+                pass
+
+            started = time.perf_counter()
+            try:
+                self.api_access.ping()
+            except RequestException as e:
+                logger.warning(f"Connection ping failed: {e}")
+                return None
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=n_connections) as executor:
+            latencies = list(executor.map(lambda _: timed_ping(), range(n_connections)))
+
+        self._last_ping = time.monotonic()
+        return latencies
+
+    def warm(self) -> WarmupReport:
+        latencies = self._ping_concurrently()
+        self.report.cold_latencies = [
+            latency for latency in latencies if latency is not None
+        ]
+        logger.info(
+            f"Warmed {len(self.report.cold_latencies)} connections, "
+            f"cold latencies {self._format(self.report.cold_latencies)}"
+        )
+        return self.report
+
+    def keep_alive_if_due(self) -> None:
+        if (
+            self._last_ping is not None
+            and time.monotonic() - self._last_ping < self.pool_config.keepalive_seconds
+        ):
+            return
+
+        self._ping_concurrently()
+
+    def health_check(self) -> bool:
+        """
+        ping every pooled connection right before the drop,
+        re-warming if any of them went stale
+        """
+        latencies = self._ping_concurrently()
+        healthy = [latency for latency in latencies if latency is not None]
+        self.report.warm_latencies = healthy
+
+        if len(healthy) < len(latencies):
+            logger.warning(
+                f"{len(latencies) - len(healthy)} connections unhealthy, re-warming"
+            )
+            self.report.warm_latencies = [
+                latency for latency in self._ping_concurrently() if latency is not None
+            ]
+            return False
+
+        logger.info(f"Connections healthy, latencies {self._format(healthy)}")
+        return True
+
+    def record_first_request(self, latency: float) -> None:
+        if self.report.first_request_latency is not None:
+            return
+
+        self.report.first_request_latency = latency
+        saved = self.report.saved_seconds
+        if saved is not None:
+            logger.info(
+                f"First request took {latency * 1000:.1f}ms, "
+                f"{saved * 1000:.1f}ms faster than a cold connection"
+            )
+
+    @staticmethod
+    def _format(latencies: List[float]) -> str:
+        return ", ".join(f"{latency * 1000:.1f}ms" for latency in latencies)
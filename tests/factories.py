@@ -7,6 +7,8 @@ from resy_bot.models import (
     ReservationRequest,
     ReservationRetriesConfig,
     TimedReservationRequest,
+    CampaignEntry,
+    ReservationCampaign,
     Slot,
     SlotConfig,
     SlotDate,
@@ -66,8 +68,25 @@ class TimedReservationRequestFactory(factory.Factory):
         model = TimedReservationRequest
 
     reservation_request = factory.SubFactory(ReservationRequestFactory)
-    expected_drop_hour = factory.LazyFunction(lambda: randint(1, 24))
-    expected_drop_minute = factory.LazyFunction(lambda: randint(0, 60))
+    expected_drop_hour = factory.LazyFunction(lambda: randint(0, 23))
+    expected_drop_minute = factory.LazyFunction(lambda: randint(0, 59))
+
+
+class CampaignEntryFactory(factory.Factory):
+    class Meta:
+        model = CampaignEntry
+
+    priority = factory.LazyFunction(lambda: randint(0, 3))
+    reservation_request = factory.SubFactory(ReservationRequestFactory)
+
+
+class ReservationCampaignFactory(factory.Factory):
+    class Meta:
+        model = ReservationCampaign
+
+    entries = factory.List([factory.SubFactory(CampaignEntryFactory)])
+    expected_drop_hour = factory.LazyFunction(lambda: randint(0, 23))
+    expected_drop_minute = factory.LazyFunction(lambda: randint(0, 59))
 
 
 class SlotConfigFactory(factory.Factory):
@@ -196,3 +215,29 @@ class BookResponseBodyFactory(factory.Factory):
         model = BookResponseBody
 
     resy_token = factory.Faker("uuid4")
+
+
+class FakeClock:
+    """
+    a monotonic clock that only moves when slept on, and by tick on every
+    read for loops that spin on it. call it or use monotonic as the clock
+    """
+
+    def __init__(self, now: float = 0.0, tick: float = 0.0):
+        self.now = now
+        self.tick = tick
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        self.now += self.tick
+        return self.now
+
+    def __call__(self) -> float:
+        return self.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds: float) -> None:
+        self.sleep(seconds)
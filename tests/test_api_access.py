@@ -1,9 +1,13 @@
+from datetime import date, datetime, timezone
 import pytest
 from requests import HTTPError
 from unittest.mock import MagicMock
 from requests import Session
+from urllib.parse import quote_plus
 
 from resy_bot.api_access import build_session, ResyApiAccess
+from resy_bot.find_changes import FindChanges
+from resy_bot.models import CalendarRequestBody, ConnectionPoolConfig
 from tests.factories import (
     ResyConfigFactory,
     AuthRequestBodyFactory,
@@ -14,6 +18,8 @@ from tests.factories import (
     DetailsRequestBodyFactory,
     BookRequestBodyFactory,
     BookResponseBodyFactory,
+    ReservationRequestFactory,
+    SlotFactory,
 )
 
 
@@ -26,6 +32,17 @@ def test_build_session():
     assert session.headers["X-Resy-Auth-Token"] == config.token
 
 
+def test_build_session_pool_config():
+    config = ResyConfigFactory.create()
+    pool_config = ConnectionPoolConfig(pool_maxsize=16, warm_connections=8)
+    session = build_session(config, pool_config)
+
+    adapter = session.get_adapter("https://api.resy.com")
+
+    assert adapter._pool_maxsize == 16
+    assert adapter.max_retries.total == 0
+
+
 def test_build_api_access():
     config = ResyConfigFactory.create()
     api_access = ResyApiAccess.build(config)
@@ -39,6 +56,16 @@ def test_build_api_access():
     assert api_access.session.headers["X-Resy-Auth-Token"] == config.token
 
 
+def test_set_token():
+    config = ResyConfigFactory.create()
+    api_access = ResyApiAccess.build(config)
+
+    api_access.set_token("fresh-token")
+
+    assert api_access.session.headers["X-Resy-Auth-Token"] == "fresh-token"
+    assert api_access.session.headers["X-Resy-Universal-Auth"] == "fresh-token"
+
+
 def test_auth():
     session = MagicMock()
     resp_mock = MagicMock()
@@ -74,6 +101,52 @@ def test_bad_auth():
         api_access.auth(body)
 
 
+def test_get_calendar():
+    session = MagicMock()
+    resp_mock = MagicMock()
+    resp_mock.json.return_value = {
+        "last_calendar_day": "2023-04-29",
+        "scheduled": [
+            {
+                "date": "2023-03-30",
+                "inventory": {
+                    "reservation": "sold-out",
+                    "event": "not available",
+                    "walk-in": "available",
+                },
+            }
+        ],
+    }
+    session.get.return_value = resp_mock
+    api_access = ResyApiAccess(session)
+    body = CalendarRequestBody(
+        venue_id="12345", num_seats=2, start_date="2023-03-30", end_date="2023-04-30"
+    )
+
+    calendar = api_access.get_calendar(body)
+
+    session.get.assert_called_once_with(
+        "https://api.resy.com/4/venue/calendar", params=body.dict()
+    )
+    assert calendar.last_calendar_day == date(2023, 4, 29)
+    assert calendar.scheduled[0].sold_out
+
+
+def test_get_calendar_bad_resp():
+    session = MagicMock()
+    resp_mock = MagicMock()
+    resp_mock.ok = False
+    session.get.return_value = resp_mock
+
+    api_access = ResyApiAccess(session)
+    body = CalendarRequestBody(
+        venue_id="12345", num_seats=2, start_date="2023-03-30", end_date="2023-04-30"
+    )
+
+    with pytest.raises(HTTPError):
+        api_access.get_calendar(body)
+
+
 def test_find_booking_slots():
     expected_resp = FindResponseBodyFactory.create()
 
@@ -187,3 +260,153 @@ def test_book_slot_bad_resp():
 
     with pytest.raises(HTTPError):
         api_access.book_slot(body)
+
+
+def test_ping():
+    session = MagicMock()
+    resp_mock = MagicMock()
+    resp_mock.headers = {"Date": "Thu, 30 Mar 2023 14:00:00 GMT"}
+    session.head.return_value = resp_mock
+
+    api_access = ResyApiAccess(session)
+
+    server_date = api_access.ping()
+
+    session.head.assert_called_once_with("https://api.resy.com")
+    assert server_date == datetime(2023, 3, 30, 14, 0, tzinfo=timezone.utc)
+
+
+def test_ping_no_date_header():
+    session = MagicMock()
+    resp_mock = MagicMock()
+    resp_mock.headers = {}
+    session.head.return_value = resp_mock
+
+    api_access = ResyApiAccess(session)
+
+    assert api_access.ping() is None
+
+
+def test_find_booking_slots_no_venues():
+    session = MagicMock()
+    session.get.return_value.json.return_value = {"results": {"venues": []}}
+
+    api_access = ResyApiAccess(session)
+
+    assert api_access.find_booking_slots(FindRequestBodyFactory.create()) == []
+
+
+def test_find_booking_slots_fast_decode():
+    expected_resp = FindResponseBodyFactory.create()
+
+    session = MagicMock()
+    session.get.return_value.content = expected_resp.json().encode()
+
+    api_access = ResyApiAccess(session, fast_decode=True)
+
+    slots = api_access.find_booking_slots(FindRequestBodyFactory.create())
+
+    assert slots == expected_resp.results.venues[0].slots
+    session.get.return_value.json.assert_not_called()
+
+
+def test_find_booking_slot_changes_skips_unchanged_responses():
+    expected_resp = FindResponseBodyFactory.create()
+
+    session = MagicMock()
+    session.get.return_value.status_code = 200
+    session.get.return_value.headers = {}
+    session.get.return_value.content = expected_resp.json().encode()
+    session.get.return_value.json.return_value = expected_resp.dict()
+
+    api_access = ResyApiAccess(session)
+    body = FindRequestBodyFactory.create()
+    changes = FindChanges()
+
+    diff = api_access.find_booking_slot_changes(body, changes)
+
+    assert diff.added == expected_resp.results.venues[0].slots
+    assert api_access.find_booking_slot_changes(body, changes) is None
+    session.get.return_value.json.assert_called_once()
+
+
+def test_find_booking_slot_changes_conditional_request():
+    session = MagicMock()
+    session.get.return_value.status_code = 304
+
+    api_access = ResyApiAccess(session)
+    body = FindRequestBodyFactory.create()
+    changes = FindChanges()
+    changes.update([], ("If-None-Match", '"abc"'))
+
+    assert api_access.find_booking_slot_changes(body, changes) is None
+    session.get.assert_called_once_with(
+        "https://api.resy.com/4/find",
+        params=body.dict(),
+        headers={"If-None-Match": '"abc"'},
+    )
+    session.get.return_value.json.assert_not_called()
+
+
+def test_find_booking_slot_changes_bad_resp():
+    session = MagicMock()
+    session.get.return_value.status_code = 500
+    session.get.return_value.ok = False
+
+    api_access = ResyApiAccess(session)
+
+    with pytest.raises(HTTPError):
+        api_access.find_booking_slot_changes(
+            FindRequestBodyFactory.create(), FindChanges()
+        )
+
+
+def test_arm():
+    config = ResyConfigFactory.create()
+    api_access = ResyApiAccess.build(config)
+    request = ReservationRequestFactory.create()
+
+    armed = api_access.arm(request, config)
+
+    day = request.target_date.strftime("%Y-%m-%d")
+    assert armed.find_request.method == "GET"
+    assert f"venue_id={quote_plus(request.venue_id)}" in armed.find_request.url
+    assert f"day={day}" in armed.find_request.url
+    assert armed.find_request.headers["X-Resy-Auth-Token"] == config.token
+    assert armed.details_url_prefix.endswith("&config_id=")
+    assert f"party_size={request.party_size}" in armed.details_url_prefix
+    assert armed.book_body_prefix.endswith("&book_token=")
+
+
+def test_send_armed_requests():
+    config = ResyConfigFactory.create()
+    session = MagicMock()
+    api_access = ResyApiAccess(session)
+    armed = ResyApiAccess.build(config).arm(ReservationRequestFactory.create(), config)
+
+    slot = SlotFactory.create()
+    details = DetailsResponseBodyFactory.create()
+    resp = MagicMock()
+    resp.ok = True
+    resp.json.side_effect = [
+        FindResponseBodyFactory.create().dict(),
+        details.dict(),
+        BookResponseBodyFactory.create().dict(),
+    ]
+    session.send.return_value = resp
+
+    api_access.send_find(armed)
+    assert session.send.call_args[0][0] is armed.find_request
+
+    assert api_access.send_details(armed, slot) == details
+    details_request = session.send.call_args[0][0]
+    assert details_request.url == armed.details_url_prefix + quote_plus(
+        slot.config.token
+    )
+
+    api_access.send_book(armed, details)
+    book_request = session.send.call_args[0][0]
+    assert book_request.body.decode().endswith(
+        "&book_token=" + quote_plus(details.book_token.value)
+    )
+    assert book_request.headers["Content-Length"] == str(len(book_request.body))
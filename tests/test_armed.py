@@ -0,0 +1,77 @@
+from urllib.parse import parse_qs
+
+from requests import Request
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.model_builders import (
+    build_book_request_body,
+    build_get_slot_details_body,
+)
+from resy_bot.constants import BOOK_HEADERS, RESY_BASE_URL, ResyEndpoints
+from tests.factories import (
+    DetailsResponseBodyFactory,
+    ReservationRequestFactory,
+    ResyConfigFactory,
+    SlotFactory,
+)
+
+
+def test_details_request_matches_built_request():
+    config = ResyConfigFactory.create()
+    api_access = ResyApiAccess.build(config)
+    request = ReservationRequestFactory.create()
+    slot = SlotFactory.create()
+
+    armed = api_access.arm(request, config)
+    prepared = armed.details_request(slot.config.token)
+
+    body = build_get_slot_details_body(request, slot)
+    expected = api_access.session.prepare_request(
+        Request("GET", RESY_BASE_URL + ResyEndpoints.DETAILS.value, params=body.dict())
+    )
+
+    assert prepared.url.split("?")[0] == expected.url.split("?")[0]
+    assert parse_qs(prepared.url.split("?")[1]) == parse_qs(expected.url.split("?")[1])
+    assert prepared.headers == expected.headers
+
+
+def test_book_request_matches_built_request():
+    config = ResyConfigFactory.create()
+    api_access = ResyApiAccess.build(config)
+    details = DetailsResponseBodyFactory.create()
+
+    armed = api_access.arm(ReservationRequestFactory.create(), config)
+    prepared = armed.book_request(details.book_token.value)
+
+    body = build_book_request_body(details, config)
+    expected = api_access.session.prepare_request(
+        Request(
+            "POST",
+            RESY_BASE_URL + ResyEndpoints.BOOK.value,
+            data=api_access._dump_book_request_body_to_dict(body),
+            headers=BOOK_HEADERS,
+        )
+    )
+
+    assert prepared.method == "POST"
+    assert prepared.url == expected.url
+    assert parse_qs(prepared.body.decode()) == parse_qs(expected.body)
+    assert prepared.headers == expected.headers
+
+
+def test_armed_requests_are_independent():
+    config = ResyConfigFactory.create()
+    armed = ResyApiAccess.build(config).arm(ReservationRequestFactory.create(), config)
+
+    first = armed.book_request("short")
+    second = armed.book_request("a-much-longer-book-token")
+
+    assert first.headers["Content-Length"] != second.headers["Content-Length"]
+    assert first.headers["Content-Length"] == str(len(first.body))
+
+
+def test_send_kwargs_are_resolved_once():
+    config = ResyConfigFactory.create()
+    armed = ResyApiAccess.build(config).arm(ReservationRequestFactory.create(), config)
+
+    assert set(armed.send_kwargs) == {"proxies", "stream", "verify", "cert"}
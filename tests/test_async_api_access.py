@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+from requests import HTTPError
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.async_api_access import AsyncResyApiAccess
+from resy_bot.models import ConnectionPoolConfig
+from resy_bot.stand_in import StandInResyServer
+from tests.factories import (
+    ResyConfigFactory,
+    AuthRequestBodyFactory,
+    AuthResponseBodyFactory,
+    FindRequestBodyFactory,
+    FindResponseBodyFactory,
+    DetailsRequestBodyFactory,
+    DetailsResponseBodyFactory,
+    BookRequestBodyFactory,
+    BookResponseBodyFactory,
+)
+
+
+def test_build_async_api_access():
+    config = ResyConfigFactory.create()
+    pool_config = ConnectionPoolConfig(pool_maxsize=12)
+
+    api_access = AsyncResyApiAccess.build(config, pool_config=pool_config)
+
+    assert isinstance(api_access.api_access, ResyApiAccess)
+    assert isinstance(api_access.executor, ThreadPoolExecutor)
+    assert api_access.executor._max_workers == 12
+    api_access.close()
+
+
+def test_auth():
+    session = MagicMock()
+    expected_resp = AuthResponseBodyFactory.create()
+    session.post.return_value.json.return_value = expected_resp.dict()
+    api_access = AsyncResyApiAccess(ResyApiAccess(session))
+
+    resp = asyncio.run(api_access.auth(AuthRequestBodyFactory.create()))
+
+    assert resp == expected_resp
+
+
+def test_find_booking_slots():
+    session = MagicMock()
+    expected_resp = FindResponseBodyFactory.create()
+    session.get.return_value.json.return_value = expected_resp.dict()
+    api_access = AsyncResyApiAccess(ResyApiAccess(session))
+
+    slots = asyncio.run(api_access.find_booking_slots(FindRequestBodyFactory.create()))
+
+    assert slots == expected_resp.results.venues[0].slots
+
+
+def test_get_booking_token():
+    session = MagicMock()
+    expected_resp = DetailsResponseBodyFactory.create()
+    session.get.return_value.json.return_value = expected_resp.dict()
+    api_access = AsyncResyApiAccess(ResyApiAccess(session))
+
+    resp = asyncio.run(api_access.get_booking_token(DetailsRequestBodyFactory.create()))
+
+    assert resp == expected_resp
+
+
+def test_book_slot():
+    session = MagicMock()
+    expected_resp = BookResponseBodyFactory.create()
+    session.post.return_value.json.return_value = expected_resp.dict()
+    api_access = AsyncResyApiAccess(ResyApiAccess(session))
+
+    resy_token = asyncio.run(api_access.book_slot(BookRequestBodyFactory.create()))
+
+    assert resy_token == expected_resp.resy_token
+
+
+def test_book_slot_bad_resp():
+    session = MagicMock()
+    session.post.return_value.ok = False
+    api_access = AsyncResyApiAccess(ResyApiAccess(session))
+
+    with pytest.raises(HTTPError):
+        asyncio.run(api_access.book_slot(BookRequestBodyFactory.create()))
+
+
+def test_concurrent_pings_share_the_pool():
+    config = ResyConfigFactory.create()
+    pool_config = ConnectionPoolConfig(pool_maxsize=4, warm_connections=4)
+
+    async def ping_many(api_access: AsyncResyApiAccess) -> None:
+        await asyncio.gather(*(api_access.ping() for _ in range(4)))
+        await asyncio.gather(*(api_access.ping() for _ in range(4)))
+
+    with StandInResyServer(latency=0.05) as server:
+        api_access = AsyncResyApiAccess.build(
+            config, base_url=server.base_url, pool_config=pool_config
+        )
+        asyncio.run(ping_many(api_access))
+        api_access.close()
+
+        assert server.connections_opened == 4
@@ -0,0 +1,211 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from requests import HTTPError
+
+from resy_bot.async_api_access import AsyncResyApiAccess
+from resy_bot.async_manager import AsyncResyManager
+from resy_bot.errors import NoSlotsError, ExhaustedRetriesError
+from resy_bot.models import (
+    FindRequestBody,
+    DetailsRequestBody,
+    BookRequestBody,
+    PaymentMethod,
+    ReservationRetriesConfig,
+)
+from resy_bot.retry import RetryEngine
+from tests.factories import (
+    FakeClock,
+    ResyConfigFactory,
+    SlotFactory,
+    ReservationRequestFactory,
+    DetailsResponseBodyFactory,
+    ReservationRetriesConfigFactory,
+    TimedReservationRequestFactory,
+)
+
+
+def test_build():
+    config = ResyConfigFactory.create()
+    manager = AsyncResyManager.build(config)
+
+    assert isinstance(manager, AsyncResyManager)
+    assert isinstance(manager.api_access, AsyncResyApiAccess)
+    manager.api_access.close()
+
+
+def test_build_fast_decode():
+    manager = AsyncResyManager.build(ResyConfigFactory.create(), fast_decode=True)
+
+    assert manager.api_access.api_access.fast_decode
+    manager.api_access.close()
+
+
+def test_make_reservation():
+    config = ResyConfigFactory.create()
+    retries_config = ReservationRetriesConfigFactory.create()
+    request = ReservationRequestFactory.create()
+    mock_api_access = AsyncMock()
+    slots = SlotFactory.create_batch(3)
+    mock_api_access.find_booking_slots.return_value = slots
+
+    details_response = DetailsResponseBodyFactory.create()
+    mock_api_access.get_booking_token.return_value = details_response
+
+    mock_selector = MagicMock()
+    mock_selector.select.return_value = slots[0]
+
+    manager = AsyncResyManager(config, mock_api_access, mock_selector, retries_config)
+
+    asyncio.run(manager.make_reservation(request))
+
+    expected_day = request.ideal_date.strftime("%Y-%m-%d")
+
+    mock_api_access.find_booking_slots.assert_awaited_once_with(
+        FindRequestBody(
+            venue_id=request.venue_id, party_size=request.party_size, day=expected_day
+        )
+    )
+    mock_api_access.get_booking_token.assert_awaited_once_with(
+        DetailsRequestBody(
+            config_id=slots[0].config.token,
+            day=expected_day,
+            party_size=request.party_size,
+        )
+    )
+    mock_api_access.book_slot.assert_awaited_once_with(
+        BookRequestBody(
+            book_token=details_response.book_token.value,
+            struct_payment_method=PaymentMethod(id=config.payment_method_id),
+        )
+    )
+
+
+def test_make_reservation_no_slots():
+    config = ResyConfigFactory.create()
+    retries_config = ReservationRetriesConfigFactory.create()
+    request = ReservationRequestFactory.create()
+    mock_api_access = AsyncMock()
+    mock_api_access.find_booking_slots.return_value = []
+
+    manager = AsyncResyManager(config, mock_api_access, MagicMock(), retries_config)
+
+    with pytest.raises(NoSlotsError):
+        asyncio.run(manager.make_reservation(request))
+
+
+def http_error(status_code):
+    return HTTPError(
+        f"Failed: {status_code}", response=MagicMock(status_code=status_code)
+    )
+
+
+def build_retrying_manager(api_access):
+    clock = FakeClock()
+    retry_config = ReservationRetriesConfig(
+        seconds_between_retries=0.1,
+        retry_duration=1,
+    )
+    selector = MagicMock()
+    selector.select.side_effect = lambda slots, request: slots[0]
+    manager = AsyncResyManager(
+        ResyConfigFactory.create(), api_access, selector, retry_config
+    )
+    manager.retry_engine = RetryEngine(
+        retry_config,
+        clock=clock.monotonic,
+        sleep=clock.sleep,
+        async_sleep=clock.async_sleep,
+    )
+    return manager, clock
+
+
+def test_make_reservation_with_retries():
+    mock_api_access = AsyncMock()
+    mock_api_access.find_booking_slots.return_value = []
+    manager, clock = build_retrying_manager(mock_api_access)
+
+    with pytest.raises(ExhaustedRetriesError):
+        asyncio.run(
+            manager.make_reservation_with_retries(ReservationRequestFactory.create())
+        )
+
+    # finds back off between attempts and stop at the deadline
+    assert clock.now < 1
+    assert mock_api_access.find_booking_slots.await_count == len(clock.sleeps) + 1
+
+
+def test_make_reservation_with_retries_only_retries_failed_book():
+    mock_api_access = AsyncMock()
+    mock_api_access.find_booking_slots.return_value = SlotFactory.create_batch(1)
+    mock_api_access.get_booking_token.return_value = DetailsResponseBodyFactory.create()
+    mock_api_access.book_slot.side_effect = [http_error(502), "resy-token"]
+    manager, _ = build_retrying_manager(mock_api_access)
+
+    result = asyncio.run(
+        manager.make_reservation_with_retries(ReservationRequestFactory.create())
+    )
+
+    assert result == "resy-token"
+    assert mock_api_access.find_booking_slots.await_count == 1
+    assert mock_api_access.get_booking_token.await_count == 1
+    assert mock_api_access.book_slot.await_count == 2
+
+
+def test_make_reservation_with_retries_raises_terminal_errors():
+    mock_api_access = AsyncMock()
+    mock_api_access.find_booking_slots.side_effect = http_error(403)
+    manager, clock = build_retrying_manager(mock_api_access)
+
+    with pytest.raises(HTTPError):
+        asyncio.run(
+            manager.make_reservation_with_retries(ReservationRequestFactory.create())
+        )
+
+    assert mock_api_access.find_booking_slots.await_count == 1
+    assert clock.sleeps == []
+
+
+def test_make_reservations_runs_flows_concurrently():
+    config = ResyConfigFactory.create()
+    retries_config = ReservationRetriesConfigFactory.create()
+    requests = ReservationRequestFactory.create_batch(3)
+    in_flight = []
+    max_in_flight = []
+
+    async def make_reservation(request):
+        in_flight.append(request)
+        max_in_flight.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(request)
+        if request is requests[1]:
+            raise ExhaustedRetriesError()
+        return request.venue_id
+
+    manager = AsyncResyManager(config, AsyncMock(), MagicMock(), retries_config)
+
+    with patch.object(manager, "make_reservation_with_retries", make_reservation):
+        results = asyncio.run(manager.make_reservations(requests))
+
+    assert max(max_in_flight) == 3
+    assert results[0] == requests[0].venue_id
+    assert isinstance(results[1], ExhaustedRetriesError)
+    assert results[2] == requests[2].venue_id
+
+
+@patch("resy_bot.async_manager.AsyncResyManager.make_reservation_with_retries")
+def test_make_reservation_at_opening_time(mock_make_reservation):
+    config = ResyConfigFactory.create()
+    retries_config = ReservationRetriesConfigFactory.create()
+    request = TimedReservationRequestFactory.create()
+    manager = AsyncResyManager(config, AsyncMock(), MagicMock(), retries_config)
+    drop_time = datetime.now() + timedelta(seconds=0.1)
+
+    with patch.object(manager, "_get_drop_time", return_value=drop_time):
+        asyncio.run(manager.make_reservation_at_opening_time(request))
+
+    assert datetime.now() >= drop_time
+    assert len(manager.scheduler.reports) == 1
+    mock_make_reservation.assert_awaited_once_with(request.reservation_request)
@@ -0,0 +1,196 @@
+import base64
+import json
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.auth import CachedToken, TokenManager, token_expiry
+from resy_bot.errors import PreflightError
+from resy_bot.stand_in import StandInResyServer
+from tests.factories import (
+    AuthResponseBodyFactory,
+    PaymentMethodFactory,
+    ResyConfigFactory,
+)
+
+NOW = datetime(2023, 3, 30, 9, 0)
+DROP = datetime(2023, 3, 30, 10, 0)
+
+
+def jwt(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=")
+    return f"header.{payload.decode()}.signature"
+
+
+def build_token_manager(tmp_path, config=None, responses=()):
+    api_access = MagicMock()
+    api_access.auth.side_effect = list(responses)
+    manager = TokenManager(
+        api_access,
+        config or ResyConfigFactory.create(payment_method_id=7),
+        cache_path=str(tmp_path / "resy" / "tokens.json"),
+        refresh_margin_seconds=600,
+        default_ttl_seconds=3600,
+        now=lambda: NOW,
+    )
+    return manager, api_access
+
+
+def auth_response(token="token", payment_method_ids=(7,)):
+    return AuthResponseBodyFactory.create(
+        token=token,
+        payment_methods=[PaymentMethodFactory.create(id=i) for i in payment_method_ids],
+    )
+
+
+def test_token_expiry_reads_jwt_exp():
+    expires_at = datetime(2023, 4, 1, 12, 0)
+
+    assert token_expiry(jwt({"exp": expires_at.timestamp()})) == expires_at
+
+
+@pytest.mark.parametrize("token", ["opaque", jwt({"sub": "me"}), "a.!!!.c"])
+def test_token_expiry_without_exp(token):
+    assert token_expiry(token) is None
+
+
+def test_authenticate_saves_token_privately(tmp_path):
+    manager, _ = build_token_manager(tmp_path, responses=[auth_response()])
+
+    token = manager.authenticate()
+
+    assert token == CachedToken(
+        token="token", expires_at=NOW + timedelta(hours=1), payment_method_ids=[7]
+    )
+    assert manager.cached() == token
+    assert stat.S_IMODE(os.stat(manager.cache_path).st_mode) == 0o600
+    assert os.listdir(os.path.dirname(manager.cache_path)) == ["tokens.json"]
+
+
+def test_cache_keeps_other_accounts(tmp_path):
+    first, _ = build_token_manager(tmp_path, responses=[auth_response("first")])
+    second, _ = build_token_manager(tmp_path, responses=[auth_response("second")])
+
+    first.authenticate()
+    second.authenticate()
+
+    assert first.cached().token == "first"
+    assert second.cached().token == "second"
+
+
+def test_concurrent_saves_keep_every_account(tmp_path):
+    managers = [
+        build_token_manager(
+            tmp_path,
+            ResyConfigFactory.create(payment_method_id=7),
+            [auth_response(f"token-{i}-{n}") for n in range(50)],
+        )[0]
+        for i in range(4)
+    ]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        saved = [
+            executor.submit(manager.authenticate)
+            for manager in managers
+            for _ in range(50)
+        ]
+        for future in saved:
+            future.result()
+
+    with open(managers[0].cache_path) as f:
+        cached = json.load(f)
+    assert set(cached) == {manager.config.email for manager in managers}
+    assert os.listdir(os.path.dirname(managers[0].cache_path)) == ["tokens.json"]
+
+
+def test_failed_save_is_not_fatal(tmp_path):
+    (tmp_path / "resy").write_text("a file where the cache directory should be")
+    manager, _ = build_token_manager(tmp_path, responses=[auth_response()])
+
+    assert manager.authenticate().token == "token"
+    assert manager.cached() is None
+
+
+def test_token_reuses_cache_that_outlasts_drop(tmp_path):
+    expires_at = DROP + timedelta(hours=1)
+    manager, _ = build_token_manager(
+        tmp_path, responses=[auth_response(jwt({"exp": expires_at.timestamp()}))]
+    )
+    manager.authenticate()
+
+    reloaded, reloaded_api_access = build_token_manager(tmp_path, manager.config)
+
+    assert reloaded.token(DROP).expires_at == expires_at
+    reloaded_api_access.auth.assert_not_called()
+
+
+def test_token_refreshes_when_expiring_near_drop(tmp_path):
+    manager, api_access = build_token_manager(
+        tmp_path,
+        responses=[
+            auth_response(jwt({"exp": (DROP + timedelta(minutes=5)).timestamp()})),
+            auth_response("fresh"),
+        ],
+    )
+    manager.authenticate()
+
+    assert manager.token(DROP).token == "fresh"
+    assert api_access.auth.call_count == 2
+
+
+def test_token_force_login_skips_cache(tmp_path):
+    manager, api_access = build_token_manager(
+        tmp_path, responses=[auth_response("rejected"), auth_response("fresh")]
+    )
+    manager.authenticate()
+
+    assert manager.token(NOW).token == "rejected"
+    assert manager.token(NOW, force_login=True).token == "fresh"
+    assert api_access.auth.call_count == 2
+
+
+def test_preflight_rechecks_payment_method_with_fresh_login(tmp_path):
+    manager, api_access = build_token_manager(
+        tmp_path,
+        responses=[
+            auth_response(payment_method_ids=[3]),
+            auth_response("fresh", payment_method_ids=[3, 7]),
+        ],
+    )
+    manager.authenticate()
+
+    assert manager.preflight(NOW).token == "fresh"
+    assert api_access.auth.call_count == 2
+
+
+def test_preflight_missing_payment_method(tmp_path):
+    manager, api_access = build_token_manager(
+        tmp_path,
+        responses=[auth_response(payment_method_ids=[3])] * 2,
+    )
+
+    with pytest.raises(PreflightError):
+        manager.preflight(NOW)
+
+    assert api_access.auth.call_count == 2
+
+
+def test_preflight_against_stand_in(tmp_path):
+    config = ResyConfigFactory.create(
+        email="diner@example.com", password="hunter2", payment_method_id=1
+    )
+    with StandInResyServer() as server:
+        api_access = ResyApiAccess.build(config, server.base_url)
+        manager = TokenManager(
+            api_access, config, cache_path=str(tmp_path / "tokens.json")
+        )
+
+        token = manager.preflight(datetime.now())
+
+    assert token.token.startswith("stand-in-")
+    assert token.payment_method_ids == [1]
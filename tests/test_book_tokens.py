@@ -0,0 +1,94 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from resy_bot.book_tokens import BookTokenCache
+from tests.factories import BookTokenFactory, DetailsResponseBodyFactory
+
+NOW = datetime(2023, 3, 30, 10, 0)
+KEY = ("config-token", 2, date(2023, 4, 13))
+
+
+def details_expiring(expires):
+    return DetailsResponseBodyFactory.create(
+        book_token=BookTokenFactory.create(date_expires=expires)
+    )
+
+
+def build_cache():
+    clock = {"now": NOW}
+
+    def now(tz=None):
+        return clock["now"] if tz is None else clock["now"].replace(tzinfo=tz)
+
+    return BookTokenCache(margin_seconds=2, now=now), clock
+
+
+def test_reuses_token_until_it_expires():
+    cache, clock = build_cache()
+    details = details_expiring(NOW + timedelta(minutes=5))
+    cache.put(KEY, details)
+
+    assert cache.get(KEY) == details
+    assert cache.get(("other-token", 2, date(2023, 4, 13))) is None
+
+    clock["now"] = NOW + timedelta(minutes=5, seconds=-2)
+    assert cache.get(KEY) is None
+    assert len(cache) == 0
+
+
+def test_expired_within_margin():
+    cache, _ = build_cache()
+
+    assert cache.expired(details_expiring(NOW + timedelta(seconds=1)))
+    assert not cache.expired(details_expiring(NOW + timedelta(seconds=3)))
+
+
+def test_expired_with_zone():
+    cache, _ = build_cache()
+    expires = (NOW + timedelta(minutes=1)).replace(tzinfo=timezone.utc)
+
+    assert not cache.expired(details_expiring(expires))
+
+
+def test_expired_in_venue_timezone():
+    # the machine is in London, four hours ahead of the venue in New York
+    now = datetime(2023, 3, 30, 16, 0, tzinfo=timezone.utc)
+    london = ZoneInfo("Europe/London")
+    cache = BookTokenCache(
+        margin_seconds=2,
+        now=lambda tz=None: (
+            now.astimezone(tz)
+            if tz is not None
+            else now.astimezone(london).replace(tzinfo=None)
+        ),
+    )
+    new_york_now = now.astimezone(ZoneInfo("America/New_York")).replace(tzinfo=None)
+    fresh = details_expiring(new_york_now + timedelta(minutes=5))
+    stale = details_expiring(new_york_now - timedelta(minutes=1))
+
+    assert not cache.expired(fresh, "America/New_York")
+    assert cache.expired(stale, "America/New_York")
+    # read in the machine's zone the fresh token would look hours stale
+    assert cache.expired(fresh)
+
+
+def test_expired_by_server_clock():
+    cache, _ = build_cache()
+    details = details_expiring(NOW + timedelta(seconds=10))
+
+    assert not cache.expired(details)
+    cache.server_offset = 9
+    assert cache.expired(details)
+
+
+def test_discard_by_token_value():
+    cache, _ = build_cache()
+    details = details_expiring(NOW + timedelta(minutes=5))
+    other = details_expiring(NOW + timedelta(minutes=5))
+    cache.put(KEY, details)
+    cache.put(("other-token", 2, date(2023, 4, 13)), other)
+
+    cache.discard(details)
+
+    assert cache.get(KEY) is None
+    assert len(cache) == 1
@@ -0,0 +1,51 @@
+from threading import Thread
+from unittest.mock import MagicMock
+
+import pytest
+from requests import HTTPError
+
+from resy_bot.booking_guard import BookingGuard
+from resy_bot.errors import AlreadyBookedError
+
+
+def test_book_records_winner():
+    guard = BookingGuard()
+
+    assert guard.book("a@example.com", lambda: "resy-token") == "resy-token"
+    assert guard.booked
+    assert guard.winner == "a@example.com"
+
+    with pytest.raises(AlreadyBookedError):
+        guard.check()
+
+
+def test_failed_book_leaves_guard_open():
+    guard = BookingGuard()
+    book = MagicMock(side_effect=HTTPError("Failed to book slot: 412"))
+
+    with pytest.raises(HTTPError):
+        guard.book("a@example.com", book)
+
+    assert not guard.booked
+    assert guard.book("b@example.com", lambda: "resy-token") == "resy-token"
+
+
+def test_only_one_concurrent_book_succeeds():
+    guard = BookingGuard()
+    book = MagicMock(return_value="resy-token")
+    outcomes = []
+
+    def attempt(owner: str) -> None:
+        try:
+            outcomes.append(guard.book(owner, book))
+        except AlreadyBookedError:
+            outcomes.append(None)
+
+    threads = [Thread(target=attempt, args=(str(i),)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    book.assert_called_once()
+    assert outcomes.count("resy-token") == 1
@@ -0,0 +1,159 @@
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import ValidationError
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.calendar import CalendarCache
+from resy_bot.models import CalendarResponseBody, ReservationRequest
+from resy_bot.stand_in import StandInResyServer, generate_slots
+from tests.factories import ReservationRequestFactory, ResyConfigFactory, FakeClock
+
+TODAY = date(2023, 3, 30)
+
+
+def calendar_response(last_day, days):
+    return CalendarResponseBody(
+        last_calendar_day=last_day,
+        scheduled=[
+            {"date": day, "inventory": {"reservation": status}}
+            for day, status in days.items()
+        ],
+    )
+
+
+def build_cache(responses):
+    api_access = MagicMock()
+    api_access.get_calendar.side_effect = responses
+    clock = FakeClock()
+    cache = CalendarCache(
+        api_access,
+        horizon_days=30,
+        max_age_seconds=60,
+        full_refresh_seconds=600,
+        clock=clock,
+        today=lambda: TODAY,
+    )
+    return cache, api_access, clock
+
+
+def requested_range(api_access, call=-1):
+    body = api_access.get_calendar.call_args_list[call][0][0]
+    return date.fromisoformat(body.start_date), date.fromisoformat(body.end_date)
+
+
+def test_first_fetch_covers_horizon():
+    last_day = TODAY + timedelta(days=14)
+    cache, api_access, _ = build_cache(
+        [calendar_response(last_day, {TODAY: "sold-out", last_day: "available"})]
+    )
+
+    calendar = cache.get("12345", 2)
+
+    assert requested_range(api_access) == (TODAY, TODAY + timedelta(days=30))
+    assert api_access.get_calendar.call_args[0][0].num_seats == 2
+    assert calendar.is_sold_out(TODAY)
+    assert not calendar.is_sold_out(last_day)
+    assert calendar.status(TODAY + timedelta(days=1)) is None
+    assert calendar.next_opening_date == last_day + timedelta(days=1)
+
+
+def test_cached_until_max_age():
+    last_day = TODAY + timedelta(days=14)
+    cache, api_access, clock = build_cache(
+        [
+            calendar_response(last_day, {}),
+            calendar_response(last_day + timedelta(days=1), {}),
+        ]
+    )
+
+    first = cache.get("12345", 2)
+    clock.now += 59
+    assert cache.get("12345", 2) is first
+    assert api_access.get_calendar.call_count == 1
+
+    clock.now += 1
+    assert cache.get("12345", 2).last_calendar_day == last_day + timedelta(days=1)
+    assert api_access.get_calendar.call_count == 2
+
+
+def test_refresh_is_incremental_until_full_refresh_is_due():
+    last_day = TODAY + timedelta(days=14)
+    new_day = last_day + timedelta(days=1)
+    cache, api_access, clock = build_cache(
+        [
+            calendar_response(last_day, {TODAY: "sold-out", last_day: "available"}),
+            calendar_response(new_day, {last_day: "sold-out", new_day: "available"}),
+            calendar_response(new_day, {TODAY: "available"}),
+        ]
+    )
+
+    cache.get("12345", 2)
+    clock.now += 60
+    calendar = cache.get("12345", 2)
+
+    assert requested_range(api_access) == (last_day, TODAY + timedelta(days=30))
+    assert calendar.is_sold_out(TODAY)
+    assert calendar.is_sold_out(last_day)
+    assert calendar.next_opening_date == new_day + timedelta(days=1)
+
+    clock.now += 600
+    calendar = cache.get("12345", 2)
+
+    assert requested_range(api_access) == (TODAY, TODAY + timedelta(days=30))
+    assert not calendar.is_sold_out(TODAY)
+
+
+def test_past_days_are_dropped():
+    yesterday = TODAY - timedelta(days=1)
+    cache, _, _ = build_cache(
+        [calendar_response(TODAY, {yesterday: "sold-out", TODAY: "available"})]
+    )
+
+    calendar = cache.get("12345", 2)
+
+    assert set(calendar.days) == {TODAY}
+
+
+def test_calendars_per_venue_and_party_size():
+    cache, api_access, _ = build_cache(
+        [calendar_response(TODAY, {}), calendar_response(TODAY, {})]
+    )
+
+    assert cache.get("12345", 2) is not cache.get("12345", 4)
+    assert cache.cached("12345", 2) is not None
+    assert cache.cached("67890", 2) is None
+
+
+def test_against_stand_in():
+    day = date.today() + timedelta(days=14)
+
+    with StandInResyServer() as server:
+        api_access = ResyApiAccess.build(ResyConfigFactory.create(), server.base_url)
+        server.calendar = {
+            date.today(): "sold-out",
+            day - timedelta(days=1): "available",
+        }
+        cache = CalendarCache(api_access, max_age_seconds=0)
+
+        before = cache.get("12345", 2)
+        assert before.next_opening_date == day
+        server.schedule_drop(generate_slots(day, 2))
+        after = cache.get("12345", 2)
+
+    assert after.is_sold_out(date.today())
+    assert after.status(day) == "available"
+    assert after.next_opening_date == day + timedelta(days=1)
+
+
+def test_reservation_request_from_calendar():
+    fields = ReservationRequestFactory.create().dict(
+        exclude={"ideal_date", "days_in_advance", "from_calendar"}
+    )
+
+    request = ReservationRequest(**fields, from_calendar=True)
+    assert request.from_calendar
+
+    with pytest.raises(ValidationError):
+        ReservationRequest(**fields, from_calendar=True, days_in_advance=14)
@@ -0,0 +1,266 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from requests import HTTPError
+
+from resy_bot.booking_guard import BookingGuard
+from resy_bot.campaign import CampaignCandidate, CampaignRunner
+from resy_bot.errors import AlreadyBookedError, NoSlotsError, ExhaustedRetriesError
+from resy_bot.manager import ResyManager
+from resy_bot.models import ReservationCampaign, ReservationRetriesConfig
+from resy_bot.scheduler import drop_time_today
+from resy_bot.selectors import SimpleSelector
+from tests.factories import (
+    CampaignEntryFactory,
+    DetailsResponseBodyFactory,
+    ResyConfigFactory,
+    SlotFactory,
+)
+
+
+def ideal_datetime(entry) -> datetime:
+    request = entry.reservation_request
+    return datetime(
+        request.ideal_date.year,
+        request.ideal_date.month,
+        request.ideal_date.day,
+        request.ideal_hour,
+        request.ideal_minute,
+    )
+
+
+def build_manager(api_access) -> ResyManager:
+    retry_config = ReservationRetriesConfig(
+        seconds_between_retries=0.1, retry_duration=0.3
+    )
+    return ResyManager(
+        ResyConfigFactory.create(), api_access, SimpleSelector(), retry_config
+    )
+
+
+def build_entry(priority: int):
+    return CampaignEntryFactory.create(
+        priority=priority,
+        reservation_request__preferred_type=None,
+        reservation_request__window_hours=2,
+        reservation_request__ideal_hour=19,
+        reservation_request__ideal_minute=0,
+    )
+
+
+def test_candidate_rank():
+    entry = build_entry(priority=1)
+    slot = SlotFactory.create(date__start=ideal_datetime(entry) + timedelta(minutes=30))
+
+    assert CampaignCandidate(entry, slot).rank == (1, timedelta(minutes=30))
+
+
+def test_books_best_slot_across_venues():
+    first_choice = build_entry(priority=0)
+    second_choice = build_entry(priority=1)
+    campaign = ReservationCampaign(
+        entries=[second_choice, first_choice],
+        expected_drop_hour=10,
+        expected_drop_minute=0,
+    )
+    slots_by_venue = {
+        first_choice.reservation_request.venue_id: [
+            SlotFactory.create(
+                date__start=ideal_datetime(first_choice) + timedelta(hours=1)
+            )
+        ],
+        second_choice.reservation_request.venue_id: [
+            SlotFactory.create(date__start=ideal_datetime(second_choice))
+        ],
+    }
+
+    api_access = MagicMock()
+    api_access.find_booking_slots.side_effect = lambda body: slots_by_venue[
+        body.venue_id
+    ]
+    api_access.get_booking_token.return_value = DetailsResponseBodyFactory.create()
+    api_access.book_slot.return_value = "resy-token"
+    runner = CampaignRunner(build_manager(api_access))
+
+    assert runner.make_reservation(campaign) == "resy-token"
+
+    assert api_access.find_booking_slots.call_count == 2
+    api_access.get_booking_token.assert_called_once()
+    details_request = api_access.get_booking_token.call_args[0][0]
+    expected_slot = slots_by_venue[first_choice.reservation_request.venue_id][0]
+    assert details_request.config_id == expected_slot.config.token
+    api_access.book_slot.assert_called_once()
+
+
+def test_falls_back_to_next_venue_when_booking_fails():
+    entries = [build_entry(priority=0), build_entry(priority=1)]
+    campaign = ReservationCampaign(
+        entries=entries, expected_drop_hour=10, expected_drop_minute=0
+    )
+
+    api_access = MagicMock()
+    api_access.find_booking_slots.side_effect = lambda body: [
+        SlotFactory.create(date__start=ideal_datetime(entries[0]))
+    ]
+    api_access.get_booking_token.side_effect = [
+        HTTPError("Failed to get selected slot details: 404"),
+        DetailsResponseBodyFactory.create(),
+    ]
+    api_access.book_slot.return_value = "resy-token"
+    runner = CampaignRunner(build_manager(api_access))
+
+    assert runner.make_reservation(campaign) == "resy-token"
+    assert api_access.get_booking_token.call_count == 2
+    api_access.book_slot.assert_called_once()
+
+
+def test_find_failure_skips_venue():
+    entries = [build_entry(priority=0), build_entry(priority=1)]
+    campaign = ReservationCampaign(
+        entries=entries, expected_drop_hour=10, expected_drop_minute=0
+    )
+    good_venue = entries[1].reservation_request.venue_id
+
+    def find(body):
+        if body.venue_id != good_venue:
+            raise HTTPError("Failed to find booking slots: 500")
+        return [SlotFactory.create(date__start=ideal_datetime(entries[1]))]
+
+    api_access = MagicMock()
+    api_access.find_booking_slots.side_effect = find
+    runner = CampaignRunner(build_manager(api_access))
+
+    candidates = runner.find_candidates(campaign)
+
+    assert len(candidates) == 1
+    assert candidates[0].entry == entries[1]
+
+
+def test_no_acceptable_slots():
+    campaign = ReservationCampaign(
+        entries=[build_entry(priority=0)],
+        expected_drop_hour=10,
+        expected_drop_minute=0,
+    )
+    api_access = MagicMock()
+    api_access.find_booking_slots.return_value = []
+    runner = CampaignRunner(build_manager(api_access))
+
+    with pytest.raises(NoSlotsError):
+        runner.make_reservation(campaign)
+
+    with pytest.raises(ExhaustedRetriesError):
+        runner.make_reservation_with_retries(campaign)
+
+    # the single attempt, then a find every 80-100ms until the 300ms deadline
+    assert 4 <= api_access.find_booking_slots.call_count <= 5
+
+
+def test_campaign_requires_entries():
+    with pytest.raises(ValueError):
+        ReservationCampaign(entries=[], expected_drop_hour=10, expected_drop_minute=0)
+
+
+def test_campaign_rejects_unknown_timezone():
+    with pytest.raises(ValueError):
+        ReservationCampaign(
+            entries=[build_entry(priority=0)],
+            expected_drop_hour=10,
+            expected_drop_minute=0,
+            timezone="Mars/Olympus_Mons",
+        )
+
+
+def test_find_candidates_reuses_one_executor():
+    entries = [build_entry(priority=0), build_entry(priority=1)]
+    campaign = ReservationCampaign(
+        entries=entries, expected_drop_hour=10, expected_drop_minute=0
+    )
+    api_access = MagicMock()
+    api_access.find_booking_slots.return_value = []
+    runner = CampaignRunner(build_manager(api_access))
+
+    runner.find_candidates(campaign)
+    executor = runner.executor
+    runner.find_candidates(campaign)
+
+    assert executor is not None
+    assert runner.executor is executor
+    runner.close()
+
+
+def test_skips_sold_out_venue():
+    entries = [build_entry(priority=0), build_entry(priority=1)]
+    campaign = ReservationCampaign(
+        entries=entries, expected_drop_hour=10, expected_drop_minute=0
+    )
+    sold_out_venue = entries[0].reservation_request.venue_id
+    calendar = MagicMock()
+    calendar.cached.side_effect = lambda venue_id, party_size: MagicMock(
+        is_sold_out=MagicMock(return_value=venue_id == sold_out_venue)
+    )
+    api_access = MagicMock()
+    api_access.find_booking_slots.side_effect = lambda body: [
+        SlotFactory.create(date__start=ideal_datetime(entries[1]))
+    ]
+    manager = build_manager(api_access)
+    manager.calendar = calendar
+    runner = CampaignRunner(manager)
+
+    candidates = runner.find_candidates(campaign)
+
+    assert [candidate.entry for candidate in candidates] == [entries[1]]
+    api_access.find_booking_slots.assert_called_once()
+
+
+def test_books_through_armed_requests_and_guard():
+    entry = build_entry(priority=0)
+    campaign = ReservationCampaign(
+        entries=[entry], expected_drop_hour=10, expected_drop_minute=0
+    )
+    slot = SlotFactory.create(date__start=ideal_datetime(entry))
+    details = DetailsResponseBodyFactory.create()
+    api_access = MagicMock()
+    api_access.send_find.return_value = [slot]
+    api_access.send_details.return_value = details
+    api_access.send_book.return_value = "resy-token"
+    manager = build_manager(api_access)
+    manager.booking_guard = BookingGuard()
+    runner = CampaignRunner(manager)
+    armed = runner.arm(campaign)
+
+    assert runner.make_reservation(campaign, armed) == "resy-token"
+
+    api_access.send_find.assert_called_once_with(armed[0])
+    api_access.send_details.assert_called_once_with(armed[0], slot)
+    api_access.send_book.assert_called_once_with(armed[0], details)
+    api_access.find_booking_slots.assert_not_called()
+    assert manager.booking_guard.booked
+    with pytest.raises(AlreadyBookedError):
+        runner.make_reservation(campaign, armed)
+
+
+@patch("resy_bot.campaign.CampaignRunner.make_reservation_with_retries")
+def test_make_reservation_at_opening_time(mock_make_reservation):
+    campaign = ReservationCampaign(
+        entries=[build_entry(priority=0)],
+        expected_drop_hour=10,
+        expected_drop_minute=0,
+        timezone="Asia/Tokyo",
+    )
+    manager = MagicMock()
+    manager.target.side_effect = lambda request: request
+    calls = []
+    manager.preflight.side_effect = lambda drop_time: calls.append("preflight")
+    manager.arm.side_effect = lambda request: calls.append("arm") or "armed"
+    runner = CampaignRunner(manager)
+
+    runner.make_reservation_at_opening_time(campaign)
+
+    drop_time = drop_time_today(10, 0, "Asia/Tokyo")
+    assert calls == ["preflight", "arm"]
+    manager.preflight.assert_called_once_with(drop_time)
+    assert manager.wait_for_drop.call_args[0][0] == drop_time
+    mock_make_reservation.assert_called_once_with(campaign, ["armed"])
+    runner.close()
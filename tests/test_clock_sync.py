@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import MagicMock
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.clock_sync import (
+    ClockEstimate,
+    ClockSample,
+    ClockSynchronizer,
+    estimate_clock,
+)
+from resy_bot.stand_in import StandInResyServer
+from tests.factories import ResyConfigFactory
+
+
+def test_estimate_clock_intersects_bounds():
+    # true offset is +2.3s, samples straddle the server's second boundary
+    samples = [
+        ClockSample(sent=100.0, received=100.2, server_date=102.0),
+        ClockSample(sent=100.6, received=100.8, server_date=102.0),
+        ClockSample(sent=100.7, received=100.9, server_date=103.0),
+    ]
+
+    estimate = estimate_clock(samples)
+
+    # offset must be in [103.0 - 100.9, 102.0 + 1 - 100.6] = [2.1, 2.4]
+    assert estimate.offset == pytest.approx(2.25)
+    assert estimate.uncertainty == pytest.approx(0.15)
+    assert estimate.one_way_latency == pytest.approx(0.1)
+    assert estimate.n_samples == 3
+
+
+def test_estimate_clock_inconsistent_samples():
+    samples = [
+        ClockSample(sent=100.0, received=100.1, server_date=100.0),
+        ClockSample(sent=101.0, received=101.1, server_date=105.0),
+    ]
+
+    estimate = estimate_clock(samples)
+
+    assert estimate.offset == pytest.approx(2.45)
+    assert estimate.uncertainty == 0.5
+
+
+def test_estimate_clock_no_samples():
+    with pytest.raises(ValueError):
+        estimate_clock([])
+
+
+def test_local_fire_time():
+    estimate = ClockEstimate(
+        offset=1.5, uncertainty=0.01, one_way_latency=0.02, n_samples=8
+    )
+    drop_time = datetime(2023, 3, 30, 10, 0)
+
+    fire_time = estimate.local_fire_time(drop_time)
+
+    assert drop_time - fire_time == timedelta(seconds=1.52)
+
+
+def test_sample_without_date_header():
+    api_access = MagicMock()
+    api_access.ping.return_value = None
+    clock_sync = ClockSynchronizer(api_access)
+
+    with pytest.raises(ValueError):
+        clock_sync.sample()
+
+
+@pytest.mark.parametrize("clock_skew", [-42.7, 3.4])
+def test_calibrate_against_skewed_stand_in(clock_skew):
+    config = ResyConfigFactory.create()
+
+    with StandInResyServer(clock_skew=clock_skew, latency=0.01) as server:
+        api_access = ResyApiAccess.build(config, base_url=server.base_url)
+        clock_sync = ClockSynchronizer(api_access, n_samples=9, spacing=0.12)
+
+        estimate = clock_sync.calibrate()
+
+    assert estimate.offset == pytest.approx(clock_skew, abs=0.15)
+    assert estimate.one_way_latency >= 0.005
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from resy_bot.compact import CompactSlot, compact_slots
+from tests.factories import SlotFactory
+
+
+def test_round_trip_is_lossless():
+    slots = SlotFactory.create_batch(10)
+
+    compacted = compact_slots(slots)
+
+    assert [compact.to_slot() for compact in compacted] == slots
+
+
+def test_type_and_id_strings_are_interned():
+    first, second = SlotFactory.create_batch(
+        2, config__type="Dining Room", config__id="1234"
+    )
+    # make sure the source strings are distinct objects
+    second.config.type = "".join(["Dining", " Room"])
+
+    first_compact = CompactSlot.from_slot(first)
+    second_compact = CompactSlot.from_slot(second)
+
+    assert first_compact.config_type is second_compact.config_type
+    assert first_compact.config_id is second_compact.config_id
+
+
+def test_start_and_end_are_integers():
+    slot = SlotFactory.create(
+        date__start=datetime(2023, 3, 30, 19, 0),
+        date__end=datetime(2023, 3, 30, 21, 0, 0, 5),
+    )
+
+    compact = CompactSlot.from_slot(slot)
+
+    assert isinstance(compact.start, int)
+    assert compact.end - compact.start == 2 * 60 * 60 * 1_000_000 + 5
+    assert compact.start_datetime == slot.date.start
+    assert compact.end_datetime == slot.date.end
+
+
+def test_equality_and_hash():
+    slot = SlotFactory.create()
+
+    assert CompactSlot.from_slot(slot) == CompactSlot.from_slot(slot)
+    assert len({CompactSlot.from_slot(slot), CompactSlot.from_slot(slot)}) == 1
+
+
+def test_timezone_aware_datetimes_rejected():
+    slot = SlotFactory.create(date__start=datetime(2023, 3, 30, tzinfo=timezone.utc))
+
+    with pytest.raises(ValueError):
+        CompactSlot.from_slot(slot)
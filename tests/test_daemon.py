@@ -0,0 +1,211 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pydantic import ValidationError
+from requests import HTTPError
+
+from resy_bot.daemon import DropDaemon, TimerQueue
+from resy_bot.errors import ExhaustedRetriesError
+from resy_bot.models import DaemonConfig, ScheduledDrop, TimedReservationRequest
+
+from tests.factories import (
+    ReservationRequestFactory,
+    ResyConfigFactory,
+    TimedReservationRequestFactory,
+)
+
+
+def test_timer_queue_runs_in_deadline_order():
+    timers = TimerQueue()
+    ran = []
+    now = time.monotonic()
+
+    timers.schedule(now + 0.06, lambda: ran.append("second"))
+    timers.schedule(now + 0.03, lambda: ran.append("first"))
+    timers.schedule(now - 1, lambda: ran.append("overdue"))
+    timers.run()
+
+    assert ran == ["overdue", "first", "second"]
+    assert time.monotonic() >= now + 0.06
+    assert len(timers) == 0
+
+
+def test_timer_queue_wakes_for_earlier_timer():
+    timers = TimerQueue()
+    ran = []
+    timers.schedule(time.monotonic() + 60, lambda: ran.append("later"))
+
+    runner = threading.Thread(target=timers.run)
+    runner.start()
+    time.sleep(0.02)
+
+    timers.schedule(time.monotonic() + 0.02, timers.stop)
+    runner.join(timeout=1)
+
+    assert not runner.is_alive()
+    assert ran == []
+    assert len(timers) == 1
+
+
+def test_timer_queue_idles_without_cpu():
+    timers = TimerQueue()
+    timers.schedule(time.monotonic() + 0.3, lambda: None)
+
+    cpu_before = time.process_time()
+    timers.run()
+
+    assert time.process_time() - cpu_before < 0.05
+
+
+def scheduled_drop(account="main"):
+    return ScheduledDrop(
+        account=account, timed_request=TimedReservationRequestFactory.create()
+    )
+
+
+def test_daemon_arms_ahead_and_fires_at_drop():
+    manager = MagicMock()
+    manager.target.side_effect = lambda request: request
+    manager.make_reservation_at.return_value = "resy-token"
+    daemon = DropDaemon({"main": manager}, arm_lead_seconds=0.05)
+    drop = scheduled_drop()
+    drop_time = datetime.now() + timedelta(seconds=0.1)
+
+    with patch("resy_bot.daemon.next_drop_time", return_value=drop_time):
+        assert daemon.schedule(drop) == drop_time
+
+    started = time.monotonic()
+    outcomes = daemon.run()
+
+    assert 0.04 <= time.monotonic() - started
+    manager.preflight.assert_called_once_with(drop_time)
+    manager.arm.assert_called_once_with(drop.timed_request.reservation_request)
+    manager.make_reservation_at.assert_called_once_with(
+        drop_time,
+        drop.timed_request.reservation_request,
+        manager.arm.return_value,
+        drop.timed_request.timezone,
+    )
+    assert outcomes == [(drop, "resy-token")]
+
+
+def test_daemon_records_failures():
+    failing_arm = MagicMock()
+    failing_arm.preflight.side_effect = HTTPError("Failed to get auth: 419")
+    failing_fire = MagicMock()
+    failing_fire.make_reservation_at.side_effect = ExhaustedRetriesError("Gave up")
+    daemon = DropDaemon(
+        {"bad-auth": failing_arm, "sold-out": failing_fire}, arm_lead_seconds=0
+    )
+
+    drops = [scheduled_drop("bad-auth"), scheduled_drop("sold-out")]
+    with patch("resy_bot.daemon.next_drop_time", return_value=datetime.now()):
+        for drop in drops:
+            daemon.schedule(drop)
+
+    outcomes = {drop.account: outcome for drop, outcome in daemon.run()}
+
+    assert isinstance(outcomes["bad-auth"], HTTPError)
+    failing_arm.make_reservation_at.assert_not_called()
+    assert isinstance(outcomes["sold-out"], ExhaustedRetriesError)
+
+
+def test_daemon_slow_arm_doesnt_hold_up_other_drops():
+    released = threading.Event()
+    slow = MagicMock()
+    slow.preflight.side_effect = lambda drop_time: released.wait(5)
+    fast = MagicMock()
+    fast.make_reservation_at.side_effect = lambda *args: released.set() or "resy-token"
+    daemon = DropDaemon({"slow": slow, "fast": fast}, arm_lead_seconds=0)
+
+    with patch("resy_bot.daemon.next_drop_time", return_value=datetime.now()):
+        daemon.schedule(scheduled_drop("slow"))
+        daemon.schedule(scheduled_drop("fast"))
+
+    started = time.monotonic()
+    outcomes = {drop.account: outcome for drop, outcome in daemon.run()}
+
+    assert time.monotonic() - started < 1
+    assert outcomes["fast"] == "resy-token"
+
+
+def test_daemon_arms_one_drop_per_account_at_a_time():
+    arming = []
+    overlapped = threading.Event()
+
+    def preflight(drop_time):
+        arming.append(drop_time)
+        if len(arming) > 1:
+            overlapped.set()
+        time.sleep(0.05)
+        arming.pop()
+
+    manager = MagicMock()
+    manager.preflight.side_effect = preflight
+    manager.make_reservation_at.return_value = "resy-token"
+    daemon = DropDaemon({"main": manager}, arm_lead_seconds=0)
+
+    with patch("resy_bot.daemon.next_drop_time", return_value=datetime.now()):
+        daemon.schedule(scheduled_drop())
+        daemon.schedule(scheduled_drop())
+
+    outcomes = daemon.run()
+
+    assert not overlapped.is_set()
+    assert [outcome for _, outcome in outcomes] == ["resy-token"] * 2
+
+
+def test_daemon_schedule_unknown_account():
+    daemon = DropDaemon({"main": MagicMock()})
+
+    with pytest.raises(ValueError):
+        daemon.schedule(scheduled_drop("other"))
+
+
+@patch("resy_bot.daemon.ResyManager")
+def test_daemon_build_shares_manager_per_account(mock_manager):
+    config = DaemonConfig(
+        accounts={
+            "main": ResyConfigFactory.create(),
+            "backup": ResyConfigFactory.create(),
+        },
+        drops=[scheduled_drop("main"), scheduled_drop("main"), scheduled_drop()],
+    )
+
+    daemon = DropDaemon.build(config)
+
+    assert set(daemon.managers) == {"main", "backup"}
+    assert mock_manager.build.call_count == 2
+    assert len(daemon.timers) == 3
+
+
+@patch("resy_bot.daemon.ResyManager")
+def test_daemon_build_fast_decode(mock_manager):
+    config = DaemonConfig(
+        accounts={"main": ResyConfigFactory.create()}, drops=[scheduled_drop("main")]
+    )
+
+    DropDaemon.build(config, fast_decode=True)
+
+    assert mock_manager.build.call_args.kwargs["fast_decode"]
+
+
+def test_daemon_config_rejects_unknown_account():
+    with pytest.raises(ValidationError):
+        DaemonConfig(
+            accounts={"main": ResyConfigFactory.create()},
+            drops=[scheduled_drop("other")],
+        )
+
+
+def test_timed_request_rejects_unknown_time_zone():
+    with pytest.raises(ValidationError):
+        TimedReservationRequest(
+            reservation_request=ReservationRequestFactory.create(),
+            expected_drop_hour=9,
+            expected_drop_minute=0,
+            timezone="Mars/Olympus_Mons",
+        )
@@ -0,0 +1,95 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from resy_bot.booking_guard import BookingGuard
+from resy_bot.errors import ExhaustedRetriesError
+from resy_bot.fanout import MultiAccountRunner
+from resy_bot.manager import ResyManager
+from resy_bot.models import ReservationRetriesConfig
+from tests.factories import (
+    DetailsResponseBodyFactory,
+    ReservationRequestFactory,
+    ResyConfigFactory,
+    SlotFactory,
+)
+
+
+def build_manager(guard: BookingGuard, find_delay: float) -> ResyManager:
+    slots = SlotFactory.create_batch(1)
+
+    def find(body):
+        time.sleep(find_delay)
+        return slots
+
+    api_access = MagicMock()
+    api_access.find_booking_slots.side_effect = find
+    api_access.get_booking_token.return_value = DetailsResponseBodyFactory.create()
+    api_access.book_slot.return_value = f"token-{find_delay}"
+    selector = MagicMock()
+    selector.select.return_value = slots[0]
+    retry_config = ReservationRetriesConfig(
+        seconds_between_retries=0.1, retry_duration=1
+    )
+    return ResyManager(
+        ResyConfigFactory.create(),
+        api_access,
+        selector,
+        retry_config,
+        booking_guard=guard,
+    )
+
+
+def test_build():
+    configs = ResyConfigFactory.create_batch(3)
+
+    runner = MultiAccountRunner.build(configs)
+
+    assert len(runner.managers) == 3
+    assert all(manager.booking_guard is runner.guard for manager in runner.managers)
+    sessions = {id(manager.api_access.session) for manager in runner.managers}
+    assert len(sessions) == 3
+
+
+def test_first_account_to_book_wins():
+    guard = BookingGuard()
+    managers = [build_manager(guard, delay) for delay in (0.2, 0.01, 0.1)]
+    runner = MultiAccountRunner(managers, guard)
+
+    resy_token = runner.make_reservation_with_retries(
+        ReservationRequestFactory.create()
+    )
+    time.sleep(0.3)
+
+    assert resy_token == "token-0.01"
+    assert guard.winner == managers[1].config.email
+    booked = [manager.api_access.book_slot.call_count for manager in managers]
+    assert booked == [0, 1, 0]
+
+
+def test_all_accounts_fail():
+    guard = BookingGuard()
+    managers = [build_manager(guard, 0) for _ in range(2)]
+    for manager in managers:
+        manager.api_access.find_booking_slots.side_effect = None
+        manager.api_access.find_booking_slots.return_value = []
+    runner = MultiAccountRunner(managers, guard)
+
+    with pytest.raises(ExhaustedRetriesError):
+        runner.make_reservation_with_retries(ReservationRequestFactory.create())
+
+    assert not guard.booked
+
+
+def test_make_reservation_stops_once_another_account_booked():
+    guard = BookingGuard()
+    guard.book("other@example.com", lambda: "resy-token")
+    manager = build_manager(guard, 0)
+
+    runner = MultiAccountRunner([manager], guard)
+
+    with pytest.raises(ExhaustedRetriesError):
+        runner.make_reservation_with_retries(ReservationRequestFactory.create())
+
+    manager.api_access.find_booking_slots.assert_not_called()
@@ -0,0 +1,61 @@
+import json
+from datetime import datetime
+
+from resy_bot.fast_decode import decode_find_slots
+from resy_bot.models import FindResponseBody
+from resy_bot.stand_in import render_find_response
+from tests.factories import FindResponseBodyFactory, SlotFactory
+
+
+def test_decode_matches_strict_parse():
+    expected_resp = FindResponseBodyFactory.create(
+        results__venues__0__slots=SlotFactory.create_batch(5)
+    )
+    raw = expected_resp.json().encode()
+
+    slots = decode_find_slots(raw)
+
+    assert slots == expected_resp.results.venues[0].slots
+
+
+def test_decode_resy_wire_format():
+    slots = SlotFactory.create_batch(3, date__start=datetime(2023, 3, 30, 19, 0))
+    for slot in slots:
+        slot.date.end = datetime(2023, 3, 30, 21, 0)
+    raw = json.dumps(render_find_response("12345", slots)).encode()
+
+    decoded = decode_find_slots(raw)
+
+    assert decoded == FindResponseBody(**json.loads(raw)).results.venues[0].slots
+    assert decoded == slots
+
+
+def test_decode_coerces_numeric_config_id():
+    raw = json.dumps(
+        {
+            "results": {
+                "venues": [
+                    {
+                        "slots": [
+                            {
+                                "config": {"id": 123, "type": "Bar", "token": "abc"},
+                                "date": {
+                                    "start": "2023-03-30 19:00:00",
+                                    "end": "2023-03-30 21:00:00",
+                                },
+                            }
+                        ]
+                    }
+                ]
+            }
+        }
+    ).encode()
+
+    slots = decode_find_slots(raw)
+
+    assert slots[0].config.id == "123"
+    assert slots[0].date.start == datetime(2023, 3, 30, 19, 0)
+
+
+def test_decode_no_venues():
+    assert decode_find_slots(b'{"results": {"venues": []}}') == []
@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock
+
+from resy_bot.compact import CompactSlot
+from resy_bot.find_changes import FindChanges, find_fingerprint
+from tests.factories import SlotFactory
+
+
+def response(content=b"{}", **headers):
+    resp = MagicMock()
+    resp.headers = headers
+    resp.content = content
+    return resp
+
+
+def test_fingerprint_prefers_etag():
+    resp = response(ETag='"abc"', **{"Last-Modified": "Thu, 30 Mar 2023 09:00:00 GMT"})
+
+    assert find_fingerprint(resp) == ("If-None-Match", '"abc"')
+
+
+def test_fingerprint_last_modified():
+    resp = response(**{"Last-Modified": "Thu, 30 Mar 2023 09:00:00 GMT"})
+
+    assert find_fingerprint(resp) == (
+        "If-Modified-Since",
+        "Thu, 30 Mar 2023 09:00:00 GMT",
+    )
+
+
+def test_fingerprint_hashes_body_without_validators():
+    assert find_fingerprint(response(b'{"a": 1}')) == find_fingerprint(
+        response(b'{"a": 1}')
+    )
+    assert find_fingerprint(response(b'{"a": 1}')) != find_fingerprint(
+        response(b'{"a": 2}')
+    )
+
+
+def test_conditional_headers():
+    changes = FindChanges()
+    assert changes.conditional_headers() == {}
+
+    changes.update([], ("If-None-Match", '"abc"'))
+    assert changes.conditional_headers() == {"If-None-Match": '"abc"'}
+
+    changes.update([], 1234)
+    assert changes.conditional_headers() == {}
+
+
+def test_unchanged():
+    changes = FindChanges()
+    changes.update([], 1234)
+
+    assert changes.unchanged(1234)
+    assert not changes.unchanged(5678)
+
+
+def test_update_diffs_added_and_removed():
+    kept, gone, new = SlotFactory.create_batch(3)
+    changes = FindChanges()
+
+    first = changes.update([kept, gone])
+    assert first.added == [kept, gone]
+    assert first.removed == []
+
+    diff = changes.update([kept, new])
+    assert diff.added == [new]
+    assert diff.removed == [gone]
+    assert not changes.update([kept, new])
+
+
+def test_update_only_keeps_slots_in_scope():
+    wanted, other = SlotFactory.create_batch(2)
+    changes = FindChanges(lambda slot: slot is wanted)
+
+    diff = changes.update([wanted, other])
+
+    assert diff.added == [wanted]
+    assert list(changes.slots.values()) == [CompactSlot.from_slot(wanted)]
+    assert not changes.update([wanted])
+
+
+def test_listeners_only_hear_changes():
+    slot = SlotFactory.create()
+    changes = FindChanges()
+    heard = []
+    changes.subscribe(heard.append)
+
+    changes.update([slot])
+    changes.update([slot])
+    changes.update([])
+
+    assert [(diff.added, diff.removed) for diff in heard] == [
+        ([slot], []),
+        ([], [slot]),
+    ]
+
+
+def test_update_keeps_compact_slots_between_finds():
+    kept, gone = SlotFactory.create_batch(2)
+    changes = FindChanges()
+    changes.update([kept, gone])
+    compact = changes.slots[kept.config.token]
+
+    diff = changes.update([kept])
+
+    assert diff.removed == [gone]
+    assert changes.slots == {kept.config.token: compact}
+    assert changes.slots[kept.config.token] is compact
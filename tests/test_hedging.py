@@ -0,0 +1,111 @@
+import time
+from threading import Lock
+from unittest.mock import MagicMock
+
+import pytest
+from requests import HTTPError
+
+from resy_bot.errors import NoSlotsError
+from resy_bot.hedging import HedgedFinder
+from resy_bot.models import ReservationRetriesConfig
+from tests.factories import SlotFactory
+
+
+def build_retry_config(**kwargs) -> ReservationRetriesConfig:
+    return ReservationRetriesConfig(
+        seconds_between_retries=0.05, retry_duration=1, **kwargs
+    )
+
+
+class SlowFind:
+    """
+    fake find returning each scripted (delay, slots) in turn
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.sent_at = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = Lock()
+
+    def __call__(self):
+        with self._lock:
+            delay, result = self.script[len(self.sent_at)]
+            self.sent_at.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(delay)
+
+        with self._lock:
+            self.in_flight -= 1
+
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_first_response_with_slots_wins():
+    slow_slots = SlotFactory.create_batch(2)
+    fast_slots = SlotFactory.create_batch(2)
+    find = SlowFind([(0.5, slow_slots), (0.01, fast_slots), (0.5, slow_slots)])
+    retry_config = build_retry_config(hedge_window=3, hedge_budget=3)
+    finder = HedgedFinder(retry_config)
+
+    started = time.monotonic()
+    slots = finder.find(find)
+
+    assert slots == fast_slots
+    assert time.monotonic() - started < 0.4
+    finder.close()
+
+
+def test_window_and_spacing():
+    find = SlowFind([(0.05, [])] * 6)
+    retry_config = build_retry_config(
+        hedge_window=2, hedge_spacing_ms=20, hedge_budget=6
+    )
+    finder = HedgedFinder(retry_config)
+
+    with pytest.raises(NoSlotsError):
+        finder.find(find)
+
+    gaps = [b - a for a, b in zip(find.sent_at, find.sent_at[1:])]
+    assert len(find.sent_at) == 6
+    assert find.max_in_flight == 2
+    assert min(gaps) >= 0.019
+    finder.close()
+
+
+def test_errors_are_hedged_too():
+    slots = SlotFactory.create_batch(1)
+    find = SlowFind(
+        [(0.01, HTTPError("Failed to find booking slots: 500")), (0.03, slots)]
+    )
+    finder = HedgedFinder(build_retry_config(hedge_window=2, hedge_budget=2))
+
+    assert finder.find(find) == slots
+    finder.close()
+
+
+def test_all_errors_raises_last_error():
+    find = MagicMock(side_effect=HTTPError("Failed"))
+    finder = HedgedFinder(build_retry_config(hedge_window=2, hedge_budget=4))
+
+    with pytest.raises(HTTPError):
+        finder.find(find)
+
+    assert find.call_count == 4
+    finder.close()
+
+
+def test_hedge_lead_seconds():
+    retry_config = build_retry_config(hedge_window=5, hedge_spacing_ms=10)
+
+    assert retry_config.hedging_enabled
+    assert retry_config.hedge_lead_seconds == pytest.approx(0.02)
+
+
+def test_hedging_disabled_by_default():
+    assert not build_retry_config().hedging_enabled
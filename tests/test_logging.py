@@ -0,0 +1,100 @@
+import io
+import logging
+import sys
+
+import pytest
+
+from resy_bot import logging as resy_logging
+from resy_bot.logging import DropWindow, DropWindowSampler, LazyQueueHandler
+
+logger = logging.getLogger("resy_bot.test_logging")
+logger.setLevel("INFO")
+
+
+@pytest.fixture
+def stream():
+    stream = io.StringIO()
+    resy_logging.configure(stream)
+    yield stream
+    resy_logging.flush()
+    resy_logging.configure(sys.stdout)
+
+
+def test_lazy_queue_handler_does_not_format():
+    handler = LazyQueueHandler(None)
+    record = logging.LogRecord(
+        "name", logging.INFO, __file__, 1, "found %d slots", (3,), None
+    )
+
+    prepared = handler.prepare(record)
+
+    assert prepared is record
+    assert prepared.msg == "found %d slots"
+    assert prepared.args == (3,)
+
+
+def test_logs_through_queue(stream):
+    logger.info("found %d slots", 3)
+    resy_logging.flush()
+
+    assert "INFO:resy_bot.test_logging:found 3 slots" in stream.getvalue()
+
+
+def test_urllib3_debug_not_logged(stream):
+    logging.getLogger("urllib3.connectionpool").debug("GET /4/find 200")
+    resy_logging.flush()
+
+    assert stream.getvalue() == ""
+
+
+def test_sampler_keeps_first_of_each_message():
+    sampler = DropWindowSampler(sample=2)
+
+    def record(msg, level=logging.INFO):
+        return logging.LogRecord("name", level, __file__, 1, msg, (), None)
+
+    passed = [sampler.filter(record("no slots")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert sampler.filter(record("booked"))
+    assert sampler.filter(record("no slots", logging.WARNING))
+
+    assert sampler.summaries() == ["name: 3 more of 'no slots'"]
+
+
+def test_drop_window_holds_writes_until_closed(stream):
+    with DropWindow(sample=2):
+        for attempt in range(10):
+            logger.info("attempt %d found no slots", attempt)
+        logger.warning("details failed")
+        resy_logging.flush()
+
+        assert stream.getvalue() == ""
+
+    resy_logging.flush()
+    output = stream.getvalue()
+
+    assert "attempt 0 found no slots" in output
+    assert "attempt 1 found no slots" in output
+    assert "attempt 2 found no slots" not in output
+    assert "details failed" in output
+    assert (
+        "suppressed resy_bot.test_logging: 8 more of 'attempt %d found no slots'"
+        in output
+    )
+
+
+def test_drop_windows_share_one_hold(stream):
+    first = DropWindow()
+    second = DropWindow()
+    first.open()
+    second.open()
+
+    logger.info("booking")
+    first.close()
+    first.close()
+    resy_logging.flush()
+    assert stream.getvalue() == ""
+
+    second.close()
+    resy_logging.flush()
+    assert "booking" in stream.getvalue()
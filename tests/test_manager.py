@@ -1,19 +1,34 @@
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta
 import pytest
+from requests import ConnectionError, HTTPError
 from unittest.mock import MagicMock, patch
 
-from resy_bot.errors import NoSlotsError, ExhaustedRetriesError
+from resy_bot import logging as resy_logging
+from resy_bot.errors import NoSlotsError, ExhaustedRetriesError, SoldOutError
 from resy_bot.api_access import ResyApiAccess
 from resy_bot.models import (
+    BackoffConfig,
     FindRequestBody,
     DetailsRequestBody,
     BookRequestBody,
     PaymentMethod,
     ReservationRetriesConfig,
+    ConnectionPoolConfig,
 )
+from resy_bot.auth import CachedToken
+from resy_bot.book_tokens import BookTokenCache
+from resy_bot.calendar import CalendarCache
+from resy_bot.constants import ResyEndpoints
 from resy_bot.manager import ResyManager
+from resy_bot.scheduler import DropScheduler
+from resy_bot.clock_sync import ClockEstimate, ClockSynchronizer
+from resy_bot.retry import RetryEngine
+from resy_bot.stand_in import StandInResyServer, generate_slots
+from resy_bot.selectors import IndexedSelector
 
 from tests.factories import (
+    FakeClock,
     ResyConfigFactory,
     SlotFactory,
     ReservationRequestFactory,
@@ -21,6 +36,7 @@ from tests.factories import (
     ReservationRetriesConfigFactory,
     TimedReservationRequestFactory,
     ReservationRequestDaysInAdvanceFactory,
+    BookTokenFactory,
 )
 
 
@@ -30,6 +46,13 @@ def test_build():
 
     assert isinstance(manager, ResyManager)
     assert isinstance(manager.api_access, ResyApiAccess)
+    assert not manager.api_access.fast_decode
+
+
+def test_build_fast_decode():
+    manager = ResyManager.build(ResyConfigFactory.create(), fast_decode=True)
+
+    assert manager.api_access.fast_decode
 
 
 def test_make_reservation():
@@ -139,12 +162,20 @@ def test_make_reservation_no_slots():
         manager.make_reservation(request)
 
 
-@patch("resy_bot.manager.ResyManager.make_reservation")
-def test_make_reservation_with_retries(mock_make_reservation):
-    config = ResyConfigFactory.create()
-    mock_make_reservation.side_effect = NoSlotsError
+def build_manager_with_fake_clock(api_access, retry_config, selector=None):
+    manager = ResyManager(
+        ResyConfigFactory.create(), api_access, selector or MagicMock(), retry_config
+    )
+    clock = FakeClock()
+    manager.retry_engine = RetryEngine(
+        retry_config, clock=clock.monotonic, sleep=clock.sleep
+    )
+    return manager
+
+
+def test_make_reservation_with_retries():
     mock_api_access = MagicMock()
-    mock_selector = MagicMock()
+    mock_api_access.find_booking_slots.return_value = []
     retry_config = ReservationRetriesConfig(
         seconds_between_retries=0.1,
         retry_duration=1,
@@ -152,12 +183,456 @@ def test_make_reservation_with_retries(mock_make_reservation):
 
     request = ReservationRequestFactory.create()
 
-    manager = ResyManager(config, mock_api_access, mock_selector, retry_config)
+    manager = build_manager_with_fake_clock(mock_api_access, retry_config)
 
     with pytest.raises(ExhaustedRetriesError):
         manager.make_reservation_with_retries(request)
 
-    assert mock_make_reservation.call_count == 10
+    # finds are spaced 80-100ms apart over a one second deadline
+    assert 10 <= mock_api_access.find_booking_slots.call_count <= 13
+
+
+def test_make_reservation_with_retries_resumes_failed_book():
+    retry_config = ReservationRetriesConfigFactory.create()
+    mock_api_access = MagicMock()
+    slots = SlotFactory.create_batch(2)
+    mock_api_access.find_booking_slots.return_value = slots
+    mock_api_access.get_booking_token.return_value = DetailsResponseBodyFactory.create()
+    mock_api_access.book_slot.side_effect = [
+        HTTPError("Failed to book slot: 503", response=MagicMock(status_code=503)),
+        "resy-token",
+    ]
+    mock_selector = MagicMock()
+    mock_selector.select.return_value = slots[0]
+
+    manager = build_manager_with_fake_clock(
+        mock_api_access, retry_config, mock_selector
+    )
+
+    assert (
+        manager.make_reservation_with_retries(ReservationRequestFactory.create())
+        == "resy-token"
+    )
+    assert mock_api_access.find_booking_slots.call_count == 1
+    assert mock_api_access.get_booking_token.call_count == 1
+    assert mock_api_access.book_slot.call_count == 2
+
+
+def test_make_reservation_with_retries_starts_over_when_slot_gone():
+    retry_config = ReservationRetriesConfigFactory.create()
+    mock_api_access = MagicMock()
+    slots = SlotFactory.create_batch(2)
+    mock_api_access.find_booking_slots.return_value = slots
+    mock_api_access.get_booking_token.side_effect = [
+        HTTPError("Failed", response=MagicMock(status_code=404)),
+        DetailsResponseBodyFactory.create(),
+    ]
+    mock_api_access.book_slot.return_value = "resy-token"
+    mock_selector = MagicMock()
+    mock_selector.select.return_value = slots[0]
+
+    manager = build_manager_with_fake_clock(
+        mock_api_access, retry_config, mock_selector
+    )
+
+    manager.make_reservation_with_retries(ReservationRequestFactory.create())
+
+    assert mock_api_access.find_booking_slots.call_count == 2
+
+
+def details_expiring_in(seconds):
+    return DetailsResponseBodyFactory.create(
+        book_token=BookTokenFactory.create(
+            date_expires=datetime.now() + timedelta(seconds=seconds)
+        )
+    )
+
+
+def build_manager_with_book_tokens(book_results, details):
+    retry_config = ReservationRetriesConfigFactory.create(
+        book_backoff=BackoffConfig(max_attempts=1)
+    )
+    mock_api_access = MagicMock()
+    slots = SlotFactory.create_batch(2)
+    mock_api_access.find_booking_slots.return_value = slots
+    mock_api_access.get_booking_token.side_effect = details
+    mock_api_access.book_slot.side_effect = book_results
+    mock_selector = MagicMock()
+    mock_selector.select.return_value = slots[0]
+
+    manager = build_manager_with_fake_clock(
+        mock_api_access, retry_config, mock_selector
+    )
+    manager.book_tokens = BookTokenCache()
+    return manager, mock_api_access
+
+
+def test_book_selected_slot():
+    slot = SlotFactory.create()
+    details = DetailsResponseBodyFactory.create()
+    mock_api_access = MagicMock()
+    mock_api_access.send_details.return_value = details
+    mock_api_access.send_book.return_value = "resy-token"
+    manager = ResyManager(
+        ResyConfigFactory.create(),
+        mock_api_access,
+        MagicMock(),
+        ReservationRetriesConfigFactory.create(),
+    )
+    armed = MagicMock()
+    request = ReservationRequestFactory.create()
+
+    assert manager.book(request, slot, armed) == "resy-token"
+    mock_api_access.send_details.assert_called_once_with(armed, slot)
+    mock_api_access.send_book.assert_called_once_with(armed, details)
+
+    # a book token already in hand isn't fetched again
+    assert manager.book(request, slot, armed, details=details) == "resy-token"
+    mock_api_access.send_details.assert_called_once()
+
+
+def test_make_reservation_with_retries_reuses_book_token():
+    manager, mock_api_access = build_manager_with_book_tokens(
+        [
+            HTTPError("Failed to book slot: 503", response=MagicMock(status_code=503)),
+            "resy-token",
+        ],
+        [details_expiring_in(300)],
+    )
+
+    assert (
+        manager.make_reservation_with_retries(ReservationRequestFactory.create())
+        == "resy-token"
+    )
+    # the book ran out of attempts, so the reservation started over
+    assert mock_api_access.find_booking_slots.call_count == 2
+    assert mock_api_access.get_booking_token.call_count == 1
+    first, second = manager.tracer.traces
+    assert first.counters == {"book_token_cache_miss": 1}
+    assert second.counters == {"book_token_cache_hit": 1}
+    assert len(manager.book_tokens) == 0
+
+
+def test_make_reservation_with_retries_refetches_expired_book_token():
+    manager, mock_api_access = build_manager_with_book_tokens(
+        [
+            HTTPError("Failed to book slot: 503", response=MagicMock(status_code=503)),
+            "resy-token",
+        ],
+        [details_expiring_in(1), details_expiring_in(300)],
+    )
+
+    assert (
+        manager.make_reservation_with_retries(ReservationRequestFactory.create())
+        == "resy-token"
+    )
+    # the fresh token was booked with, only the cached one was expired
+    assert mock_api_access.get_booking_token.call_count == 2
+    assert mock_api_access.book_slot.call_count == 2
+
+
+def test_make_reservation_with_retries_books_fresh_token_without_expiry_check():
+    manager, mock_api_access = build_manager_with_book_tokens(
+        ["resy-token"], [details_expiring_in(300)]
+    )
+    # a clock far enough ahead that every token looks expired
+    manager.book_tokens.now = lambda tz=None: datetime.now(tz) + timedelta(hours=9)
+
+    assert (
+        manager.make_reservation_with_retries(
+            ReservationRequestFactory.create(), timezone="America/New_York"
+        )
+        == "resy-token"
+    )
+    assert mock_api_access.get_booking_token.call_count == 1
+    assert mock_api_access.book_slot.call_count == 1
+
+
+def test_make_reservation_with_retries_drops_book_token_when_slot_gone():
+    manager, mock_api_access = build_manager_with_book_tokens(
+        [
+            HTTPError("Failed to book slot: 412", response=MagicMock(status_code=412)),
+            "resy-token",
+        ],
+        [details_expiring_in(300), details_expiring_in(300)],
+    )
+
+    manager.make_reservation_with_retries(ReservationRequestFactory.create())
+
+    assert mock_api_access.get_booking_token.call_count == 2
+
+
+def build_manager_with_ranked_slots(details, book_results):
+    request = ReservationRequestFactory.create(
+        preferred_type=None, prefer_early=True, window_hours=2
+    )
+    ideal = datetime.combine(request.ideal_date, datetime.min.time()).replace(
+        hour=request.ideal_hour, minute=request.ideal_minute
+    )
+    slots = [
+        SlotFactory.create(date__start=ideal + timedelta(minutes=offset))
+        for offset in [0, 15, 60]
+    ]
+    mock_api_access = MagicMock()
+    mock_api_access.find_booking_slots.return_value = slots
+    mock_api_access.get_booking_token.side_effect = details
+    mock_api_access.book_slot.side_effect = book_results
+
+    manager = build_manager_with_fake_clock(
+        mock_api_access, ReservationRetriesConfigFactory.create(), IndexedSelector()
+    )
+    return manager, mock_api_access, request, slots
+
+
+def details_config_ids(mock_api_access):
+    return [
+        call[0][0].config_id
+        for call in mock_api_access.get_booking_token.call_args_list
+    ]
+
+
+def test_make_reservation_falls_back_when_details_slot_taken():
+    manager, mock_api_access, request, slots = build_manager_with_ranked_slots(
+        [
+            HTTPError("Failed", response=MagicMock(status_code=404)),
+            DetailsResponseBodyFactory.create(),
+        ],
+        ["resy-token"],
+    )
+
+    assert manager.make_reservation_with_retries(request) == "resy-token"
+    assert mock_api_access.find_booking_slots.call_count == 1
+    assert details_config_ids(mock_api_access) == [
+        slots[0].config.token,
+        slots[1].config.token,
+    ]
+    assert manager.tracer.traces[0].counters == {"slot_fallback": 1}
+
+
+def test_make_reservation_falls_back_when_book_slot_taken():
+    manager, mock_api_access, request, slots = build_manager_with_ranked_slots(
+        [DetailsResponseBodyFactory.create(), DetailsResponseBodyFactory.create()],
+        [
+            HTTPError("Failed to book slot: 412", response=MagicMock(status_code=412)),
+            "resy-token",
+        ],
+    )
+
+    assert manager.make_reservation_with_retries(request) == "resy-token"
+    assert mock_api_access.find_booking_slots.call_count == 1
+    assert details_config_ids(mock_api_access) == [
+        slots[0].config.token,
+        slots[1].config.token,
+    ]
+
+
+def test_make_reservation_starts_over_when_fallbacks_run_out():
+    taken = HTTPError("Failed", response=MagicMock(status_code=404))
+    manager, mock_api_access, request, slots = build_manager_with_ranked_slots(
+        [taken, taken, taken, DetailsResponseBodyFactory.create()],
+        ["resy-token"],
+    )
+
+    assert manager.make_reservation_with_retries(request) == "resy-token"
+    assert mock_api_access.find_booking_slots.call_count == 2
+    assert details_config_ids(mock_api_access)[3] == slots[0].config.token
+
+
+def test_make_reservation_with_retries_terminal_error():
+    retry_config = ReservationRetriesConfigFactory.create()
+    mock_api_access = MagicMock()
+    mock_api_access.find_booking_slots.side_effect = HTTPError(
+        "Failed", response=MagicMock(status_code=401)
+    )
+
+    manager = build_manager_with_fake_clock(mock_api_access, retry_config)
+
+    with pytest.raises(HTTPError):
+        manager.make_reservation_with_retries(ReservationRequestFactory.create())
+
+    assert mock_api_access.find_booking_slots.call_count == 1
+
+
+def test_preflight():
+    config = ResyConfigFactory.create()
+    mock_api_access = MagicMock()
+    token_manager = MagicMock()
+    token_manager.preflight.return_value = CachedToken(
+        token="fresh-token",
+        expires_at=datetime(2023, 3, 31),
+        payment_method_ids=[config.payment_method_id],
+    )
+    retry_config = ReservationRetriesConfigFactory.create(retry_duration=30)
+    manager = ResyManager(
+        config,
+        mock_api_access,
+        MagicMock(),
+        retry_config,
+        token_manager=token_manager,
+    )
+
+    manager.preflight(datetime(2023, 3, 30, 10))
+
+    token_manager.preflight.assert_called_once_with(
+        datetime(2023, 3, 30, 10, 0, 30), False
+    )
+    assert manager.config.token == "fresh-token"
+    mock_api_access.set_token.assert_called_once_with("fresh-token")
+
+
+@patch("resy_bot.manager.ResyManager.make_reservation_with_retries")
+def test_make_reservation_at_preflights_before_arming(mock_make_reservation):
+    request = ReservationRequestFactory.create()
+    token_manager = MagicMock()
+    mock_api_access = MagicMock()
+    calls = []
+
+    def preflight(valid_until, force_login=False):
+        calls.append("preflight")
+        return CachedToken(token="fresh", expires_at=valid_until, payment_method_ids=[])
+
+    token_manager.preflight.side_effect = preflight
+    mock_api_access.arm.side_effect = lambda *_: calls.append("arm")
+    mock_api_access.set_token.side_effect = lambda _: calls.append("set_token")
+    manager = ResyManager(
+        ResyConfigFactory.create(),
+        mock_api_access,
+        MagicMock(),
+        ReservationRetriesConfigFactory.create(),
+        token_manager=token_manager,
+    )
+
+    manager.make_reservation_at(datetime.now() + timedelta(seconds=0.05), request)
+
+    assert calls == ["preflight", "set_token", "arm"]
+    mock_make_reservation.assert_called_once()
+
+
+def test_arm_prepares_selector_and_requests():
+    config = ResyConfigFactory.create()
+    request = ReservationRequestFactory.create()
+    mock_api_access = MagicMock()
+    mock_selector = MagicMock()
+
+    manager = ResyManager(
+        config, mock_api_access, mock_selector, ReservationRetriesConfigFactory.create()
+    )
+
+    armed = manager.arm(request)
+
+    mock_selector.prepare.assert_called_once_with(request)
+    mock_api_access.arm.assert_called_once_with(request, config)
+    assert armed is mock_api_access.arm.return_value
+
+
+@patch("resy_bot.manager.ResyManager.make_reservation_with_retries")
+def test_make_reservation_at_opening_time_already_armed(mock_make_reservation):
+    request = TimedReservationRequestFactory.create()
+    mock_api_access = MagicMock()
+    manager = ResyManager(
+        ResyConfigFactory.create(),
+        mock_api_access,
+        MagicMock(),
+        ReservationRetriesConfigFactory.create(),
+    )
+    armed = MagicMock()
+    drop_time = datetime.now() + timedelta(seconds=0.05)
+
+    with patch.object(manager, "_get_drop_time", return_value=drop_time):
+        manager.make_reservation_at_opening_time(request, armed)
+
+    mock_api_access.arm.assert_not_called()
+    mock_make_reservation.assert_called_once_with(
+        request.reservation_request, armed, request.timezone
+    )
+
+
+def calendar_with(last_calendar_day, sold_out=()):
+    calendar = MagicMock()
+    venue_calendar = MagicMock()
+    venue_calendar.next_opening_date = last_calendar_day + timedelta(days=1)
+    venue_calendar.is_sold_out.side_effect = lambda day: day in sold_out
+    calendar.get.return_value = venue_calendar
+    calendar.cached.return_value = venue_calendar
+    return calendar
+
+
+def test_target_from_calendar():
+    request = ReservationRequestFactory.create(
+        ideal_date=None, days_in_advance=None, from_calendar=True
+    )
+    calendar = calendar_with(date(2023, 4, 29))
+    manager = ResyManager(
+        ResyConfigFactory.create(),
+        MagicMock(),
+        MagicMock(),
+        ReservationRetriesConfigFactory.create(),
+        calendar=calendar,
+    )
+
+    targeted = manager.target(request)
+
+    calendar.get.assert_called_once_with(request.venue_id, request.party_size)
+    assert targeted.target_date == date(2023, 4, 30)
+    assert not targeted.from_calendar
+    assert manager.target(targeted) is targeted
+
+
+def test_target_from_calendar_without_calendar():
+    request = ReservationRequestFactory.create(
+        ideal_date=None, days_in_advance=None, from_calendar=True
+    )
+    manager = ResyManager(
+        ResyConfigFactory.create(),
+        MagicMock(),
+        MagicMock(),
+        ReservationRetriesConfigFactory.create(),
+    )
+
+    with pytest.raises(ValueError):
+        manager.target(request)
+
+
+def test_make_reservation_skips_find_for_sold_out_date():
+    request = ReservationRequestFactory.create()
+    mock_api_access = MagicMock()
+    manager = ResyManager(
+        ResyConfigFactory.create(),
+        mock_api_access,
+        MagicMock(),
+        ReservationRetriesConfigFactory.create(),
+        calendar=calendar_with(request.target_date, sold_out={request.target_date}),
+    )
+
+    with pytest.raises(SoldOutError):
+        manager.make_reservation_with_retries(request)
+
+    mock_api_access.find_booking_slots.assert_not_called()
+
+
+def test_arm_skips_sold_out_date_against_stand_in():
+    config = ResyConfigFactory.create()
+    request = ReservationRequestFactory.create(
+        ideal_date=date.today() + timedelta(days=7)
+    )
+
+    with StandInResyServer() as server:
+        server.calendar = {request.target_date: "sold-out"}
+        api_access = ResyApiAccess.build(config, server.base_url)
+        manager = ResyManager(
+            config,
+            api_access,
+            IndexedSelector(),
+            ReservationRetriesConfigFactory.create(),
+            calendar=CalendarCache(api_access),
+        )
+        armed = manager.arm(request)
+
+        with pytest.raises(SoldOutError):
+            manager.make_reservation_with_retries(request, armed)
+
+    assert server.requests[ResyEndpoints.CALENDAR.value] == 1
+    assert ResyEndpoints.FIND.value not in server.requests
 
 
 def test_get_drop_time():
@@ -179,22 +654,9 @@ def test_get_drop_time():
     assert drop_time.minute == request.expected_drop_minute
 
 
-@patch("resy_bot.manager.datetime")
 @patch("resy_bot.manager.ResyManager.make_reservation_with_retries")
-def test_make_reservation_at_opening_time(mock_make_reservation, mock_dt):
-    now = datetime.now()
-    mock_dt.now.return_value = now - timedelta(seconds=0.1)
-    request = TimedReservationRequestFactory.create(
-        expected_drop_hour=now.hour,
-        expected_drop_minute=now.minute,
-    )
-    mock_dt.return_value = datetime(
-        year=now.year,
-        month=now.month,
-        day=now.day,
-        hour=now.hour,
-        minute=now.minute,
-    )
+def test_make_reservation_at_opening_time(mock_make_reservation):
+    request = TimedReservationRequestFactory.create()
 
     config = ResyConfigFactory.create()
     mock_api_access = MagicMock()
@@ -203,11 +665,239 @@ def test_make_reservation_at_opening_time(mock_make_reservation, mock_dt):
         seconds_between_retries=0.1,
         retry_duration=1,
     )
+    scheduler = DropScheduler()
 
-    manager = ResyManager(config, mock_api_access, mock_selector, retry_config)
+    manager = ResyManager(
+        config, mock_api_access, mock_selector, retry_config, scheduler
+    )
+    drop_time = datetime.now() + timedelta(seconds=0.1)
 
-    manager.make_reservation_at_opening_time(request)
+    with patch.object(manager, "_get_drop_time", return_value=drop_time):
+        manager.make_reservation_at_opening_time(request)
 
-    assert mock_dt.now.call_count == 3
+    assert datetime.now() >= drop_time
+    assert len(scheduler.reports) == 1
 
     mock_make_reservation.assert_called_once()
+    assert mock_make_reservation.call_args[0][0] == request.reservation_request
+
+
+@patch("resy_bot.manager.ResyManager.make_reservation_with_retries")
+def test_make_reservation_at_opening_time_holds_logs(mock_make_reservation):
+    request = TimedReservationRequestFactory.create()
+    manager = ResyManager(
+        ResyConfigFactory.create(),
+        MagicMock(),
+        MagicMock(),
+        ReservationRetriesConfigFactory.create(),
+    )
+
+    def make_reservation(*args):
+        assert resy_logging._open_windows == 1
+        raise ExhaustedRetriesError("Retry deadline passed")
+
+    mock_make_reservation.side_effect = make_reservation
+    drop_time = datetime.now() + timedelta(seconds=0.05)
+
+    with patch.object(manager, "_get_drop_time", return_value=drop_time):
+        with pytest.raises(ExhaustedRetriesError):
+            manager.make_reservation_at_opening_time(request)
+
+    mock_make_reservation.assert_called_once()
+    assert resy_logging._open_windows == 0
+
+
+@patch("resy_bot.manager.ResyManager.make_reservation_with_retries")
+def test_make_reservation_at_opening_time_with_clock_sync(mock_make_reservation):
+    request = TimedReservationRequestFactory.create()
+    config = ResyConfigFactory.create()
+    retry_config = ReservationRetriesConfigFactory.create()
+    scheduler = DropScheduler()
+
+    clock_sync = MagicMock()
+    clock_sync.lead_seconds = 0.05
+    clock_sync.calibrate.return_value = ClockEstimate(
+        offset=-0.1, uncertainty=0.01, one_way_latency=0.02, n_samples=8
+    )
+
+    manager = ResyManager(
+        config, MagicMock(), MagicMock(), retry_config, scheduler, clock_sync
+    )
+    drop_time = datetime.now() + timedelta(seconds=0.1)
+
+    with patch.object(manager, "_get_drop_time", return_value=drop_time):
+        manager.make_reservation_at_opening_time(request)
+
+    # server runs 100ms behind us, so we fire 100ms after our drop time,
+    # minus the 20ms it takes the request to get there
+    assert datetime.now() >= drop_time + timedelta(seconds=0.08)
+    clock_sync.calibrate.assert_called_once()
+    assert len(scheduler.reports) == 2
+    mock_make_reservation.assert_called_once()
+    assert mock_make_reservation.call_args[0][0] == request.reservation_request
+
+
+@pytest.mark.parametrize(
+    "ping",
+    [
+        MagicMock(side_effect=ConnectionError("Connection refused")),
+        # a response without a Date header
+        MagicMock(return_value=None),
+    ],
+)
+@patch("resy_bot.manager.ResyManager.make_reservation_with_retries")
+def test_make_reservation_at_opening_time_when_clock_sync_fails(
+    mock_make_reservation, ping
+):
+    request = TimedReservationRequestFactory.create()
+    api_access = MagicMock()
+    api_access.ping = ping
+    clock_sync = ClockSynchronizer(api_access, n_samples=2, lead_seconds=0.05)
+    scheduler = DropScheduler()
+    manager = ResyManager(
+        ResyConfigFactory.create(),
+        api_access,
+        MagicMock(),
+        ReservationRetriesConfigFactory.create(),
+        scheduler,
+        clock_sync,
+    )
+    drop_time = datetime.now() + timedelta(seconds=0.1)
+
+    with patch.object(manager, "_get_drop_time", return_value=drop_time):
+        manager.make_reservation_at_opening_time(request)
+
+    # fired at the uncalibrated local drop time
+    assert scheduler.reports[-1].lateness < 0.05
+    assert datetime.now() >= drop_time
+    ping.assert_called_once()
+    mock_make_reservation.assert_called_once()
+
+
+@patch("resy_bot.manager.ResyManager.make_reservation_with_retries")
+def test_make_reservation_at_opening_time_with_warmer(mock_make_reservation):
+    request = TimedReservationRequestFactory.create()
+    config = ResyConfigFactory.create()
+    retry_config = ReservationRetriesConfigFactory.create()
+
+    warmer = MagicMock()
+    warmer.pool_config = ConnectionPoolConfig(
+        warmup_lead_seconds=0.1, health_check_lead_seconds=0.05
+    )
+
+    manager = ResyManager(config, MagicMock(), MagicMock(), retry_config, warmer=warmer)
+    drop_time = datetime.now() + timedelta(seconds=0.15)
+
+    with patch.object(manager, "_get_drop_time", return_value=drop_time):
+        manager.make_reservation_at_opening_time(request)
+
+    warmer.warm.assert_called_once()
+    warmer.health_check.assert_called_once()
+    mock_make_reservation.assert_called_once()
+    assert mock_make_reservation.call_args[0][0] == request.reservation_request
+
+
+def test_make_reservation_records_first_request_with_warmer():
+    config = ResyConfigFactory.create()
+    retries_config = ReservationRetriesConfigFactory.create()
+    request = ReservationRequestFactory.create()
+    mock_api_access = MagicMock()
+    slots = SlotFactory.create_batch(1)
+    mock_api_access.find_booking_slots.return_value = slots
+    mock_api_access.get_booking_token.return_value = DetailsResponseBodyFactory.create()
+    mock_selector = MagicMock()
+    mock_selector.select.return_value = slots[0]
+    warmer = MagicMock()
+
+    manager = ResyManager(
+        config, mock_api_access, mock_selector, retries_config, warmer=warmer
+    )
+
+    manager.make_reservation(request)
+
+    warmer.record_first_request.assert_called_once()
+
+
+def test_make_reservation_with_hedging():
+    config = ResyConfigFactory.create()
+    retries_config = ReservationRetriesConfigFactory.create(
+        hedge_window=3, hedge_budget=3
+    )
+    request = ReservationRequestFactory.create()
+    mock_api_access = MagicMock()
+    slots = SlotFactory.create_batch(2)
+    mock_api_access.find_booking_slots.side_effect = [[], [], slots]
+    mock_api_access.get_booking_token.return_value = DetailsResponseBodyFactory.create()
+    mock_selector = MagicMock()
+    mock_selector.select.return_value = slots[0]
+
+    manager = ResyManager(config, mock_api_access, mock_selector, retries_config)
+
+    manager.make_reservation(request)
+
+    assert mock_api_access.find_booking_slots.call_count == 3
+    mock_selector.select.assert_called_once_with(slots, request)
+    mock_api_access.book_slot.assert_called_once()
+
+
+def test_make_reservation_with_details_prefetch():
+    config = ResyConfigFactory.create()
+    retries_config = ReservationRetriesConfigFactory.create(details_prefetch=2)
+    request = ReservationRequestFactory.create()
+    mock_api_access = MagicMock()
+    slots = SlotFactory.create_batch(3)
+    mock_api_access.find_booking_slots.return_value = slots
+
+    def get_booking_token(params):
+        time.sleep(0.02)
+        return DetailsResponseBodyFactory.create()
+
+    mock_api_access.get_booking_token.side_effect = get_booking_token
+    mock_selector = MagicMock()
+    mock_selector.rank.return_value = slots[:2]
+
+    manager = ResyManager(config, mock_api_access, mock_selector, retries_config)
+
+    manager.make_reservation(request)
+
+    mock_selector.rank.assert_called_once_with(slots, request, 2)
+    mock_selector.select.assert_not_called()
+    assert mock_api_access.get_booking_token.call_count == 2
+    mock_api_access.book_slot.assert_called_once()
+
+
+def test_make_reservation_with_details_prefetch_no_acceptable_slots():
+    config = ResyConfigFactory.create()
+    retries_config = ReservationRetriesConfigFactory.create(details_prefetch=2)
+    mock_api_access = MagicMock()
+    mock_api_access.find_booking_slots.return_value = SlotFactory.create_batch(3)
+    mock_selector = MagicMock()
+    mock_selector.rank.return_value = []
+
+    manager = ResyManager(config, mock_api_access, mock_selector, retries_config)
+
+    with pytest.raises(NoSlotsError):
+        manager.make_reservation(ReservationRequestFactory.create())
+
+
+@pytest.mark.parametrize("arm", [False, True])
+def test_make_reservation_against_stand_in(arm):
+    config = ResyConfigFactory.create()
+    retry_config = ReservationRetriesConfig(
+        seconds_between_retries=0.01, retry_duration=2
+    )
+    request = ReservationRequestFactory.create(
+        ideal_hour=19, ideal_minute=0, window_hours=1, preferred_type=None
+    )
+    slots = generate_slots(request.target_date, 48)
+
+    with StandInResyServer(latency=0.005) as server:
+        api_access = ResyApiAccess.build(config, server.base_url)
+        manager = ResyManager(config, api_access, IndexedSelector(), retry_config)
+        armed = manager.arm(request) if arm else None
+        server.schedule_drop(slots, delay=0.05)
+
+        resy_token = manager.make_reservation_with_retries(request, armed)
+
+    assert resy_token.startswith("resy-")
+    assert [slot.date.start.hour for slot in server.booked] == [19]
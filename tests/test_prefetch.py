@@ -0,0 +1,61 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from requests import HTTPError
+
+from resy_bot.prefetch import DetailsPrefetcher
+from tests.factories import DetailsResponseBodyFactory, SlotFactory
+
+
+def test_fetches_tokens_in_parallel_and_books_best():
+    slots = SlotFactory.create_batch(3)
+    tokens = {slot.config.token: DetailsResponseBodyFactory.create() for slot in slots}
+
+    def get_booking_token(slot):
+        time.sleep(0.05)
+        return tokens[slot.config.token]
+
+    get_token = MagicMock(side_effect=get_booking_token)
+    book = MagicMock(return_value="resy-token")
+    prefetcher = DetailsPrefetcher(k=3)
+
+    started = time.monotonic()
+    resy_token = prefetcher.book_best(slots, get_token, book)
+
+    assert resy_token == "resy-token"
+    assert time.monotonic() - started < 0.12
+    assert get_token.call_count == 3
+    book.assert_called_once_with(tokens[slots[0].config.token])
+    prefetcher.close()
+
+
+def test_falls_back_to_next_token_when_slot_taken():
+    slots = SlotFactory.create_batch(3)
+    second_token = DetailsResponseBodyFactory.create()
+
+    def get_booking_token(slot):
+        if slot is slots[1]:
+            return second_token
+        return DetailsResponseBodyFactory.create()
+
+    book = MagicMock(side_effect=[HTTPError("Failed to book slot: 412"), "resy-token"])
+    prefetcher = DetailsPrefetcher(k=3)
+
+    resy_token = prefetcher.book_best(slots, get_booking_token, book)
+
+    assert resy_token == "resy-token"
+    assert book.call_args[0][0] == second_token
+    prefetcher.close()
+
+
+def test_only_top_k_requested():
+    slots = SlotFactory.create_batch(5)
+    get_token = MagicMock(side_effect=HTTPError("Failed"))
+    prefetcher = DetailsPrefetcher(k=2)
+
+    with pytest.raises(HTTPError):
+        prefetcher.book_best(slots, get_token, MagicMock())
+
+    assert get_token.call_count == 2
+    prefetcher.close()
@@ -0,0 +1,161 @@
+import base64
+import gzip
+import json
+from urllib.parse import parse_qsl, urlsplit
+
+from unittest.mock import ANY
+
+import pytest
+from requests import HTTPError, Request, Response
+from requests.structures import CaseInsensitiveDict
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.manager import ResyManager
+from resy_bot.models import (
+    AuthRequestBody,
+    FindRequestBody,
+    ReservationRetriesConfig,
+)
+from resy_bot.recording import Recorder, ReplayHTTPAdapter, load_recording
+from resy_bot.selectors import IndexedSelector, SimpleSelector
+from resy_bot.stand_in import StandInResyServer, generate_slots
+from tests.factories import ResyConfigFactory, ReservationRequestFactory, FakeClock
+
+
+def build_manager(api_access, config, selector=None) -> ResyManager:
+    retry_config = ReservationRetriesConfig(
+        seconds_between_retries=0.01, retry_duration=2
+    )
+    return ResyManager(config, api_access, selector or SimpleSelector(), retry_config)
+
+
+@pytest.fixture
+def recorded_drop(tmp_path):
+    """
+    a drop against the stand-in, recorded
+    """
+    path = str(tmp_path / "drop.jsonl.gz")
+    config = ResyConfigFactory.create()
+    request = ReservationRequestFactory.create(
+        ideal_hour=19, ideal_minute=0, window_hours=1, preferred_type=None
+    )
+
+    with StandInResyServer(latency=0.005) as server:
+        recorder = Recorder(path)
+        api_access = ResyApiAccess.build(config, server.base_url, recorder=recorder)
+        server.schedule_drop(generate_slots(request.target_date, 48), delay=0.05)
+        build_manager(api_access, config).make_reservation_with_retries(request)
+        recorder.close()
+
+    return path, config, request
+
+
+def test_recording_redacts_credentials(recorded_drop):
+    path, config, _ = recorded_drop
+
+    with gzip.open(path, "rt") as f:
+        raw = f.read()
+
+    assert config.token not in raw
+    assert config.api_key not in raw
+    assert json.loads(raw.splitlines()[0])["version"] == 1
+
+
+def test_recording_redacts_book_tokens_and_payment_methods(recorded_drop):
+    path, _, _ = recorded_drop
+    exchanges = load_recording(path)
+
+    details = next(e for e in exchanges if "/3/details" in e.url)
+    book = exchanges[-1]
+    book_fields = dict(parse_qsl(base64.b64decode(book.request_body).decode()))
+
+    assert json.loads(base64.b64decode(details.response_body))["book_token"] == {
+        "value": "REDACTED",
+        "date_expires": ANY,
+    }
+    assert book_fields["book_token"] == "REDACTED"
+    assert book_fields["struct_payment_method"] == "REDACTED"
+
+
+def test_recording_redacts_cookies(tmp_path):
+    path = str(tmp_path / "cookies.jsonl.gz")
+    recorder = Recorder(path)
+    request = Request("GET", "https://api.resy.com/4/find").prepare()
+    response = Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict(
+        {"Content-Type": "application/json", "Set-Cookie": "session=secret"}
+    )
+    response._content = b"{}"
+
+    recorder.record(request, response, recorder.clock())
+    recorder.close()
+
+    with gzip.open(path, "rt") as f:
+        assert "secret" not in f.read()
+    assert load_recording(path)[0].response_headers == {
+        "Content-Type": "application/json"
+    }
+
+
+def test_recording_leaves_out_logins(tmp_path):
+    path = str(tmp_path / "auth.jsonl.gz")
+    config = ResyConfigFactory.create()
+
+    with StandInResyServer() as server:
+        recorder = Recorder(path)
+        api_access = ResyApiAccess.build(config, server.base_url, recorder=recorder)
+        token = api_access.auth(
+            AuthRequestBody(email="me@x.com", password="hunter2")
+        ).token
+        recorder.close()
+
+    with gzip.open(path, "rt") as f:
+        raw = f.read()
+
+    assert "hunter2" not in raw
+    assert "me%40x.com" not in raw
+    assert token not in raw
+    assert load_recording(path) == []
+
+
+def test_replay_books_the_recorded_slot(recorded_drop):
+    path, config, request = recorded_drop
+    exchanges = load_recording(path)
+
+    api_access = ResyApiAccess.replay(config, path)
+    manager = build_manager(api_access, config, IndexedSelector())
+    resy_token = manager.make_reservation_with_retries(request)
+
+    book = exchanges[-1]
+    assert book.url.endswith("/3/book")
+    assert resy_token == json.loads(base64.b64decode(book.response_body))["resy_token"]
+    assert not api_access.session.get_adapter(api_access.base_url).unmatched
+
+
+def test_replay_follows_recorded_timeline(recorded_drop):
+    path, config, _ = recorded_drop
+    clock = FakeClock()
+    exchanges = load_recording(path)
+    finds = [exchange for exchange in exchanges if "/4/find" in exchange.url]
+    adapter = ReplayHTTPAdapter(exchanges, clock=clock.monotonic, sleep=clock.sleep)
+    api_access = ResyApiAccess.replay(config, path)
+    api_access.session.mount("http://", adapter)
+    api_access.session.mount("https://", adapter)
+    body = FindRequestBody(**dict(parse_qsl(urlsplit(finds[0].url).query)))
+
+    assert api_access.find_booking_slots(body) == []
+    clock.now = finds[-1].at - exchanges[0].at
+    assert len(api_access.find_booking_slots(body)) == 48
+
+
+def test_replay_unrecorded_request(recorded_drop):
+    path, config, _ = recorded_drop
+    api_access = ResyApiAccess.replay(config, path, realtime=False)
+
+    with pytest.raises(HTTPError) as error:
+        api_access.find_booking_slots(
+            FindRequestBody(venue_id="other", party_size=2, day="2023-03-30")
+        )
+
+    assert error.value.response.status_code == 404
@@ -0,0 +1,175 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from requests import ConnectionError, HTTPError
+
+from resy_bot.constants import ReservationPhase
+from resy_bot.errors import (
+    AlreadyBookedError,
+    ExhaustedRetriesError,
+    NoSlotsError,
+    SoldOutError,
+)
+from resy_bot.models import BackoffConfig, ReservationRetriesConfig
+from resy_bot.retry import (
+    ErrorClass,
+    RetryEngine,
+    classify_error,
+    retry_after_seconds,
+)
+from tests.factories import FakeClock
+
+
+def http_error(status_code, headers=None):
+    response = MagicMock(status_code=status_code, headers=headers or {})
+    return HTTPError(f"Failed: {status_code}", response=response)
+
+
+def build_engine(**kwargs):
+    retry_config = ReservationRetriesConfig(
+        seconds_between_retries=0.05, retry_duration=2, **kwargs
+    )
+    clock = FakeClock()
+    engine = RetryEngine(
+        retry_config,
+        clock=clock.monotonic,
+        sleep=clock.sleep,
+        async_sleep=clock.async_sleep,
+    )
+    return engine, clock
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (NoSlotsError(), ErrorClass.RETRYABLE),
+        (ConnectionError(), ErrorClass.RETRYABLE),
+        (HTTPError("no response"), ErrorClass.RETRYABLE),
+        (http_error(500), ErrorClass.RETRYABLE),
+        (http_error(503), ErrorClass.RETRYABLE),
+        (http_error(412), ErrorClass.RETRYABLE),
+        (http_error(429), ErrorClass.RATE_LIMITED),
+        (http_error(400), ErrorClass.TERMINAL),
+        (http_error(401), ErrorClass.TERMINAL),
+        (AlreadyBookedError(), ErrorClass.TERMINAL),
+        (SoldOutError(), ErrorClass.TERMINAL),
+    ],
+)
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_retry_after_seconds():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    assert retry_after_seconds(MagicMock(headers={"Retry-After": "2"})) == 2
+    assert retry_after_seconds(
+        MagicMock(headers={"Retry-After": format_datetime(retry_at, usegmt=True)})
+    ) == pytest.approx(30, abs=1.5)
+    assert retry_after_seconds(MagicMock(headers={"Retry-After": "soon"})) is None
+    assert retry_after_seconds(MagicMock(headers={})) is None
+    assert retry_after_seconds(None) is None
+
+
+def test_backoff_delay():
+    backoff = BackoffConfig(base_seconds=0.1, max_seconds=0.5, jitter=0.5)
+
+    assert backoff.delay(1, 0) == pytest.approx(0.1)
+    assert backoff.delay(2, 0) == pytest.approx(0.2)
+    assert backoff.delay(10, 0) == pytest.approx(0.5)
+    assert backoff.delay(10, 0.999) == pytest.approx(0.25, abs=0.001)
+
+
+def test_retries_failed_step_with_same_input():
+    engine, clock = build_engine()
+    book = MagicMock(side_effect=[http_error(502), http_error(502), "resy-token"])
+    find = MagicMock(return_value="slot")
+
+    result = engine.run([(ReservationPhase.FIND, find), (ReservationPhase.BOOK, book)])
+
+    assert result == "resy-token"
+    assert find.call_count == 1
+    assert [call.args for call in book.call_args_list] == [("slot",)] * 3
+    # exponential backoff between the book attempts
+    assert clock.sleeps[1] >= clock.sleeps[0]
+
+
+def test_honours_retry_after():
+    engine, clock = build_engine()
+    find = MagicMock(side_effect=[http_error(429, {"Retry-After": "1"}), "slot"])
+
+    assert engine.run([(ReservationPhase.FIND, find)]) == "slot"
+    assert clock.sleeps == [1]
+
+
+def test_retry_after_past_deadline_gives_up():
+    engine, clock = build_engine()
+    find = MagicMock(side_effect=http_error(429, {"Retry-After": "5"}))
+
+    with pytest.raises(ExhaustedRetriesError):
+        engine.run([(ReservationPhase.FIND, find)])
+
+    assert find.call_count == 1
+    assert clock.sleeps == []
+
+
+def test_starts_over_after_max_attempts():
+    engine, _ = build_engine(details_backoff=BackoffConfig(max_attempts=2))
+    find = MagicMock(return_value="slot")
+    details = MagicMock(side_effect=[http_error(500), http_error(500), "token"])
+
+    result = engine.run(
+        [(ReservationPhase.FIND, find), (ReservationPhase.DETAILS, details)]
+    )
+
+    assert result == "token"
+    assert find.call_count == 2
+
+
+def test_terminal_error_is_raised():
+    engine, clock = build_engine()
+    find = MagicMock(side_effect=http_error(403))
+
+    with pytest.raises(HTTPError):
+        engine.run([(ReservationPhase.FIND, find)])
+
+    assert clock.sleeps == []
+
+
+def test_deadline_bounds_finds():
+    engine, clock = build_engine()
+    find = MagicMock(side_effect=NoSlotsError)
+
+    with pytest.raises(ExhaustedRetriesError):
+        engine.run([(ReservationPhase.FIND, find)])
+
+    assert clock.now < 2
+    assert all(0.04 <= sleep <= 0.05 for sleep in clock.sleeps)
+
+
+def test_run_async_retries_failed_step_with_same_input():
+    engine, clock = build_engine()
+    find = AsyncMock(return_value="slot")
+    book = AsyncMock(side_effect=[http_error(502), http_error(502), "resy-token"])
+
+    result = asyncio.run(
+        engine.run_async([(ReservationPhase.FIND, find), (ReservationPhase.BOOK, book)])
+    )
+
+    assert result == "resy-token"
+    assert find.await_count == 1
+    assert [call.args for call in book.await_args_list] == [("slot",)] * 3
+    assert len(clock.sleeps) == 2
+
+
+def test_run_async_terminal_error_is_raised():
+    engine, clock = build_engine()
+    find = AsyncMock(side_effect=http_error(403))
+
+    with pytest.raises(HTTPError):
+        asyncio.run(engine.run_async([(ReservationPhase.FIND, find)]))
+
+    assert clock.sleeps == []
@@ -0,0 +1,138 @@
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from resy_bot.scheduler import (
+    DropScheduler,
+    drop_time_today,
+    next_drop_time,
+    wall_to_monotonic,
+)
+from tests.factories import FakeClock
+
+
+def test_wait_until_sleeps_coarsely_then_finely():
+    fake = FakeClock(tick=0.00001)
+    scheduler = DropScheduler(
+        coarse_margin=0.05,
+        fine_sleep=0.001,
+        spin_margin=0.0003,
+        tick_seconds=10,
+        clock=fake.monotonic,
+        sleep=fake.sleep,
+    )
+
+    report = scheduler.wait_until(25.0)
+
+    assert report.fired >= 25.0
+    assert report.lateness < 0.0001
+    assert fake.sleeps[0] == 10
+    assert max(fake.sleeps[3:]) <= 0.001
+    # nearly all of the wait is spent sleeping rather than spinning
+    assert sum(fake.sleeps) > 25.0 - 0.002
+
+
+def test_wait_until_calls_on_tick():
+    fake = FakeClock(tick=0.00001)
+    scheduler = DropScheduler(tick_seconds=1, clock=fake.monotonic, sleep=fake.sleep)
+    ticks = []
+
+    scheduler.wait_until(5.0, on_tick=ticks.append)
+
+    assert len(ticks) == 4
+    assert all(remaining > 0 for remaining in ticks)
+
+
+def test_wait_until_in_the_past_fires_immediately():
+    scheduler = DropScheduler()
+    target = time.monotonic() - 1
+
+    report = scheduler.wait_until(target)
+
+    assert report.lateness >= 1
+    assert list(scheduler.reports) == [report]
+
+
+def test_calibrate_records_sleep_overshoot():
+    fake = FakeClock(tick=0.00001)
+    scheduler = DropScheduler(clock=fake.monotonic, sleep=fake.sleep)
+
+    overshoot = scheduler.calibrate(samples=5)
+
+    assert overshoot == pytest.approx(0.00001)
+    assert len(fake.sleeps) == 5
+
+
+def test_wall_to_monotonic():
+    target = datetime.now() + timedelta(seconds=30)
+
+    monotonic_target = wall_to_monotonic(target)
+
+    assert monotonic_target - time.monotonic() == pytest.approx(30, abs=0.01)
+
+
+def test_drop_time_today_in_time_zone():
+    drop_time = drop_time_today(9, 0, "Asia/Tokyo")
+
+    in_tokyo = drop_time.astimezone(ZoneInfo("Asia/Tokyo"))
+    assert (in_tokyo.hour, in_tokyo.minute) == (9, 0)
+    assert in_tokyo.date() == datetime.now(ZoneInfo("Asia/Tokyo")).date()
+
+
+def test_next_drop_time_later_today():
+    now = datetime(2023, 3, 30, 8, 0, tzinfo=ZoneInfo("America/New_York"))
+
+    drop_time = next_drop_time(9, 30, "America/New_York", now=now)
+
+    assert drop_time.astimezone(timezone.utc) == datetime(
+        2023, 3, 30, 13, 30, tzinfo=timezone.utc
+    )
+
+
+def test_next_drop_time_already_passed_is_tomorrow():
+    now = datetime(2023, 3, 30, 10, 0, tzinfo=ZoneInfo("America/New_York"))
+
+    drop_time = next_drop_time(9, 30, "America/New_York", now=now)
+
+    assert drop_time.astimezone(timezone.utc) == datetime(
+        2023, 3, 31, 13, 30, tzinfo=timezone.utc
+    )
+
+
+def test_next_drop_time_across_dst_change():
+    # clocks in new york went forward on the night of 2023-03-12
+    now = datetime(2023, 3, 11, 10, 0, tzinfo=ZoneInfo("America/New_York"))
+
+    drop_time = next_drop_time(9, 0, "America/New_York", now=now)
+
+    assert drop_time.astimezone(timezone.utc) == datetime(
+        2023, 3, 12, 13, 0, tzinfo=timezone.utc
+    )
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="timer accuracy is OS specific")
+def test_wait_until_sub_millisecond_accuracy():
+    scheduler = DropScheduler()
+    scheduler.calibrate()
+
+    for _ in range(40):
+        scheduler.wait_until(time.monotonic() + 0.02)
+
+    lateness = sorted(abs(report.lateness) for report in scheduler.reports)
+
+    # leave room for the odd preemption on a shared CI runner
+    assert statistics.median(lateness) < 0.0001
+    assert lateness[int(len(lateness) * 0.8)] < 0.001
+
+
+def test_reports_are_capped():
+    fake = FakeClock(tick=0.00001)
+    scheduler = DropScheduler(clock=fake.monotonic, sleep=fake.sleep, report_history=2)
+
+    reports = [scheduler.wait_until(fake.now + 0.01) for _ in range(3)]
+
+    assert list(scheduler.reports) == reports[1:]
@@ -1,11 +1,23 @@
-from datetime import datetime, timedelta
+import random
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from resy_bot.errors import NoSlotsError
-from resy_bot.selectors import SimpleSelector
+from resy_bot.slot_index import SlotIndex
+from resy_bot.selectors import (
+    IndexedSelector,
+    SelectionPlan,
+    SimpleSelector,
+    SlotChain,
+)
 
-from tests.factories import ReservationRequestFactory, SlotFactory
+from tests.factories import (
+    ReservationRequestDaysInAdvanceFactory,
+    ReservationRequestFactory,
+    SlotFactory,
+)
 
 
 def test_simple_selector_select_exact_match():
@@ -174,3 +186,268 @@ def test_simple_selector_no_slots_in_window():
 
     with pytest.raises(NoSlotsError):
         selector.select([too_late_slot], request)
+
+
+def test_rank_returns_best_slots_in_order():
+    request = ReservationRequestFactory.create(
+        preferred_type=None, prefer_early=True, window_hours=2
+    )
+    ideal_start_dt = datetime(
+        year=request.ideal_date.year,
+        month=request.ideal_date.month,
+        day=request.ideal_date.day,
+        hour=request.ideal_hour,
+        minute=request.ideal_minute,
+    )
+    offsets = [0, 15, 60, 180]
+    slots = [
+        SlotFactory.create(date__start=ideal_start_dt + timedelta(minutes=offset))
+        for offset in offsets
+    ]
+
+    selector = SimpleSelector()
+    ranked = selector.rank(slots, request, k=3)
+
+    assert ranked == [slots[0], slots[1], slots[2]]
+
+
+def test_rank_stops_when_no_acceptable_slots_remain():
+    request = ReservationRequestFactory.create(preferred_type=None, window_hours=1)
+    ideal_start_dt = datetime(
+        year=request.ideal_date.year,
+        month=request.ideal_date.month,
+        day=request.ideal_date.day,
+        hour=request.ideal_hour,
+        minute=request.ideal_minute,
+    )
+    slot = SlotFactory.create(date__start=ideal_start_dt)
+    too_late_slot = SlotFactory.create(date__start=ideal_start_dt + timedelta(hours=2))
+
+    selector = SimpleSelector()
+
+    assert selector.rank([slot, too_late_slot], request, k=3) == [slot]
+
+
+def ranked_request_and_slots():
+    request = ReservationRequestFactory.create(
+        preferred_type=None, prefer_early=True, window_hours=2
+    )
+    ideal_start_dt = datetime(
+        year=request.ideal_date.year,
+        month=request.ideal_date.month,
+        day=request.ideal_date.day,
+        hour=request.ideal_hour,
+        minute=request.ideal_minute,
+    )
+    slots = [
+        SlotFactory.create(date__start=ideal_start_dt + timedelta(minutes=offset))
+        for offset in [0, 15, 60, 180]
+    ]
+    return request, slots
+
+
+def test_ranked_is_lazy():
+    request, slots = ranked_request_and_slots()
+    selector = IndexedSelector()
+
+    with patch.object(selector, "plan", wraps=selector.plan) as plan:
+        ranked = selector.ranked(slots, request)
+        assert plan.call_count == 0
+
+        assert next(ranked) == slots[0]
+        assert plan.call_count == 1
+
+        assert list(ranked) == [slots[1], slots[2]]
+
+
+def around_ideal_request_and_slots():
+    """
+    slots at 18:45, 19:00 and 19:30 for 19:00 +-1h, where select
+    stops at 19:00 without looking at the others
+    """
+    request = ReservationRequestFactory.create(
+        ideal_hour=19,
+        ideal_minute=0,
+        window_hours=1,
+        preferred_type=None,
+        prefer_early=False,
+    )
+    day = request.ideal_date
+    slots = [
+        SlotFactory.create(date__start=datetime(day.year, day.month, day.day, h, m))
+        for h, m in [(18, 45), (19, 0), (19, 30)]
+    ]
+    return request, slots
+
+
+@pytest.mark.parametrize("selector", [SimpleSelector(), IndexedSelector()])
+def test_ranked_yields_every_acceptable_slot(selector):
+    request, slots = around_ideal_request_and_slots()
+
+    assert list(selector.ranked(slots, request)) == [slots[1], slots[0], slots[2]]
+
+
+@pytest.mark.parametrize("selector", [SimpleSelector(), IndexedSelector()])
+def test_slot_chain_reaches_slots_select_skips(selector):
+    request, slots = around_ideal_request_and_slots()
+    selected = selector.select(slots, request)
+    chain = SlotChain(selector, slots, request, selected)
+
+    assert selected == slots[1]
+    assert chain.advance()
+    assert chain.current == slots[0]
+    assert chain.advance()
+    assert chain.current == slots[2]
+    assert not chain.advance()
+
+
+@pytest.mark.parametrize("selector", [SimpleSelector(), IndexedSelector()])
+def test_rank_fills_top_k_past_where_select_stops(selector):
+    request, slots = around_ideal_request_and_slots()
+
+    assert selector.rank(slots, request, k=3) == [slots[1], slots[0], slots[2]]
+    assert selector.rank(slots, request, k=2) == [slots[1], slots[0]]
+
+
+def test_indexed_selector_indexes_each_find_once():
+    request, slots = around_ideal_request_and_slots()
+    selector = IndexedSelector()
+
+    with patch("resy_bot.selectors.SlotIndex", wraps=SlotIndex) as index:
+        # a response used once is only scanned
+        selected = selector.select(slots, request)
+        assert index.call_count == 0
+
+        assert next(selector.ranked(slots, request)) is selected
+        selector.rank(slots, request, k=2)
+        assert index.call_count == 1
+
+        selector.select(list(slots), request)
+        assert index.call_count == 1
+
+
+def test_plan_cache_is_bounded():
+    selector = SimpleSelector(plan_cache_size=2)
+    requests = ReservationRequestFactory.create_batch(3)
+
+    plans = [selector.plan(request) for request in requests]
+
+    assert len(selector._plans) == 2
+    assert selector.plan(requests[2]) is plans[2]
+    assert selector.plan(requests[0]) is not plans[0]
+
+
+def test_ranked_ties_go_to_the_preferred_side():
+    request = ReservationRequestFactory.create(
+        ideal_hour=19, ideal_minute=0, window_hours=1, preferred_type=None
+    )
+    day = request.ideal_date
+    earlier, later = [
+        SlotFactory.create(date__start=datetime(day.year, day.month, day.day, h, m))
+        for h, m in [(18, 45), (19, 15)]
+    ]
+
+    early = request.copy(update={"prefer_early": True})
+    late = request.copy(update={"prefer_early": False})
+    assert list(IndexedSelector().ranked([earlier, later], early)) == [earlier, later]
+    assert list(IndexedSelector().ranked([earlier, later], late)) == [later, earlier]
+
+
+def test_slot_chain_falls_back_in_rank_order():
+    request, slots = ranked_request_and_slots()
+    chain = SlotChain(IndexedSelector(), slots, request, slots[0])
+    chain.details = MagicMock()
+
+    assert chain.advance()
+    assert chain.current == slots[1]
+    assert chain.details is None
+    assert chain.advance()
+    assert chain.current == slots[2]
+    assert not chain.advance()
+    assert chain.current == slots[2]
+
+
+def test_slot_chain_ranks_only_when_falling_back():
+    request, slots = ranked_request_and_slots()
+    selector = MagicMock()
+
+    SlotChain(selector, slots, request, slots[0])
+
+    selector.ranked.assert_not_called()
+
+
+SLOT_TYPES = ["Dining Room", "Bar", "Patio"]
+
+
+def select_or_none(selector, slots, request):
+    try:
+        return selector.select(slots, request)
+    except NoSlotsError:
+        return None
+
+
+@pytest.mark.parametrize("seed", range(500))
+def test_indexed_selector_matches_simple_selector(seed):
+    rng = random.Random(seed)
+    request = ReservationRequestFactory.create(
+        preferred_type=rng.choice([None] + SLOT_TYPES),
+        prefer_early=rng.random() < 0.5,
+        window_hours=rng.randint(0, 3),
+        ideal_minute=rng.choice([0, 15, 30, 45]),
+    )
+    ideal_start_dt = SelectionPlan.compile(request).ideal_datetime
+
+    # a coarse grid around the ideal time, so ties and
+    # equally off slots on both sides come up often
+    slots = [
+        SlotFactory.create(
+            config__type=rng.choice(SLOT_TYPES),
+            date__start=ideal_start_dt + timedelta(minutes=15 * rng.randint(-16, 16)),
+        )
+        for _ in range(rng.randint(0, 30))
+    ]
+    slots.sort(key=lambda x: x.date.start)
+
+    expected = select_or_none(SimpleSelector(), slots, request)
+    selected = select_or_none(IndexedSelector(), slots, request)
+
+    assert selected is expected
+
+
+def test_indexed_selector_unknown_preferred_type():
+    request = ReservationRequestFactory.create(preferred_type="Rooftop")
+    slots = SlotFactory.create_batch(3, config__type="Bar")
+
+    with pytest.raises(NoSlotsError):
+        IndexedSelector().select(slots, request)
+
+
+@pytest.mark.parametrize("selector", [SimpleSelector(), IndexedSelector()])
+def test_selector_compiles_plan_once_per_request(selector):
+    request = ReservationRequestFactory.create()
+
+    assert selector.plan(request) is selector.plan(request)
+    assert selector.plan(request) is not selector.plan(request.copy())
+
+
+def test_indexed_selector_prepare_compiles_plan():
+    request = ReservationRequestFactory.create()
+    selector = IndexedSelector()
+
+    selector.prepare(request)
+
+    assert selector._plans[id(request)][0] is request
+
+
+def test_selection_plan_fixes_target_date():
+    request = ReservationRequestDaysInAdvanceFactory.create(days_in_advance=7)
+    plan = SelectionPlan.compile(request, target_date=date(2023, 3, 30))
+
+    assert plan.ideal_datetime.date() == date(2023, 3, 30)
+    assert plan.max_time - plan.ideal_datetime == timedelta(hours=request.window_hours)
+
+    selector = IndexedSelector()
+    first_plan = selector.plan(request)
+    with patch("resy_bot.models.date") as mock_date:
+        mock_date.today.return_value = date.today() + timedelta(days=1)
+        assert selector.plan(request) is first_plan
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from resy_bot.slot_index import SlotIndex
+from tests.factories import SlotFactory
+
+
+def test_slot_index_sorts_and_buckets():
+    start = datetime(2023, 3, 30, 19, 0)
+    late_bar = SlotFactory.create(
+        config__type="Bar", date__start=start + timedelta(hours=1)
+    )
+    early_patio = SlotFactory.create(config__type="Patio", date__start=start)
+    early_bar = SlotFactory.create(config__type="Bar", date__start=start)
+
+    index = SlotIndex([late_bar, early_patio, early_bar])
+
+    assert len(index) == 3
+    assert index.bucket(None).slots == [early_patio, early_bar, late_bar]
+    assert index.bucket("Bar").slots == [early_bar, late_bar]
+    assert index.bucket("Rooftop") is None
+
+
+def test_slot_bucket_span_and_ties():
+    start = datetime(2023, 3, 30, 19, 0)
+    offsets = [0, 15, 15, 30, 45, 45]
+    slots = [
+        SlotFactory.create(date__start=start + timedelta(minutes=offset))
+        for offset in offsets
+    ]
+    bucket = SlotIndex(slots).all
+
+    assert bucket.span(
+        start + timedelta(minutes=15), start + timedelta(minutes=30)
+    ) == (1, 4)
+    assert bucket.first_at_or_after(start + timedelta(minutes=20)) == 3
+    assert bucket.first_tie_after(0) == 2
+    assert bucket.first_tie_after(2) == 5
+    assert bucket.first_tie_after(5) == 6
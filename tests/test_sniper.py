@@ -0,0 +1,255 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import ValidationError
+from requests import HTTPError
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.manager import ResyManager
+from resy_bot.models import WatchConfig
+from resy_bot.selectors import IndexedSelector
+from resy_bot.sniper import CancellationSniper, WatchTarget
+from resy_bot.stand_in import StandInResyServer, generate_slots
+from tests.factories import (
+    DetailsResponseBodyFactory,
+    ReservationRequestFactory,
+    ReservationRetriesConfigFactory,
+    ResyConfigFactory,
+    SlotFactory,
+)
+
+DAY = date(2023, 4, 13)
+
+
+def watch_request(**kwargs):
+    return ReservationRequestFactory.create(
+        ideal_date=DAY,
+        ideal_hour=19,
+        ideal_minute=0,
+        window_hours=1,
+        preferred_type=None,
+        **kwargs,
+    )
+
+
+def slot_at(hour, minute=0, **kwargs):
+    return SlotFactory.create(
+        date__start=datetime(DAY.year, DAY.month, DAY.day, hour, minute), **kwargs
+    )
+
+
+def new_slots(target, slots):
+    """
+    the slots a poll answered with slots would try to book, best first
+    """
+    return target.ranked(target.changes.update(slots).added)
+
+
+def test_new_slots_only_reports_slots_new_to_the_window():
+    target = WatchTarget(watch_request())
+    early = slot_at(18, 30)
+    outside = slot_at(21)
+
+    assert new_slots(target, [early, outside]) == [early]
+    assert new_slots(target, [early, outside]) == []
+
+    ideal = slot_at(19)
+    assert new_slots(target, [early, ideal]) == [ideal]
+
+
+def test_new_slots_rank_closest_first():
+    target = WatchTarget(watch_request(prefer_early=True))
+    later = slot_at(19, 15)
+    earlier = slot_at(18, 45)
+    far = slot_at(19, 45)
+
+    assert new_slots(target, [far, later, earlier]) == [earlier, later, far]
+
+
+def test_new_slots_reappearing_slot_is_new_again():
+    target = WatchTarget(watch_request())
+    slot = slot_at(19)
+
+    new_slots(target, [slot])
+    new_slots(target, [])
+
+    assert new_slots(target, [slot]) == [slot]
+
+
+def answer_finds(api_access, slots):
+    api_access.find_booking_slot_changes.side_effect = (
+        lambda body, changes: changes.update(slots)
+    )
+
+
+def build_sniper(api_access, n_targets=1, **kwargs):
+    manager = MagicMock()
+    manager.api_access = api_access
+    manager.booking_guard = None
+    targets = [watch_request() for _ in range(n_targets)]
+    return CancellationSniper(manager, targets, **kwargs), targets
+
+
+def test_poll_rate_is_global():
+    api_access = MagicMock()
+    answer_finds(api_access, [])
+    few, _ = build_sniper(api_access, n_targets=2, requests_per_second=50)
+    many, _ = build_sniper(api_access, n_targets=2000, requests_per_second=50)
+
+    few.run(duration=0.3)
+    many.run(duration=0.3)
+
+    assert 10 <= few.polls <= 17
+    assert 10 <= many.polls <= 17
+
+
+def test_books_new_slot_and_stops():
+    api_access = MagicMock()
+    slot = slot_at(19)
+    answer_finds(api_access, [slot])
+    api_access.get_booking_token.return_value = DetailsResponseBodyFactory.create()
+    api_access.book_slot.return_value = "resy-token"
+    sniper, targets = build_sniper(api_access, requests_per_second=100)
+
+    assert sniper.run(duration=5) == [(targets[0], "resy-token")]
+    assert sniper.watching == 0
+    assert api_access.get_booking_token.call_args[0][0].config_id == slot.config.token
+
+
+def test_failed_booking_waits_for_slot_to_reappear():
+    api_access = MagicMock()
+    answer_finds(api_access, [slot_at(19)])
+    api_access.get_booking_token.side_effect = HTTPError(
+        "Failed", response=MagicMock(status_code=404)
+    )
+    sniper, _ = build_sniper(api_access, requests_per_second=100)
+
+    assert sniper.run(duration=0.1) == []
+    assert sniper.polls > 1
+    assert api_access.get_booking_token.call_count == 1
+    assert sniper.watching == 1
+
+
+def test_rate_limited_pauses_polls():
+    api_access = MagicMock()
+    api_access.find_booking_slot_changes.side_effect = HTTPError(
+        "Failed", response=MagicMock(status_code=429, headers={"Retry-After": "60"})
+    )
+    sniper, _ = build_sniper(api_access, n_targets=10, requests_per_second=100)
+
+    sniper.run(duration=0.2)
+
+    assert sniper.polls == 1
+
+
+def test_stop():
+    api_access = MagicMock()
+    answer_finds(api_access, [])
+    sniper, _ = build_sniper(api_access, requests_per_second=1)
+
+    runner = threading.Thread(target=sniper.run)
+    runner.start()
+    time.sleep(0.05)
+    sniper.stop()
+    runner.join(timeout=1)
+
+    assert not runner.is_alive()
+
+
+def test_watch_config_rejects_calendar_targets():
+    with pytest.raises(ValidationError):
+        WatchConfig(
+            targets=[
+                ReservationRequestFactory.create(ideal_date=None, from_calendar=True)
+            ]
+        )
+
+
+def test_snipes_cancellation_from_stand_in():
+    config = ResyConfigFactory.create()
+    cancelled = generate_slots(DAY, 1, first_hour=19)
+
+    with StandInResyServer() as server:
+        api_access = ResyApiAccess.build(config, server.base_url)
+        manager = ResyManager(
+            config, api_access, IndexedSelector(), ReservationRetriesConfigFactory()
+        )
+        sniper = CancellationSniper(
+            manager,
+            [watch_request(), watch_request(venue_id="other")],
+            requests_per_second=50,
+        )
+
+        runner = threading.Thread(target=sniper.run, kwargs={"duration": 5})
+        runner.start()
+        time.sleep(0.1)
+        server.schedule_drop(cancelled)
+        runner.join(timeout=5)
+
+    assert len(sniper.bookings) == 1
+    assert server.booked == cancelled
+    assert server.requests["/4/find"] >= 3
+
+
+def test_new_slot_window_bounds():
+    target = WatchTarget(watch_request(prefer_early=True))
+    edges = [slot_at(18), slot_at(20)]
+
+    assert new_slots(target, edges) == edges
+    assert target.plan.max_time - target.plan.min_time == timedelta(hours=2)
+
+
+def test_subscribers_hear_each_targets_changes():
+    api_access = MagicMock()
+    slot = slot_at(19)
+    answer_finds(api_access, [slot])
+    api_access.get_booking_token.side_effect = HTTPError(
+        "Failed", response=MagicMock(status_code=404)
+    )
+    sniper, targets = build_sniper(api_access, n_targets=2, requests_per_second=100)
+    heard = []
+    sniper.subscribe(lambda request, diff: heard.append((request, diff.added)))
+
+    sniper.run(duration=0.1)
+
+    assert [added for _, added in heard] == [[slot], [slot]]
+    assert {id(request) for request, _ in heard} == {id(target) for target in targets}
+
+
+def test_preflights_periodically():
+    api_access = MagicMock()
+    answer_finds(api_access, [])
+    sniper, _ = build_sniper(
+        api_access, requests_per_second=100, preflight_interval=0.05
+    )
+
+    sniper.run(duration=0.2)
+
+    assert 2 <= sniper.manager.preflight.call_count <= 5
+    for call in sniper.manager.preflight.call_args_list:
+        assert call.kwargs == {"force_login": False}
+
+
+def test_logs_in_again_when_token_is_turned_down():
+    api_access = MagicMock()
+    slot = slot_at(19)
+    logins = []
+
+    def find(body, changes):
+        if not logins:
+            raise HTTPError("Failed", response=MagicMock(status_code=419))
+        return changes.update([slot])
+
+    api_access.find_booking_slot_changes.side_effect = find
+    api_access.get_booking_token.return_value = DetailsResponseBodyFactory.create()
+    api_access.book_slot.return_value = "resy-token"
+    sniper, targets = build_sniper(api_access, requests_per_second=100)
+    sniper.manager.preflight.side_effect = (
+        lambda valid_until, force_login: logins.append(force_login)
+    )
+
+    assert sniper.run(duration=2) == [(targets[0], "resy-token")]
+    assert logins == [True]
@@ -0,0 +1,123 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+from requests import HTTPError
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.constants import ResyEndpoints
+from resy_bot.model_builders import build_book_request_body
+from resy_bot.models import CalendarRequestBody, DetailsRequestBody, FindRequestBody
+from resy_bot.stand_in import StandInResyServer, generate_slots
+from tests.factories import AuthRequestBodyFactory, ResyConfigFactory
+
+DAY = date(2023, 3, 30)
+
+
+def find_body() -> FindRequestBody:
+    return FindRequestBody(venue_id="12345", party_size=2, day=DAY.isoformat())
+
+
+def details_body(token: str) -> DetailsRequestBody:
+    return DetailsRequestBody(config_id=token, party_size=2, day=DAY.isoformat())
+
+
+def test_generate_slots():
+    slots = generate_slots(DAY, 7, slot_types=["Bar", "Patio"])
+
+    assert len({slot.config.token for slot in slots}) == 7
+    assert [slot.config.type for slot in slots[:3]] == ["Bar", "Patio", "Bar"]
+    assert slots == sorted(slots, key=lambda slot: slot.date.start)
+
+
+def test_auth():
+    with StandInResyServer(payment_method_id=42) as server:
+        api_access = ResyApiAccess.build(ResyConfigFactory.create(), server.base_url)
+
+        auth = api_access.auth(AuthRequestBodyFactory.create())
+
+    assert [method.id for method in auth.payment_methods] == [42]
+    assert auth.token
+
+
+def test_find_details_and_book():
+    config = ResyConfigFactory.create()
+    slots = generate_slots(DAY, 6)
+
+    with StandInResyServer() as server:
+        api_access = ResyApiAccess.build(config, server.base_url)
+        server.schedule_drop(slots, delay=0.1)
+
+        assert api_access.find_booking_slots(find_body()) == []
+        time.sleep(0.1)
+        found = api_access.find_booking_slots(find_body())
+
+        details = api_access.get_booking_token(details_body(found[2].config.token))
+        booking = build_book_request_body(details, config)
+        assert api_access.book_slot(booking).startswith("resy-")
+
+        with pytest.raises(HTTPError) as book_again:
+            api_access.book_slot(booking)
+        with pytest.raises(HTTPError) as details_again:
+            api_access.get_booking_token(details_body(found[2].config.token))
+
+    assert found == slots
+    assert server.booked == [slots[2]]
+    assert book_again.value.response.status_code == 412
+    assert details_again.value.response.status_code == 404
+    assert server.requests[ResyEndpoints.FIND.value] == 2
+
+
+def test_injected_errors():
+    with StandInResyServer(error_rate=1.0) as server:
+        api_access = ResyApiAccess.build(ResyConfigFactory.create(), server.base_url)
+        server.schedule_drop(generate_slots(DAY, 2))
+
+        with pytest.raises(HTTPError) as error:
+            api_access.find_booking_slots(find_body())
+
+    assert error.value.response.status_code == 500
+
+
+def test_contention_takes_found_slots():
+    slots = generate_slots(DAY, 4)
+
+    with StandInResyServer(contention=1.0) as server:
+        api_access = ResyApiAccess.build(ResyConfigFactory.create(), server.base_url)
+        server.schedule_drop(slots)
+
+        found = api_access.find_booking_slots(find_body())
+
+        with pytest.raises(HTTPError):
+            api_access.get_booking_token(details_body(found[0].config.token))
+        assert api_access.find_booking_slots(find_body()) == []
+
+    assert found == slots
+    assert server.taken == slots
+
+
+def test_calendar_opens_drop_day():
+    slots = generate_slots(DAY, 2)
+    body = CalendarRequestBody(
+        venue_id="12345",
+        num_seats=2,
+        start_date=(DAY - timedelta(days=2)).isoformat(),
+        end_date=DAY.isoformat(),
+    )
+
+    with StandInResyServer() as server:
+        api_access = ResyApiAccess.build(ResyConfigFactory.create(), server.base_url)
+        server.calendar = {DAY - timedelta(days=1): "sold-out"}
+        server.schedule_drop(slots, delay=0.1)
+
+        before = api_access.get_calendar(body)
+        time.sleep(0.1)
+        after = api_access.get_calendar(body)
+        server.slots = []
+        sold_out = api_access.get_calendar(body)
+
+    assert before.last_calendar_day == DAY - timedelta(days=1)
+    assert [day.sold_out for day in before.scheduled] == [True]
+    assert after.last_calendar_day == DAY
+    assert after.scheduled[-1].inventory.reservation == "available"
+    assert sold_out.scheduled[-1].sold_out
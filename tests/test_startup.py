@@ -0,0 +1,40 @@
+import gc
+
+from resy_bot.startup import StartupTimings, settle
+from tests.factories import FakeClock
+
+
+def test_startup_timings():
+    clock = FakeClock(now=100.0)
+    timings = StartupTimings(clock)
+
+    with timings.phase("import"):
+        clock.now += 0.25
+    with timings.phase("auth"):
+        clock.now += 0.125
+
+    assert timings.phases == {"import": 0.25, "auth": 0.125}
+    assert timings.total == 0.375
+    assert timings.summary() == "armed in 375.0ms (import 250.0ms, auth 125.0ms)"
+
+
+def test_startup_timings_records_failed_phase():
+    clock = FakeClock(now=100.0)
+    timings = StartupTimings(clock)
+
+    try:
+        with timings.phase("auth"):
+            clock.now += 0.5
+            raise ValueError("bad credentials")
+    except ValueError:
+        pass
+
+    assert timings.phases == {"auth": 0.5}
+
+
+def test_settle_freezes_startup_objects():
+    try:
+        settle()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
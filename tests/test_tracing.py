@@ -0,0 +1,130 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from resy_bot import tracing
+from resy_bot.api_access import build_session
+from resy_bot.errors import NoSlotsError
+from resy_bot.manager import ResyManager
+from resy_bot.stand_in import StandInResyServer
+from resy_bot.tracing import AttemptTrace, Tracer
+from tests.factories import (
+    DetailsResponseBodyFactory,
+    ReservationRequestFactory,
+    ReservationRetriesConfigFactory,
+    ResyConfigFactory,
+    SlotFactory,
+)
+
+
+@pytest.fixture(autouse=True)
+def deactivate():
+    yield
+    tracing.activate(None)
+
+
+def test_spans_are_noop_without_trace():
+    with tracing.phase("find"):
+        with tracing.span("json_decode"):
+            pass
+
+    assert tracing.current_trace() is None
+
+
+def test_phase_tags_spans():
+    trace = Tracer().start_attempt("123")
+
+    with tracing.phase("details"):
+        with tracing.span("json_decode"):
+            pass
+
+    decode, details = trace.spans
+    assert (decode.name, decode.phase) == ("json_decode", "details")
+    assert (details.name, details.phase) == ("details", None)
+    assert details.start_ns <= decode.start_ns <= decode.end_ns <= details.end_ns
+
+
+def test_bind_carries_trace_to_worker_threads():
+    trace = Tracer().start_attempt("123")
+
+    def work():
+        with tracing.span("model_build"):
+            return tracing.current_trace()
+
+    with tracing.phase("find"):
+        bound = tracing.bind(work)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(bound).result() is trace
+        assert executor.submit(tracing.current_trace).result() is None
+
+    model_build = [span for span in trace.spans if span.name == "model_build"]
+    assert model_build[0].phase == "find"
+
+
+def test_http_spans():
+    session = build_session(ResyConfigFactory.create())
+
+    with StandInResyServer() as server:
+        trace = Tracer().start_attempt("123")
+        with tracing.phase("find"):
+            session.get(server.base_url)
+            session.get(server.base_url)
+
+    names = [span.name for span in trace.spans]
+    assert names.count("connect") == 1
+    for name in ("acquire", "send", "ttfb", "body_read"):
+        assert names.count(name) == 2
+    assert all(span.phase == "find" for span in trace.spans if span.name != "find")
+
+
+def test_dump_jsonl():
+    tracer = Tracer(history=2)
+    for venue_id in ("1", "2", "3"):
+        tracer.start_attempt(venue_id)
+        with tracing.span("selection"):
+            pass
+        tracing.count("book_token_cache_hit")
+
+    out = io.StringIO()
+    tracer.dump_jsonl(out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert [line["attempt"] for line in lines] == [2, 3]
+    assert lines[0]["spans"][0]["name"] == "selection"
+    assert lines[0]["spans"][0]["duration_ms"] >= 0
+    assert lines[0]["counters"] == {"book_token_cache_hit": 1}
+
+
+def test_manager_traces_each_attempt():
+    retries_config = ReservationRetriesConfigFactory.create(
+        seconds_between_retries=0.01
+    )
+    request = ReservationRequestFactory.create()
+    api_access = MagicMock()
+    slots = SlotFactory.create_batch(2)
+    api_access.find_booking_slots.side_effect = [[], slots]
+    api_access.get_booking_token.return_value = DetailsResponseBodyFactory.create()
+    api_access.book_slot.return_value = "resy-token"
+    selector = MagicMock()
+    selector.select.return_value = slots[0]
+
+    manager = ResyManager(
+        ResyConfigFactory.create(), api_access, selector, retries_config
+    )
+    manager.make_reservation_with_retries(request)
+
+    failed, booked = manager.tracer.traces
+    assert isinstance(failed, AttemptTrace)
+    assert failed.error.startswith(NoSlotsError.__name__)
+    assert [span.name for span in failed.spans] == ["find"]
+    assert booked.error is None
+    assert [span.name for span in booked.spans] == [
+        "find",
+        "selection",
+        "details",
+        "book",
+    ]
+    assert tracing.current_trace() is None
@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock
+
+import pytest
+from requests import ConnectionError
+
+from resy_bot.api_access import ResyApiAccess
+from resy_bot.models import ConnectionPoolConfig
+from resy_bot.stand_in import StandInResyServer
+from resy_bot.warmup import ConnectionWarmer, WarmupReport
+from tests.factories import ResyConfigFactory
+
+
+def test_warm_opens_pooled_connections():
+    config = ResyConfigFactory.create()
+    pool_config = ConnectionPoolConfig(warm_connections=3, pool_maxsize=3)
+
+    with StandInResyServer(latency=0.02) as server:
+        api_access = ResyApiAccess.build(
+            config, base_url=server.base_url, pool_config=pool_config
+        )
+        warmer = ConnectionWarmer(api_access, pool_config)
+
+        report = warmer.warm()
+        assert server.connections_opened == 3
+        assert len(report.cold_latencies) == 3
+
+        assert warmer.health_check()
+        assert server.connections_opened == 3
+        assert len(report.warm_latencies) == 3
+
+
+def test_health_check_rewarms_failed_connections():
+    api_access = MagicMock()
+    api_access.ping.side_effect = [None, ConnectionError(), None, None]
+    pool_config = ConnectionPoolConfig(warm_connections=2)
+    warmer = ConnectionWarmer(api_access, pool_config)
+
+    assert not warmer.health_check()
+    assert api_access.ping.call_count == 4
+    assert len(warmer.report.warm_latencies) == 2
+
+
+def test_keep_alive_if_due():
+    api_access = MagicMock()
+    pool_config = ConnectionPoolConfig(warm_connections=2, keepalive_seconds=60)
+    warmer = ConnectionWarmer(api_access, pool_config)
+
+    warmer.keep_alive_if_due()
+    warmer.keep_alive_if_due()
+
+    assert api_access.ping.call_count == 2
+
+
+def test_record_first_request():
+    warmer = ConnectionWarmer(MagicMock(), ConnectionPoolConfig())
+    warmer.report.cold_latencies = [0.3, 0.5]
+
+    warmer.record_first_request(0.1)
+    warmer.record_first_request(0.2)
+
+    assert warmer.report.first_request_latency == 0.1
+    assert warmer.report.saved_seconds == pytest.approx(0.3)
+
+
+def test_saved_seconds_without_first_request():
+    report = WarmupReport(cold_latencies=[0.3])
+
+    assert report.saved_seconds is None
+
+
+def test_pool_config_rejects_more_warm_connections_than_pool():
+    with pytest.raises(ValueError):
+        ConnectionPoolConfig(warm_connections=5, pool_maxsize=2)
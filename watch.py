@@ -0,0 +1,69 @@
+import argparse
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+from resy_bot.constants import WATCH_PREFLIGHT_INTERVAL_SECONDS
+from resy_bot.logging import logging
+
+from resy_bot.manager import ResyManager
+from resy_bot.models import ResyConfig, WatchConfig
+from resy_bot.sniper import CancellationSniper
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def watch_for_cancellations(
+    resy_config_path: str,
+    watch_config_path: str,
+    duration: Optional[float] = None,
+    fast_decode: bool = False,
+) -> None:
+    with open(resy_config_path, "r") as f:
+        config = ResyConfig(**json.load(f))
+
+    with open(watch_config_path, "r") as f:
+        watch_config = WatchConfig(**json.load(f))
+
+    manager = ResyManager.build(config, fast_decode=fast_decode)
+    # the watch checks again every WATCH_PREFLIGHT_INTERVAL_SECONDS
+    manager.preflight(
+        datetime.now() + timedelta(seconds=WATCH_PREFLIGHT_INTERVAL_SECONDS)
+    )
+
+    sniper = CancellationSniper.build(manager, watch_config)
+    logger.info(
+        "watching %d targets at %s finds per second",
+        len(watch_config.targets),
+        watch_config.requests_per_second,
+    )
+
+    for request, resy_token in sniper.run(duration):
+        logger.info("booked venue %s: %s", request.venue_id, resy_token)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="ResyBotWatch",
+        description="Watch many venues and dates for cancellations and book them",
+    )
+
+    parser.add_argument("resy_config_path")
+    parser.add_argument("watch_config_path")
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="stop watching after this many seconds",
+    )
+    parser.add_argument(
+        "--fast-decode",
+        action="store_true",
+        help="parse find responses without pydantic validation",
+    )
+
+    args = parser.parse_args()
+
+    watch_for_cancellations(
+        args.resy_config_path, args.watch_config_path, args.duration, args.fast_decode
+    )